@@ -1,213 +1,683 @@
-import os
-from dotenv import load_dotenv
-import google.generativeai as genai
-import nbformat
-
-# Load environment variables from .env file
-load_dotenv()
-
-# --- Configuration from .env ---
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash") # Default to gemini-1.5-flash
-
-# --- LLM Client Initialization ---
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
-else:
-    raise ValueError("GOOGLE_API_KEY not found in .env. Please set your Gemini API key.")
-
-# --- Core AI Logic Functions ---
-
-def get_gemini_response(prompt: str, model_name: str = LLM_MODEL) -> str:
-    """
-    Sends a prompt to the Google Gemini LLM and returns the response.
-
-    Args:
-        prompt (str): The text prompt to send to the LLM.
-        model_name (str): The name of the Gemini model to use (defaults to LLM_MODEL from .env).
-
-    Returns:
-        str: The generated text response from the LLM.
-    """
-    try:
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content(prompt)
-        
-        # Check if the response contains parts and extract text
-        if response.parts:
-            return "".join([part.text for part in response.parts if hasattr(part, 'text')])
-        elif hasattr(response, 'text'): # Fallback for simpler responses
-            return response.text
-        else:
-            return "Error: Unexpected Gemini response structure or empty response."
-    except Exception as e:
-        # It's good practice to log the error for debugging in a real application
-        print(f"Error communicating with Gemini LLM ({model_name}): {e}")
-        return f"An error occurred while generating AI response: {e}"
-
-def parse_notebook_content(notebook_file_path: str) -> list[dict]:
-    """
-    Reads a Jupyter or Colab notebook file and extracts cell content.
-
-    Args:
-        notebook_file_path (str): The path to the .ipynb notebook file.
-
-    Returns:
-        list[dict]: A list of dictionaries, where each dictionary represents a cell
-                    and contains 'type' (e.g., 'code', 'markdown') and 'content'.
-                    Returns an empty list if the file is not found or parsing fails.
-    """
-    try:
-        with open(notebook_file_path, 'r', encoding='utf-8') as f:
-            nb = nbformat.read(f, as_version=4)
-        cells = []
-        for cell in nb.cells:
-            if cell.cell_type == 'code':
-                cells.append({'type': 'code', 'content': cell.source})
-            elif cell.cell_type == 'markdown':
-                cells.append({'type': 'markdown', 'content': cell.source})
-            # You could extend this to handle other cell types like 'raw' if needed
-        return cells
-    except FileNotFoundError:
-        print(f"Error: Notebook file not found at '{notebook_file_path}'")
-        return []
-    except Exception as e:
-        print(f"Error parsing notebook '{notebook_file_path}': {e}")
-        return []
-
-def generate_notebook_summary(notebook_cells: list[dict]) -> str:
-    """
-    Iterates through parsed notebook cells, prompts the LLM for explanations,
-    and constructs a structured summary including an overall workflow overview.
-
-    Args:
-        notebook_cells (list[dict]): A list of cell dictionaries obtained from parse_notebook_content.
-
-    Returns:
-        str: A comprehensive markdown string summarizing the notebook.
-    """
-    if not notebook_cells:
-        return "No content found in the notebook to summarize."
-
-    cell_summaries = []
-    
-    # Generate summary for each cell
-    for i, cell in enumerate(notebook_cells):
-        cell_number = i + 1
-        if cell['type'] == 'code':
-            prompt = f"""As a data science assistant, explain the following Python code block from a Jupyter/Colab notebook.
-            Focus on its purpose, what it accomplishes within a data science workflow (e.g., data loading, preprocessing, model training, visualization), and any key libraries or functions used.
-            Keep the explanation concise and directly relevant to the code provided.
-
-            Code Block {cell_number}:
-            ```python
-            {cell['content']}
-            ```
-            """
-            explanation = get_gemini_response(prompt)
-            cell_summaries.append(f"● **Cell {cell_number} (Code):** {explanation.strip()}")
-        elif cell['type'] == 'markdown':
-            # For markdown, we can either summarize it with the LLM or just extract the key lines.
-            # For simplicity and efficiency, let's extract the first few lines to indicate its content.
-            # If markdown cells are very long and complex, you might consider prompting the LLM for a summary.
-            first_lines = cell['content'].split('\n')[:2]
-            preview = ' '.join(first_lines).strip()
-            if len(cell['content'].split('\n')) > 2:
-                preview += "..." # Indicate more content
-            cell_summaries.append(f"● **Cell {cell_number} (Markdown):** Documentation/Explanation. Preview: \"{preview}\"")
-
-    # Generate overall workflow summary
-    overall_workflow_prompt = """
-    Based on the following cell-by-cell explanations from a data science notebook,
-    provide a high-level overview of the entire notebook's workflow, its primary goal,
-    and the main steps involved. Summarize the flow logically.
-
-    Cell Explanations:
-    """ + "\n".join(cell_summaries)
-
-    overall_summary_text = get_gemini_response(overall_workflow_prompt)
-    
-    # Combine into final structured output
-    final_output = "## Notebook Overview:\n"
-    final_output += overall_summary_text.strip() + "\n\n"
-    final_output += "## Cell-by-Cell Summary:\n"
-    final_output += "\n".join(cell_summaries)
-
-    return final_output
-
-# Example of how you might use these functions (for testing AI logic in isolation)
-if __name__ == "__main__":
-    # Create a dummy notebook for testing
-    dummy_notebook_content = {
-        "cells": [
-            {
-                "cell_type": "markdown",
-                "source": "# Project Introduction\nThis notebook demonstrates a machine learning pipeline from data loading to model evaluation."
-            },
-            {
-                "cell_type": "code",
-                "source": "import pandas as pd\nimport numpy as np\nfrom sklearn.model_selection import train_test_split\nfrom sklearn.ensemble import RandomForestClassifier\nfrom sklearn.metrics import accuracy_score\n\nprint('Libraries imported successfully.')"
-            },
-            {
-                "cell_type": "code",
-                "source": "data = pd.read_csv('dummy_data.csv')\nX = data[['feature1', 'feature2']]\ny = data['target']\n\nX_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)\n\nprint('Data loaded and split.')"
-            },
-            {
-                "cell_type": "markdown",
-                "source": "## Model Training\nHere, a RandomForestClassifier is trained on the preprocessed data."
-            },
-            {
-                "cell_type": "code",
-                "source": "model = RandomForestClassifier(n_estimators=100, random_state=42)\nmodel.fit(X_train, y_train)\n\npredictions = model.predict(X_test)\naccuracy = accuracy_score(y_test, predictions)\nprint(f'Model Accuracy: {accuracy:.2f}')"
-            }
-        ],
-        "metadata": {
-            "kernelspec": {
-                "display_name": "Python 3",
-                "language": "python",
-                "name": "python3"
-            },
-            "language_info": {
-                "codemirror_mode": {
-                    "name": "ipython",
-                    "version": 3
-                },
-                "file_extension": ".py",
-                "mimetype": "text/x-python",
-                "name": "python",
-                "nbconvert_exporter": "python",
-                "pygments_lexer": "ipython3",
-                "version": "3.9.7"
-            }
-        },
-        "nbformat": 4,
-        "nbformat_minor": 5
-    }
-
-    dummy_notebook_path = "temp_dummy_notebook.ipynb"
-    with open(dummy_notebook_path, 'w', encoding='utf-8') as f:
-        nbformat.write(nbformat.from_dict(dummy_notebook_content), f)
-    print(f"Created dummy notebook for testing: {dummy_notebook_path}")
-
-    try:
-        print(f"\nAnalyzing notebook: {dummy_notebook_path} using Gemini model: {LLM_MODEL}")
-        parsed_cells = parse_notebook_content(dummy_notebook_path)
-        if parsed_cells:
-            full_explanation = generate_notebook_summary(parsed_cells)
-            print("\n" + "="*50)
-            print("GENERATED NOTEBOOK EXPLANATION:")
-            print("="*50)
-            print(full_explanation)
-            
-            # For testing, save the output
-            with open("ai_logic_test_output.md", "w", encoding="utf-8") as f:
-                f.write(full_explanation)
-            print("\nTest output saved to ai_logic_test_output.md")
-        else:
-            print("No cells parsed from the dummy notebook.")
-
-    finally:
-        # Clean up the dummy notebook
-        if os.path.exists(dummy_notebook_path):
-            os.remove(dummy_notebook_path)
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FutureTimeout
+from typing import Callable
+from dotenv import load_dotenv
+import google.generativeai as genai
+import nbformat
+from dataflow import analyze_notebook_dataflow, select_upstream_context
+from prompt_compaction import compact_template, compact_code, record_compaction, compaction_report
+from budget import (plan_within_budget, describe_plan, cell_complexity, local_code_preview,
+                    get_user_remaining_tokens, charge_user_tokens, claim_user_prompt, project_overview_tokens,
+                    EXPECTED_OUTPUT_TOKENS_PER_CELL, OVERVIEW_OUTPUT_TOKENS)
+from token_utils import estimate_tokens
+from concurrency import AdaptiveConcurrencyController, classify_exception, RequestCancelled
+from response_cache import (response_cache_key, get_cached_response, store_response, prefetch_cached_responses,
+                            begin_request, finish_request)
+from output_digest import digest_cell_outputs
+from models import Cell, CellExplanation, NotebookExplanation, ensure_cells
+from journal import JOURNAL_ENABLED, JobJournal, journal_key, prompt_digest
+from profiling import profile_stage, profiled
+from routing import choose_tier, passes_quality_check, record_tier_call, routing_snapshot
+from static_summary import summarize_notebook_locally, format_local_summary
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration from .env ---
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash") # Default to gemini-1.5-flash
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "300")) # Max tokens of upstream definitions per cell prompt
+TOKEN_BUDGET_PER_JOB = int(os.getenv("TOKEN_BUDGET_PER_JOB", "200000")) # Projected tokens allowed per notebook (0 = unlimited)
+TOKEN_BUDGET_PER_USER = int(os.getenv("TOKEN_BUDGET_PER_USER", "0")) # Tokens allowed per user for this process (0 = unlimited)
+FAST_LLM_MODEL = os.getenv("FAST_LLM_MODEL", LLM_MODEL) # Tier for simple cells (e.g. a smaller flash model)
+STRONG_LLM_MODEL = os.getenv("STRONG_LLM_MODEL", LLM_MODEL) # Tier for complex cells and the overview
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "false").lower() == "true" # Opt-in; off sends everything to LLM_MODEL
+MODEL_CASCADE_ENABLED = os.getenv("MODEL_CASCADE_ENABLED", "true").lower() == "true" # Escalate failed fast-tier answers
+ROUTING_COMPLEXITY_THRESHOLD = int(os.getenv("ROUTING_COMPLEXITY_THRESHOLD", "40")) # Cell score for the strong tier
+OUTPUT_DIGEST_TOKEN_CAP = int(os.getenv("OUTPUT_DIGEST_TOKEN_CAP", "120")) # Max tokens of recorded output per cell prompt (0 = off)
+LLM_INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "4")) # Starting in-flight request window
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16")) # Upper bound for the adaptive window
+LLM_LATENCY_TARGET_S = float(os.getenv("LLM_LATENCY_TARGET_S", "20")) # Slower responses count as congestion (0 = off)
+
+# --- LLM Client Initialization ---
+if GOOGLE_API_KEY:
+    genai.configure(api_key=GOOGLE_API_KEY)
+else:
+    raise ValueError("GOOGLE_API_KEY not found in .env. Please set your Gemini API key.")
+
+# --- Adaptive concurrency shared by every LLM call in this process ---
+llm_concurrency = AdaptiveConcurrencyController(
+    initial_window=LLM_INITIAL_CONCURRENCY,
+    max_window=LLM_MAX_CONCURRENCY,
+    latency_target_s=LLM_LATENCY_TARGET_S,
+)
+
+# --- Prompt Templates ---
+# Templates are dedented once at import time so requests don't carry source indentation.
+_CODE_CELL_PROMPT_RAW = """
+    As a data science assistant, explain the following Python code block from a Jupyter/Colab notebook.
+    Focus on its purpose, what it accomplishes within a data science workflow (e.g., data loading, preprocessing, model training, visualization), and any key libraries or functions used.
+    Keep the explanation concise and directly relevant to the code provided.
+
+    {code_section}
+    """
+_BATCH_PROMPT_RAW = """
+    As a data science assistant, explain each of the following Python code blocks from a Jupyter/Colab notebook.
+    For every block, focus on its purpose, what it accomplishes within a data science workflow (e.g., data loading, preprocessing, model training, visualization), and any key libraries or functions used.
+    Keep each explanation concise. Answer with one section per block, each starting with a line "### Block N" where N is the block's number.
+
+    {blocks}
+    """
+_CODE_SECTION_RAW = """
+    {context_section}Code Block {cell_number}:
+    ```python
+    {code}
+    ```{output_section}
+    """
+_OUTPUT_SECTION_RAW = """
+    Recorded output of Code Block {cell_number} (digest):
+    ```
+    {output_digest}
+    ```
+    """
+_CONTEXT_SECTION_RAW = """
+    Relevant definitions from earlier cells (for context only, do not explain them):
+    ```python
+    {upstream_context}
+    ```
+    """
+_OVERVIEW_PROMPT_RAW = """
+    Based on the following cell-by-cell explanations from a data science notebook,
+    provide a high-level overview of the entire notebook's workflow, its primary goal,
+    and the main steps involved. Summarize the flow logically.
+
+    Cell Explanations:
+    """
+CODE_CELL_PROMPT_TEMPLATE = compact_template(_CODE_CELL_PROMPT_RAW)
+BATCH_PROMPT_TEMPLATE = compact_template(_BATCH_PROMPT_RAW)
+CODE_SECTION_TEMPLATE = compact_template(_CODE_SECTION_RAW)
+OUTPUT_SECTION_TEMPLATE = "\n" + compact_template(_OUTPUT_SECTION_RAW)
+CONTEXT_SECTION_TEMPLATE = compact_template(_CONTEXT_SECTION_RAW) + "\n\n"
+OVERVIEW_PROMPT_TEMPLATE = compact_template(_OVERVIEW_PROMPT_RAW) + "\n"
+
+# --- Core AI Logic Functions ---
+
+def get_gemini_response(prompt: str, model_name: str = LLM_MODEL,
+                        cancel_event: threading.Event | None = None) -> str:
+    """
+    Sends a prompt to the Google Gemini LLM and returns the response.
+    The call waits for a slot in `llm_concurrency`, and its latency and outcome
+    feed back into that controller's window. Successful responses are cached per
+    (model, prompt), so repeated or prefetched prompts return immediately, and a
+    prompt that is already in flight is awaited rather than sent a second time.
+
+    Args:
+        prompt (str): The text prompt to send to the LLM.
+        model_name (str): The name of the Gemini model to use (defaults to LLM_MODEL from .env).
+        cancel_event (threading.Event | None): The job's cancellation flag. Once it is set, the request
+                                               is not sent (RequestCancelled is raised instead).
+
+    Returns:
+        str: The generated text response from the LLM.
+    """
+    cache_key = response_cache_key(model_name, prompt)
+    while True:
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            return cached
+        owner, pending = begin_request(cache_key)
+        if owner:
+            break
+        # The same prompt is already being sent (e.g. by a speculative run): share its answer
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise RequestCancelled()
+            try:
+                shared = pending.result(timeout=0.1)
+                break
+            except FutureTimeout:
+                continue
+        if shared is not None:
+            return shared
+        # The other request failed or was cancelled; send the prompt ourselves
+
+    text = None
+    try:
+        with llm_concurrency.slot(cancel_event):
+            start_time = time.monotonic()
+            try:
+                model = genai.GenerativeModel(model_name)
+                response = model.generate_content(prompt)
+            except Exception as e:
+                llm_concurrency.record_failure(time.monotonic() - start_time, classify_exception(e))
+                raise
+            llm_concurrency.record_success(time.monotonic() - start_time)
+        
+        # Check if the response contains parts and extract text
+        if response.parts:
+            text = "".join([part.text for part in response.parts if hasattr(part, 'text')])
+            store_response(cache_key, text)
+            return text
+        elif hasattr(response, 'text'): # Fallback for simpler responses
+            text = response.text
+            store_response(cache_key, text)
+            return text
+        else:
+            return "Error: Unexpected Gemini response structure or empty response."
+    except RequestCancelled:
+        raise
+    except Exception as e:
+        # It's good practice to log the error for debugging in a real application
+        print(f"Error communicating with Gemini LLM ({model_name}): {e}")
+        return f"An error occurred while generating AI response: {e}"
+    finally:
+        finish_request(cache_key, text)
+
+def _extract_cells(nb: nbformat.NotebookNode) -> list[Cell]:
+    """
+    Converts a loaded notebook into the list of Cell objects used throughout the pipeline.
+    """
+    cells = []
+    for cell in nb.cells:
+        if cell.cell_type == 'code':
+            cells.append(Cell.create('code', cell.source,
+                                     digest_cell_outputs(cell.get('outputs', []), OUTPUT_DIGEST_TOKEN_CAP)))
+        elif cell.cell_type == 'markdown':
+            cells.append(Cell.create('markdown', cell.source))
+        # You could extend this to handle other cell types like 'raw' if needed
+    return cells
+
+def parse_notebook_content(notebook_file_path: str) -> list[Cell]:
+    """
+    Reads a Jupyter or Colab notebook file and extracts cell content.
+
+    Args:
+        notebook_file_path (str): The path to the .ipynb notebook file.
+
+    Returns:
+        list[Cell]: A list of immutable Cell objects with 'type' (e.g., 'code', 'markdown'),
+                    'content', the 'output_digest' of code cells' recorded outputs and
+                    precomputed hash, line count, token estimate and AST.
+                    Returns an empty list if the file is not found or parsing fails.
+    """
+    try:
+        with profile_stage('parse'):
+            with open(notebook_file_path, 'r', encoding='utf-8') as f:
+                nb = nbformat.read(f, as_version=4)
+            return _extract_cells(nb)
+    except FileNotFoundError:
+        print(f"Error: Notebook file not found at '{notebook_file_path}'")
+        return []
+    except Exception as e:
+        print(f"Error parsing notebook '{notebook_file_path}': {e}")
+        return []
+
+def parse_notebook_string(notebook_json: str) -> list[Cell]:
+    """
+    Parses notebook JSON that is already in memory (e.g. an HTTP request body),
+    without writing it to a temporary file first.
+
+    Args:
+        notebook_json (str): The raw .ipynb JSON content.
+
+    Returns:
+        list[Cell]: Cells in the same format as parse_notebook_content.
+                    Returns an empty list if parsing fails.
+    """
+    try:
+        with profile_stage('parse'):
+            return _extract_cells(nbformat.reads(notebook_json, as_version=4))
+    except Exception as e:
+        print(f"Error parsing notebook content: {e}")
+        return []
+
+def _build_code_section(cell: Cell, cell_index: int, dataflow: list[dict], run_stats: dict) -> str:
+    """
+    Builds the compacted, cell-specific part of a code cell prompt: upstream context,
+    the code block and, if present, the digest of its recorded outputs.
+    """
+    upstream_context = select_upstream_context(dataflow, cell_index, CONTEXT_TOKEN_BUDGET)
+    context_section = ""
+    if upstream_context:
+        compacted_context = compact_code(upstream_context)
+        record_compaction(run_stats, upstream_context, compacted_context)
+        context_section = CONTEXT_SECTION_TEMPLATE.format(upstream_context=compacted_context)
+    code = compact_code(cell.content, cell.tree)
+    record_compaction(run_stats, cell.content, code)
+    output_section = ""
+    if cell.output_digest:
+        output_section = OUTPUT_SECTION_TEMPLATE.format(cell_number=cell_index + 1, output_digest=cell.output_digest)
+    return CODE_SECTION_TEMPLATE.format(context_section=context_section, cell_number=cell_index + 1,
+                                        code=code, output_section=output_section)
+
+def _build_batch_prompt(batch: list[int], code_sections: dict[int, str], run_stats: dict) -> str:
+    """
+    Builds the prompt for one planned batch: a single-cell prompt, or a multi-block prompt.
+    """
+    if len(batch) == 1:
+        record_compaction(run_stats, _CODE_CELL_PROMPT_RAW, CODE_CELL_PROMPT_TEMPLATE)
+        return CODE_CELL_PROMPT_TEMPLATE.format(code_section=code_sections[batch[0]])
+    record_compaction(run_stats, _BATCH_PROMPT_RAW, BATCH_PROMPT_TEMPLATE)
+    return BATCH_PROMPT_TEMPLATE.format(blocks="\n\n".join(code_sections[i] for i in batch))
+
+def _route_cells(cells: list[Cell]) -> tuple[str | None, str]:
+    """Returns (tier, model name) for a cell prompt; the tier is None when routing is disabled."""
+    if not MODEL_ROUTING_ENABLED:
+        return None, LLM_MODEL
+    tier = choose_tier(cells, ROUTING_COMPLEXITY_THRESHOLD)
+    return tier, FAST_LLM_MODEL if tier == 'fast' else STRONG_LLM_MODEL
+
+def _prompt_cache_keys(prepared: dict) -> list[str]:
+    """Response cache key of each planned cell prompt, for the model tier it is routed to."""
+    return [response_cache_key(_route_cells(cells)[1], prompt)
+            for prompt, cells in zip(prepared['prompts'], prepared['batch_cells'])]
+
+def _prefetch_shared_responses(prepared: dict) -> set[int]:
+    """
+    Fetches the cached answers to all of a notebook's cell prompts from the shared
+    cache tier in one round trip. Returns the indices of the prompts already answered.
+    """
+    keys = _prompt_cache_keys(prepared)
+    escalation_keys = []
+    if MODEL_CASCADE_ENABLED:
+        escalation_keys = [response_cache_key(STRONG_LLM_MODEL, prompt)
+                           for prompt, cells in zip(prepared['prompts'], prepared['batch_cells'])
+                           if _route_cells(cells)[0] == 'fast']
+    cached = prefetch_cached_responses(keys + escalation_keys)
+    return {index for index, key in enumerate(keys) if key in cached}
+
+def _prompt_tokens(prompt: str, cells: list[Cell]) -> int:
+    """Projected tokens (prompt plus expected answer) of one cell prompt, as charged to the user ledger."""
+    return estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS_PER_CELL * len(cells)
+
+def _run_routed_prompt(prompt: str, cells: list[Cell], cancel_event: threading.Event | None = None) -> str:
+    """
+    Sends a cell prompt to the model tier its complexity calls for. With cascading enabled,
+    a fast-tier answer that fails the quality check is retried on the strong tier.
+    """
+    tier, model_name = _route_cells(cells)
+    if tier is None:
+        return get_gemini_response(prompt, model_name, cancel_event)
+    start_time = time.monotonic()
+    response = get_gemini_response(prompt, model_name, cancel_event)
+    record_tier_call(tier, time.monotonic() - start_time)
+    if tier == 'fast' and MODEL_CASCADE_ENABLED and not passes_quality_check(response):
+        start_time = time.monotonic()
+        response = get_gemini_response(prompt, STRONG_LLM_MODEL, cancel_event)
+        record_tier_call('strong', time.monotonic() - start_time, escalated=True)
+    return response
+
+def _split_batch_response(batch: list[int], response: str) -> dict[int, str]:
+    """
+    Splits the answer to a batch prompt back into one explanation per cell.
+
+    Returns:
+        dict[int, str]: Explanation per cell index. Cells the LLM skipped get a short placeholder.
+    """
+    if len(batch) == 1:
+        return {batch[0]: response.strip()}
+
+    # re.split with a capture group yields [preamble, number, text, number, text, ...]
+    parts = re.split(r'^#+\s*(?:Code\s+)?Block\s+(\d+)\s*:?\s*$', response, flags=re.MULTILINE | re.IGNORECASE)
+    by_number = {int(number): text.strip() for number, text in zip(parts[1::2], parts[2::2])}
+    cell_numbers = ", ".join(str(i + 1) for i in batch)
+    explanations = {}
+    for i in batch:
+        explanations[i] = by_number.get(i + 1) or f"Explained together with cells {cell_numbers}; no separate explanation was returned."
+    if not by_number: # Unstructured answer: keep it rather than lose it
+        explanations[batch[0]] = response.strip()
+    return explanations
+
+def _prepare_cell_prompts(notebook_cells: list[Cell], run_stats: dict,
+                          token_budget: int | None, user_id: str | None) -> dict:
+    """
+    Runs every step before the first LLM call: dataflow analysis, prompt compaction,
+    costing and budget planning. generate_notebook_summary and prefetch_cell_explanations
+    share it so prefetched prompts are byte-identical to the ones the real run sends.
+
+    Returns:
+        dict: 'dataflow', 'plan', 'prompts' (one per planned batch) and 'batch_cells'
+              (the cells in each batch, for routing).
+    """
+    # Static def-use analysis so each prompt only carries the upstream definitions it depends on
+    dataflow = analyze_notebook_dataflow(notebook_cells)
+
+    # Build every code cell's prompt body up front so the whole job can be costed before any LLM call
+    code_sections = {}
+    for i, cell in enumerate(notebook_cells):
+        if cell.type == 'code':
+            code_sections[i] = _build_code_section(cell, i, dataflow, run_stats)
+
+    # Work out the effective budget and how to degrade if the notebook doesn't fit
+    if token_budget is None:
+        token_budget = TOKEN_BUDGET_PER_JOB
+    effective_budget = token_budget if token_budget > 0 else None
+    user_remaining = get_user_remaining_tokens(user_id, TOKEN_BUDGET_PER_USER)
+    if user_remaining is not None:
+        effective_budget = user_remaining if effective_budget is None else min(effective_budget, user_remaining)
+    plan = plan_within_budget(
+        cell_tokens={i: estimate_tokens(section) for i, section in code_sections.items()},
+        complexity={i: cell_complexity(notebook_cells[i].content, notebook_cells[i].tree) for i in code_sections},
+        template_tokens=estimate_tokens(CODE_CELL_PROMPT_TEMPLATE),
+        overview_tokens=estimate_tokens(OVERVIEW_PROMPT_TEMPLATE),
+        token_budget=effective_budget,
+    )
+    return {
+        'dataflow': dataflow,
+        'plan': plan,
+        'prompts': [_build_batch_prompt(batch, code_sections, run_stats) for batch in plan['batches']],
+        'batch_cells': [[notebook_cells[i] for i in batch] for batch in plan['batches']],
+    }
+
+def prefetch_cell_explanations(notebook_cells: list[Cell], max_prompts: int,
+                               cancel_event: threading.Event | None = None,
+                               user_id: str | None = None) -> tuple[int, int]:
+    """
+    Speculatively sends the first planned cell prompts so their answers are cached
+    before the user asks for the explanation. Stops early once `cancel_event` is set.
+    Prompts actually sent are charged to the user's ledger; the real run then only
+    charges for what is still missing from the cache and not claimed by this run.
+
+    Args:
+        notebook_cells (list[Cell]): Cells as returned by parse_notebook_content.
+        max_prompts (int): Maximum number of LLM prompts to spend speculatively.
+        cancel_event (threading.Event | None): Set it to abandon the remaining prompts.
+        user_id (str | None): Identifier of the user the speculation runs for, for TOKEN_BUDGET_PER_USER.
+
+    Returns:
+        tuple[int, int]: (prompts sent or already cached, prompts the full run needs).
+    """
+    prepared = _prepare_cell_prompts(ensure_cells(notebook_cells), {}, None, user_id)
+    cached = _prefetch_shared_responses(prepared)
+    keys = _prompt_cache_keys(prepared)
+    sent = 0
+    for index, (prompt, cells) in enumerate(zip(prepared['prompts'][:max_prompts], prepared['batch_cells'])):
+        already_cached = index in cached or get_cached_response(keys[index]) is not None
+        try:
+            _run_routed_prompt(prompt, cells, cancel_event)
+        except RequestCancelled:
+            break
+        # The real run may have started meanwhile and paid for this prompt itself
+        if not already_cached and claim_user_prompt(user_id, keys[index]):
+            charge_user_tokens(user_id, _prompt_tokens(prompt, cells))
+        sent += 1
+    return sent, len(prepared['prompts'])
+
+def _is_error_response(response: str) -> bool:
+    """True for the placeholder texts get_gemini_response returns instead of an answer."""
+    return response.startswith(("An error occurred while generating AI response",
+                                "Error: Unexpected Gemini response structure"))
+
+def _open_job_journal(notebook_cells: list[Cell], token_budget: int | None,
+                      user_id: str | None) -> JobJournal | None:
+    """Opens the resume journal for this notebook and options (None when journaling is disabled)."""
+    if not JOURNAL_ENABLED:
+        return None
+    key = journal_key(*(cell.content_hash for cell in notebook_cells), LLM_MODEL, FAST_LLM_MODEL, STRONG_LLM_MODEL,
+                      str(MODEL_ROUTING_ENABLED), str(MODEL_CASCADE_ENABLED), str(token_budget), user_id or "")
+    try:
+        return JobJournal(key)
+    except OSError as e:
+        print(f"Could not open the job journal, continuing without resume support: {e}")
+        return None
+
+def _run_cell_prompts(prepared: dict, plan: dict, run_stats: dict, journal: JobJournal | None,
+                      total_prompts: int, progress_callback: Callable[[int, int], None] | None,
+                      cancel_event: threading.Event | None) -> dict[int, CellExplanation]:
+    """
+    Answers every planned cell prompt, reusing journaled answers and journaling new ones
+    as they arrive. Prompts are independent, so they are issued concurrently;
+    llm_concurrency decides how many are actually in flight.
+
+    Returns:
+        dict[int, CellExplanation]: Explanations of the LLM-explained code cells by cell index.
+    """
+    explanations = {}
+
+    def add_answer(batch: list[int], response: str) -> None:
+        for i, text in _split_batch_response(batch, response).items():
+            explanations[i] = CellExplanation(i, 'code', text, 'llm')
+
+    executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY)
+    try:
+        futures, completed = {}, 0
+        for prompt, cells, batch in zip(prepared['prompts'], prepared['batch_cells'], plan['batches']):
+            prompt_key = prompt_digest(prompt)
+            journaled = journal.completed.get(prompt_key) if journal is not None else None
+            if journaled is not None:
+                add_answer(batch, journaled)
+                completed += 1
+            else:
+                futures[executor.submit(_run_routed_prompt, prompt, cells, cancel_event)] = (batch, prompt_key)
+        run_stats['resumed_prompts'] = completed
+        if progress_callback and completed:
+            progress_callback(completed, total_prompts)
+
+        pending = set(futures)
+        while pending:
+            # Wake up periodically so a cancellation is noticed even while every request is in flight
+            done, pending = wait(pending, timeout=0.25 if cancel_event is not None else None,
+                                 return_when=FIRST_COMPLETED)
+            if cancel_event is not None and cancel_event.is_set():
+                raise RequestCancelled()
+            for future in done:
+                batch, prompt_key = futures[future]
+                response = future.result()
+                add_answer(batch, response)
+                if journal is not None and not _is_error_response(response):
+                    journal.record(prompt_key, batch, response)
+                completed += 1
+                if progress_callback:
+                    progress_callback(completed, total_prompts)
+    finally:
+        # On cancellation, drop queued prompts and do not wait for requests already in flight
+        executor.shutdown(wait=cancel_event is None or not cancel_event.is_set(), cancel_futures=True)
+    return explanations
+
+@profiled("explain_notebook")
+def explain_notebook(notebook_cells: list[Cell], run_stats: dict | None = None,
+                     token_budget: int | None = None, user_id: str | None = None,
+                     progress_callback: Callable[[int, int], None] | None = None,
+                     cancel_event: threading.Event | None = None) -> NotebookExplanation:
+    """
+    Iterates through parsed notebook cells, prompts the LLM for explanations,
+    and builds a structured explanation including an overall workflow overview.
+
+    If the projected token cost exceeds the budget, the run degrades gracefully:
+    code cells are batched first, then only the most complex cells are sent to the LLM
+    while the rest get local previews. The degradation is noted in the result.
+
+    Args:
+        notebook_cells (list[Cell]): Cells obtained from parse_notebook_content (legacy dicts are converted).
+        run_stats (dict | None): Optional dictionary that is filled with per-notebook metrics
+                                 (e.g. 'original_tokens' / 'compacted_tokens' and the formatted
+                                 'compaction_report' from prompt compaction, 'budget_plan' from budgeting).
+        token_budget (int | None): Token budget for this job (defaults to TOKEN_BUDGET_PER_JOB; 0 disables it).
+        user_id (str | None): Identifier of the requesting user, for the TOKEN_BUDGET_PER_USER limit.
+        progress_callback (Callable[[int, int], None] | None): Called as (completed, total) LLM prompts
+                                                              after each prompt finishes, possibly from a worker thread.
+        cancel_event (threading.Event | None): Set it (e.g. when the session goes away) to stop the run:
+                                               queued prompts are dropped, in-flight requests are abandoned
+                                               (their answers still land in the response cache) and
+                                               RequestCancelled is raised.
+
+    Returns:
+        NotebookExplanation: The overview, one CellExplanation per cell and any processing notes.
+
+    Raises:
+        RequestCancelled: If `cancel_event` was set before the explanation was complete.
+    """
+    notebook_cells = ensure_cells(notebook_cells)
+    if run_stats is None:
+        run_stats = {}
+
+    with profile_stage('build_prompts'):
+        prepared = _prepare_cell_prompts(notebook_cells, run_stats, token_budget, user_id)
+    dataflow, plan = prepared['dataflow'], prepared['plan']
+    run_stats['budget_plan'] = plan
+    cached = _prefetch_shared_responses(prepared)
+    run_stats['cached_prompts'] = len(cached)
+    # Answers already cached, or claimed by a speculative run that is still fetching them, cost
+    # nothing now; the overview is charged separately once its prompt is known.
+    keys = _prompt_cache_keys(prepared)
+    prepaid = {i for i, key in enumerate(keys) if i in cached or not claim_user_prompt(user_id, key)}
+    overview_projection = project_overview_tokens(estimate_tokens(OVERVIEW_PROMPT_TEMPLATE),
+                                                  sum(len(batch) for batch in plan['batches']),
+                                                  len(plan['local_cells']))
+    prepaid_tokens = sum(_prompt_tokens(prepared['prompts'][i], prepared['batch_cells'][i])
+                         for i in prepaid)
+    charge_user_tokens(user_id, max(plan['projected_tokens'] - overview_projection - prepaid_tokens, 0))
+
+    # Generate explanations for code cells according to the plan. Answers already in this
+    # job's journal (from an interrupted earlier run) are reused; the rest are sent to the LLM.
+    total_prompts = len(prepared['prompts']) + 1 # +1 for the overview prompt
+    journal = _open_job_journal(notebook_cells, token_budget, user_id)
+    try:
+        with profile_stage('llm_cell_prompts'):
+            explanations = _run_cell_prompts(prepared, plan, run_stats, journal, total_prompts,
+                                             progress_callback, cancel_event)
+    finally:
+        if journal is not None:
+            journal.close()
+    for i in plan['local_cells']:
+        cell = notebook_cells[i]
+        text = local_code_preview(cell.content, list(dataflow[i]['defs']), cell.tree)
+        explanations[i] = CellExplanation(i, 'code', text, 'local')
+
+    # For markdown, we can either summarize it with the LLM or just extract the key lines.
+    # For simplicity and efficiency, let's extract the first few lines to indicate its content.
+    # If markdown cells are very long and complex, you might consider prompting the LLM for a summary.
+    for i, cell in enumerate(notebook_cells):
+        if cell.type == 'markdown':
+            text = f"Documentation/Explanation. Preview: \"{cell.markdown_preview()}\""
+            explanations[i] = CellExplanation(i, 'markdown', text, 'markdown')
+    cell_explanations = tuple(explanations[i] for i in sorted(explanations))
+
+    # Generate overall workflow summary
+    cell_summaries = "\n".join(explanation.to_markdown() for explanation in cell_explanations)
+    overall_workflow_prompt = OVERVIEW_PROMPT_TEMPLATE + cell_summaries
+    record_compaction(run_stats, _OVERVIEW_PROMPT_RAW, OVERVIEW_PROMPT_TEMPLATE)
+    run_stats['compaction_report'] = compaction_report(run_stats)
+
+    overview_model = STRONG_LLM_MODEL if MODEL_ROUTING_ENABLED else LLM_MODEL
+    if not plan['overview']:
+        # The budget leaves no room for the overview prompt: summarize locally instead of calling the LLM
+        overall_summary_text = format_local_summary(summarize_notebook_locally(notebook_cells))
+    else:
+        overview_key = response_cache_key(overview_model, overall_workflow_prompt)
+        if get_cached_response(overview_key) is None and claim_user_prompt(user_id, overview_key):
+            charge_user_tokens(user_id, estimate_tokens(overall_workflow_prompt) + OVERVIEW_OUTPUT_TOKENS)
+        with profile_stage('llm_overview'):
+            overall_summary_text = get_gemini_response(overall_workflow_prompt, overview_model, cancel_event)
+    run_stats['concurrency'] = llm_concurrency.snapshot()
+    run_stats['routing'] = routing_snapshot()
+    if journal is not None and not _is_error_response(overall_summary_text):
+        journal.discard() # The job produced its result; nothing left to resume
+    if progress_callback:
+        progress_callback(total_prompts, total_prompts)
+
+    notes = ()
+    budget_note = describe_plan(plan)
+    if budget_note:
+        run_stats['degradation_note'] = budget_note
+        notes = (f"**Budget note:** {budget_note}",)
+    return NotebookExplanation(overview=overall_summary_text, cells=cell_explanations, notes=notes)
+
+def generate_notebook_summary(notebook_cells: list[Cell], run_stats: dict | None = None,
+                              token_budget: int | None = None, user_id: str | None = None,
+                              progress_callback: Callable[[int, int], None] | None = None,
+                              cancel_event: threading.Event | None = None) -> str:
+    """
+    Explains a notebook and returns the result as Markdown. See explain_notebook for the
+    structured result and the meaning of each argument.
+
+    Args:
+        notebook_cells (list[Cell]): Cells obtained from parse_notebook_content.
+
+    Returns:
+        str: A comprehensive markdown string summarizing the notebook.
+    """
+    if not notebook_cells:
+        return "No content found in the notebook to summarize."
+    return explain_notebook(notebook_cells, run_stats, token_budget, user_id, progress_callback,
+                            cancel_event).to_markdown()
+
+# Example of how you might use these functions (for testing AI logic in isolation)
+if __name__ == "__main__":
+    # Create a dummy notebook for testing
+    dummy_notebook_content = {
+        "cells": [
+            {
+                "cell_type": "markdown",
+                "source": "# Project Introduction\nThis notebook demonstrates a machine learning pipeline from data loading to model evaluation."
+            },
+            {
+                "cell_type": "code",
+                "source": "import pandas as pd\nimport numpy as np\nfrom sklearn.model_selection import train_test_split\nfrom sklearn.ensemble import RandomForestClassifier\nfrom sklearn.metrics import accuracy_score\n\nprint('Libraries imported successfully.')"
+            },
+            {
+                "cell_type": "code",
+                "source": "data = pd.read_csv('dummy_data.csv')\nX = data[['feature1', 'feature2']]\ny = data['target']\n\nX_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)\n\nprint('Data loaded and split.')"
+            },
+            {
+                "cell_type": "markdown",
+                "source": "## Model Training\nHere, a RandomForestClassifier is trained on the preprocessed data."
+            },
+            {
+                "cell_type": "code",
+                "source": "model = RandomForestClassifier(n_estimators=100, random_state=42)\nmodel.fit(X_train, y_train)\n\npredictions = model.predict(X_test)\naccuracy = accuracy_score(y_test, predictions)\nprint(f'Model Accuracy: {accuracy:.2f}')"
+            }
+        ],
+        "metadata": {
+            "kernelspec": {
+                "display_name": "Python 3",
+                "language": "python",
+                "name": "python3"
+            },
+            "language_info": {
+                "codemirror_mode": {
+                    "name": "ipython",
+                    "version": 3
+                },
+                "file_extension": ".py",
+                "mimetype": "text/x-python",
+                "name": "python",
+                "nbconvert_exporter": "python",
+                "pygments_lexer": "ipython3",
+                "version": "3.9.7"
+            }
+        },
+        "nbformat": 4,
+        "nbformat_minor": 5
+    }
+
+    dummy_notebook_path = "temp_dummy_notebook.ipynb"
+    with open(dummy_notebook_path, 'w', encoding='utf-8') as f:
+        nbformat.write(nbformat.from_dict(dummy_notebook_content), f)
+    print(f"Created dummy notebook for testing: {dummy_notebook_path}")
+
+    try:
+        print(f"\nAnalyzing notebook: {dummy_notebook_path} using Gemini model: {LLM_MODEL}")
+        parsed_cells = parse_notebook_content(dummy_notebook_path)
+        if parsed_cells:
+            full_explanation = generate_notebook_summary(parsed_cells)
+            print("\n" + "="*50)
+            print("GENERATED NOTEBOOK EXPLANATION:")
+            print("="*50)
+            print(full_explanation)
+            
+            # For testing, save the output
+            with open("ai_logic_test_output.md", "w", encoding="utf-8") as f:
+                f.write(full_explanation)
+            print("\nTest output saved to ai_logic_test_output.md")
+        else:
+            print("No cells parsed from the dummy notebook.")
+
+    finally:
+        # Clean up the dummy notebook
+        if os.path.exists(dummy_notebook_path):
+            os.remove(dummy_notebook_path)
             print(f"\nCleaned up dummy notebook: {dummy_notebook_path}")
\ No newline at end of file
@@ -0,0 +1,211 @@
+import asyncio
+import dataclasses
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import uvicorn
+
+from ai_logic import GOOGLE_API_KEY, explain_notebook, parse_notebook_string, llm_concurrency
+from concurrency import RequestCancelled
+from models import NotebookExplanation
+from renderer import iter_html_document
+
+# --- Configuration from .env ---
+API_WORKERS = int(os.getenv("API_WORKERS", "4")) # Notebooks processed concurrently per API process
+API_JOB_TIMEOUT_S = float(os.getenv("API_JOB_TIMEOUT_S", "600")) # Per-job running-time limit (time queued is not counted)
+API_MAX_QUEUED_JOBS = int(os.getenv("API_MAX_QUEUED_JOBS", "100")) # Reject new jobs beyond this backlog
+API_MAX_NOTEBOOK_BYTES = int(os.getenv("API_MAX_NOTEBOOK_BYTES", str(20 * 1024 * 1024)))
+API_JOB_RETENTION_S = float(os.getenv("API_JOB_RETENTION_S", "3600")) # Finished jobs are forgotten after this
+
+# --- Job state ---
+# Jobs live in this process only; run replicas behind a load balancer with sticky routing
+# on the job id (or a shared result store) so status polls reach the process that owns the job.
+jobs = {}
+_submissions_in_progress = 0 # Uploads being read or parsed; they count against API_MAX_QUEUED_JOBS
+_background_tasks = set() # Strong references so running job tasks aren't garbage collected
+worker_pool = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="explainer-worker")
+
+app = FastAPI(title="Data Science Notebook Explainer API")
+
+def _active_job_count() -> int:
+    return sum(1 for job in jobs.values() if job['status'] in ('queued', 'running'))
+
+def _purge_expired_jobs() -> None:
+    """Drops finished jobs older than API_JOB_RETENTION_S so memory stays bounded."""
+    cutoff = time.time() - API_JOB_RETENTION_S
+    for job_id in [job_id for job_id, job in jobs.items()
+                   if job['finished_at'] is not None and job['finished_at'] < cutoff]:
+        del jobs[job_id]
+
+def _run_pipeline(cells: list, job: dict, on_start) -> NotebookExplanation:
+    """Runs the blocking explain stage inside a worker thread."""
+    if job['cancel_event'].is_set():
+        raise RequestCancelled() # Cancelled while still queued
+    job['status'] = 'running'
+    job['started_at'] = time.time()
+    on_start()
+    return explain_notebook(cells, job['stats'], user_id=job['user_id'], cancel_event=job['cancel_event'])
+
+async def _process_job(job_id: str, cells: list) -> None:
+    """Schedules a job on the worker pool and records its outcome, enforcing the job timeout."""
+    job = jobs[job_id]
+    loop = asyncio.get_running_loop()
+    started = asyncio.Event()
+    future = loop.run_in_executor(worker_pool, _run_pipeline, cells, job,
+                                  lambda: loop.call_soon_threadsafe(started.set))
+    try:
+        # The timeout clock starts when a worker picks the job up, not while it waits in the queue
+        waiting = asyncio.create_task(started.wait())
+        await asyncio.wait({future, waiting}, return_when=asyncio.FIRST_COMPLETED)
+        waiting.cancel()
+        job['result'] = await asyncio.wait_for(future, timeout=API_JOB_TIMEOUT_S)
+        job['status'] = 'done'
+    except asyncio.TimeoutError:
+        # Stops the worker from sending further prompts; requests already in flight are abandoned.
+        job['cancel_event'].set()
+        job['status'] = 'timed_out'
+        job['error'] = f"Job exceeded the {API_JOB_TIMEOUT_S:.0f}s timeout."
+    except RequestCancelled:
+        job['status'] = 'cancelled'
+        job['error'] = "Job was cancelled."
+    except Exception as e:
+        job['status'] = 'failed'
+        job['error'] = f"An unexpected error occurred: {e}"
+    finally:
+        job['finished_at'] = time.time()
+
+async def _read_body_capped(request: Request, max_bytes: int) -> bytes:
+    """
+    Reads the request body, refusing it with 413 as soon as it is known to exceed `max_bytes`:
+    up front from Content-Length when the client sends one, otherwise while streaming.
+    """
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+        raise HTTPException(status_code=413, detail="Notebook is too large.")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=413, detail="Notebook is too large.")
+    return bytes(body)
+
+def _public_job_view(job_id: str, job: dict) -> dict:
+    return {
+        'job_id': job_id,
+        'filename': job['filename'],
+        'status': job['status'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'result_url': f"/jobs/{job_id}/result" if job['status'] == 'done' else None,
+    }
+
+def _get_job(job_id: str) -> dict:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    return job
+
+# --- Endpoints ---
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: Request, filename: str = "notebook.ipynb", user_id: str | None = None):
+    """
+    Submits a notebook for explanation. The request body is the raw .ipynb JSON.
+    Returns immediately with a job id to poll.
+    """
+    global _submissions_in_progress
+    _purge_expired_jobs()
+    # Checked before the body is read, so a rejected upload is never buffered
+    if _active_job_count() + _submissions_in_progress >= API_MAX_QUEUED_JOBS:
+        raise HTTPException(status_code=429, detail="Too many jobs in progress, retry later.",
+                            headers={'Retry-After': "5"})
+    _submissions_in_progress += 1
+    try:
+        body = await _read_body_capped(request, API_MAX_NOTEBOOK_BYTES)
+        # Parsing a large notebook is CPU-bound; keep it off the event loop
+        cells = await asyncio.get_running_loop().run_in_executor(
+            None, parse_notebook_string, body.decode("utf-8", errors="replace"))
+    finally:
+        _submissions_in_progress -= 1
+    if not cells:
+        raise HTTPException(status_code=400, detail="Could not parse the uploaded notebook. It might be empty or corrupted.")
+
+    job_id = uuid.uuid4().hex
+    jobs[job_id] = {'filename': filename, 'user_id': user_id, 'status': 'queued', 'error': None,
+                    'result': None, 'stats': {}, 'created_at': time.time(),
+                    'started_at': None, 'finished_at': None, 'cancel_event': threading.Event()}
+    task = asyncio.create_task(_process_job(job_id, cells))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return _public_job_view(job_id, jobs[job_id])
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Returns the status of a job ('queued', 'running', 'done', 'failed', 'timed_out' or 'cancelled')."""
+    return _public_job_view(job_id, _get_job(job_id))
+
+@app.delete("/jobs/{job_id}", status_code=202)
+async def cancel_job(job_id: str):
+    """
+    Cancels a queued or running job: prompts not yet sent are dropped and requests in flight
+    are abandoned, freeing LLM capacity for other jobs. The job then reports 'cancelled'.
+    """
+    job = _get_job(job_id)
+    if job['status'] in ('queued', 'running'):
+        job['cancel_event'].set()
+    return _public_job_view(job_id, job)
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, format: str = "markdown"):
+    """
+    Returns a finished job's explanation as Markdown, HTML or JSON. The JSON form carries the
+    structured explanation: the overview, notes and one entry per cell ('cell_index', 'cell_type',
+    'text' and 'origin': 'llm', 'local' or 'markdown').
+    """
+    job = _get_job(job_id)
+    if job['status'] != 'done':
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}; no result available.")
+    explanation = job['result']
+    summary_text = explanation.to_markdown()
+    prefix = job['filename'].replace(".ipynb", "")
+    if format == "markdown":
+        return PlainTextResponse(summary_text, media_type="text/markdown")
+    if format == "html":
+        return StreamingResponse(iter_html_document(summary_text, prefix), media_type="text/html")
+    if format == "json":
+        stats = job['stats']
+        return JSONResponse({
+            'job_id': job_id,
+            'filename': job['filename'],
+            **dataclasses.asdict(explanation), # 'overview', 'cells' and 'notes'
+            'summary_markdown': summary_text,
+            'degradation_note': stats.get('degradation_note'),
+            'original_tokens': stats.get('original_tokens'),
+            'compacted_tokens': stats.get('compacted_tokens'),
+            'compaction_report': stats.get('compaction_report'),
+        })
+    raise HTTPException(status_code=400, detail="Unsupported format. Use 'markdown', 'html' or 'json'.")
+
+@app.get("/healthz")
+async def health():
+    """Liveness probe: the process is up and serving requests."""
+    return {'status': 'ok'}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness probe: the API key is configured and the job backlog has room."""
+    active = _active_job_count()
+    ready = bool(GOOGLE_API_KEY) and active < API_MAX_QUEUED_JOBS
+    body = {'status': 'ready' if ready else 'not_ready', 'active_jobs': active,
+            'workers': API_WORKERS, 'llm_window': llm_concurrency.snapshot()['window']}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=os.getenv("API_HOST", "0.0.0.0"), port=int(os.getenv("API_PORT", "8000")))
@@ -0,0 +1,152 @@
+import os
+import queue
+import tarfile
+import threading
+import zipfile
+from typing import BinaryIO, Iterator
+
+# --- Configuration from .env ---
+ARCHIVE_READ_AHEAD = int(os.getenv("ARCHIVE_READ_AHEAD", "8")) # Notebooks read ahead of the parse stage
+ARCHIVE_MAX_MEMBER_BYTES = int(os.getenv("ARCHIVE_MAX_MEMBER_BYTES", str(50 * 1024 * 1024))) # Larger members are skipped
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+def is_archive_name(name: str) -> bool:
+    """Returns True if a file name looks like a ZIP or tar archive."""
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+def _is_notebook_member(name: str) -> bool:
+    # Skip macOS resource forks, hidden files and Jupyter's checkpoint copies
+    parts = name.replace('\\', '/').split('/')
+    return (name.lower().endswith('.ipynb')
+            and not any((part.startswith('.') and part not in ('.', '..')) or part == '__MACOSX' for part in parts))
+
+def _skip_oversized(name: str, size: int) -> bool:
+    if size > ARCHIVE_MAX_MEMBER_BYTES:
+        print(f"Skipping {name}: {size:,} bytes exceeds ARCHIVE_MAX_MEMBER_BYTES.")
+        return True
+    return False
+
+def _iter_zip_notebooks(source) -> Iterator[tuple[str, bytes]]:
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not _is_notebook_member(info.filename) or _skip_oversized(info.filename, info.file_size):
+                continue
+            with archive.open(info) as member:
+                yield info.filename, member.read()
+
+def _iter_tar_notebooks(source) -> Iterator[tuple[str, bytes]]:
+    # 'r|*' reads the archive strictly front to back, so it also works on non-seekable streams
+    if isinstance(source, (str, os.PathLike)):
+        archive = tarfile.open(name=source, mode='r|*')
+    else:
+        archive = tarfile.open(fileobj=source, mode='r|*')
+    with archive:
+        for member in archive:
+            if not member.isfile() or not _is_notebook_member(member.name) or _skip_oversized(member.name, member.size):
+                continue
+            # In stream mode a member must be read before advancing to the next one
+            yield member.name, archive.extractfile(member).read()
+
+def _is_zip(source) -> bool:
+    if isinstance(source, (str, os.PathLike)):
+        return zipfile.is_zipfile(source)
+    if not source.seekable():
+        return False
+    position = source.tell()
+    try:
+        return zipfile.is_zipfile(source)
+    finally:
+        source.seek(position)
+
+def iter_archive_members(source: str | os.PathLike | BinaryIO) -> Iterator[tuple[str, bytes]]:
+    """
+    Iterates over the .ipynb members of a ZIP or tar archive (optionally compressed)
+    without extracting anything to disk.
+
+    Args:
+        source (str | os.PathLike | BinaryIO): Path to the archive or an open binary stream.
+                                               Non-seekable streams must be tar archives.
+
+    Yields:
+        tuple[str, bytes]: (member path inside the archive, raw notebook bytes), in archive order.
+    """
+    if _is_zip(source):
+        yield from _iter_zip_notebooks(source)
+    else:
+        yield from _iter_tar_notebooks(source)
+
+def count_archive_notebooks(source: str | os.PathLike | BinaryIO) -> int:
+    """
+    Counts the members iter_archive_members would yield without decompressing any of them:
+    from a ZIP's central directory, or from tar member headers.
+
+    Args:
+        source (str | os.PathLike | BinaryIO): Path to the archive or an open binary stream.
+
+    Returns:
+        int: Number of .ipynb members within ARCHIVE_MAX_MEMBER_BYTES.
+    """
+    if _is_zip(source):
+        with zipfile.ZipFile(source) as archive:
+            return sum(1 for info in archive.infolist()
+                       if not info.is_dir() and _is_notebook_member(info.filename)
+                       and info.file_size <= ARCHIVE_MAX_MEMBER_BYTES)
+    if isinstance(source, (str, os.PathLike)):
+        archive = tarfile.open(name=source, mode='r|*')
+    else:
+        archive = tarfile.open(fileobj=source, mode='r|*')
+    with archive:
+        return sum(1 for member in archive
+                   if member.isfile() and _is_notebook_member(member.name) and member.size <= ARCHIVE_MAX_MEMBER_BYTES)
+
+_END_OF_ARCHIVE = object()
+
+def iter_archive_notebooks(source: str | os.PathLike | BinaryIO,
+                           read_ahead: int = ARCHIVE_READ_AHEAD) -> Iterator[tuple[str, bytes]]:
+    """
+    Like iter_archive_members, but reads the archive in a background thread so
+    decompression overlaps with whatever the caller does with each notebook (e.g. parsing).
+    At most `read_ahead` notebooks are buffered, keeping memory bounded for multi-GB corpora.
+
+    Args:
+        source (str | os.PathLike | BinaryIO): Path to the archive or an open binary stream.
+        read_ahead (int): Maximum number of notebooks read but not yet consumed.
+
+    Yields:
+        tuple[str, bytes]: (member path inside the archive, raw notebook bytes), in archive order.
+    """
+    buffer = queue.Queue(maxsize=max(read_ahead, 1))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_members():
+        try:
+            for member in iter_archive_members(source):
+                if not put(member):
+                    return # The consumer stopped early
+            put(_END_OF_ARCHIVE)
+        except Exception as e:
+            put(e)
+
+    reader = threading.Thread(target=read_members, daemon=True, name="archive-reader")
+    reader.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END_OF_ARCHIVE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        reader.join()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# The benchmark runs offline: the LLM is replaced by a canned answer (see _fake_llm), so no API key
+# is needed and no quota is spent. Resume journaling would skip work on repeats, so it is turned off.
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+os.environ["JOURNAL_ENABLED"] = "false"
+
+import nbformat
+import ai_logic
+from generate_fake_notebook import create_fake_notebook
+from profiling import enable_profiling, profiled_run, profile_stage
+from renderer import render_fragment, render_html_document
+
+BENCHMARK_HISTORY = os.getenv("BENCHMARK_HISTORY", "benchmark_history.jsonl") # One JSON result per line
+
+def build_notebook_json(cell_count: int) -> str:
+    """
+    Builds a synthetic notebook of roughly `cell_count` cells by repeating the demo notebook
+    from generate_fake_notebook; every copy is made unique so no cache short-circuits the work.
+
+    Args:
+        cell_count (int): Approximate number of cells.
+
+    Returns:
+        str: The notebook JSON.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.ipynb")
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                create_fake_notebook(path)
+            finally:
+                sys.stdout = stdout
+        template = nbformat.read(path, as_version=4)
+    nb = nbformat.v4.new_notebook()
+    copy = 0
+    while len(nb.cells) < cell_count:
+        copy += 1
+        for cell in template.cells:
+            if cell.cell_type == 'code':
+                nb.cells.append(nbformat.v4.new_code_cell(f"{cell.source}\nresult_{copy} = {copy}"))
+            else:
+                nb.cells.append(nbformat.v4.new_markdown_cell(f"{cell.source}\nPart {copy}."))
+    return nbformat.writes(nb)
+
+def _fake_llm(latency_s: float):
+    def get_response(prompt: str, model_name: str = ai_logic.LLM_MODEL, cancel_event=None) -> str:
+        if latency_s:
+            time.sleep(latency_s)
+        return ("This cell prepares the data and trains the model using scikit-learn; "
+                "it stores the fitted estimator for the evaluation step.")
+    return get_response
+
+def _run_once(notebook_json: str) -> None:
+    render_fragment.cache_clear()
+    cells = ai_logic.parse_notebook_string(notebook_json)
+    summary = ai_logic.generate_notebook_summary(cells, token_budget=0)
+    with profile_stage('render'):
+        render_html_document(summary, "benchmark")
+
+def run_benchmark(cell_count: int, repeats: int, latency_ms: float, label: str | None) -> dict:
+    """
+    Times the full local pipeline (parse, prompt building, LLM stand-in, rendering) and measures
+    its peak traced memory in a separate pass, since tracing slows everything down.
+
+    Returns:
+        dict: The history entry ('throughput_cells_per_s', 'peak_memory_bytes', ...).
+    """
+    ai_logic.get_gemini_response = _fake_llm(latency_ms / 1000)
+    notebook_json = build_notebook_json(cell_count)
+    actual_cells = len(nbformat.reads(notebook_json, as_version=4).cells)
+
+    with profiled_run("benchmark"):
+        _run_once(notebook_json) # Warm-up; also the profiled pass in profiling mode
+    enable_profiling(False) # Profile one pass only; the timed passes run unprofiled
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        _run_once(notebook_json)
+        timings.append(time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    _run_once(notebook_json)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    best = min(timings)
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'label': label or commit,
+        'commit': commit,
+        'python': platform.python_version(),
+        'cells': actual_cells,
+        'repeats': repeats,
+        'llm_latency_ms': latency_ms,
+        'best_seconds': best,
+        'median_seconds': statistics.median(timings),
+        'throughput_cells_per_s': actual_cells / best,
+        'peak_memory_bytes': peak_memory,
+    }
+
+def load_history(path: str) -> list[dict]:
+    """Reads the benchmark history; unreadable lines are skipped."""
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+def compare_latest(history: list[dict], window: int, max_throughput_drop: float, max_memory_growth: float) -> bool:
+    """
+    Compares the latest benchmark entry against the median of the `window` entries before it
+    (only entries with the same cell count and LLM latency are comparable).
+
+    Returns:
+        bool: True if throughput and peak memory are within the allowed regression.
+    """
+    if not history:
+        print("No benchmark history yet; run 'python bench_pipeline.py run' first.")
+        return True
+    latest = history[-1]
+    baseline = [entry for entry in history[:-1]
+                if entry['cells'] == latest['cells'] and entry['llm_latency_ms'] == latest['llm_latency_ms']][-window:]
+    if not baseline:
+        print("No comparable earlier entries; nothing to compare against.")
+        return True
+
+    base_throughput = statistics.median(entry['throughput_cells_per_s'] for entry in baseline)
+    base_memory = statistics.median(entry['peak_memory_bytes'] for entry in baseline)
+    throughput_change = latest['throughput_cells_per_s'] / base_throughput - 1
+    memory_change = latest['peak_memory_bytes'] / base_memory - 1
+    print(f"Comparing {latest['label']} against the median of {len(baseline)} earlier run(s):")
+    print(f"  throughput  {latest['throughput_cells_per_s']:10.1f} cells/s  ({throughput_change:+.1%}, "
+          f"allowed drop {max_throughput_drop:.0%})")
+    print(f"  peak memory {latest['peak_memory_bytes'] / 1024 ** 2:10.1f} MiB      ({memory_change:+.1%}, "
+          f"allowed growth {max_memory_growth:.0%})")
+
+    passed = True
+    if throughput_change < -max_throughput_drop:
+        print("REGRESSION: throughput dropped past the threshold.")
+        passed = False
+    if memory_change > max_memory_growth:
+        print("REGRESSION: peak memory grew past the threshold.")
+        passed = False
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark with a history file and regression gate.")
+    parser.add_argument("--history", default=BENCHMARK_HISTORY, help="Benchmark history file (JSON lines).")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subcommands.add_parser("run", help="Run the benchmark and append the result to the history.")
+    run_parser.add_argument("--cells", type=int, default=200, help="Approximate number of cells in the synthetic notebook.")
+    run_parser.add_argument("--repeats", type=int, default=3, help="Timed repetitions (the best is recorded).")
+    run_parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated latency of each LLM call.")
+    run_parser.add_argument("--label", help="Name for this entry (defaults to the git commit).")
+    run_parser.add_argument("--profile", action="store_true", help="Also write a cProfile/tracemalloc report of one run.")
+
+    compare_parser = subcommands.add_parser("compare", help="Exit non-zero if the latest entry regressed.")
+    compare_parser.add_argument("--window", type=int, default=5, help="Earlier entries forming the baseline median.")
+    compare_parser.add_argument("--max-throughput-drop", type=float, default=0.10, help="Allowed throughput drop (0.10 = 10%%).")
+    compare_parser.add_argument("--max-memory-growth", type=float, default=0.10, help="Allowed peak memory growth (0.10 = 10%%).")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        if args.profile:
+            enable_profiling()
+        entry = run_benchmark(args.cells, args.repeats, args.llm_latency_ms, args.label)
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"{entry['cells']} cells: {entry['throughput_cells_per_s']:.1f} cells/s, "
+              f"peak memory {entry['peak_memory_bytes'] / 1024 ** 2:.1f} MiB (appended to {args.history})")
+    else:
+        history = load_history(args.history)
+        sys.exit(0 if compare_latest(history, args.window, args.max_throughput_drop, args.max_memory_growth) else 1)
@@ -0,0 +1,66 @@
+import argparse
+import io
+import time
+import markdown
+from renderer import MARKDOWN_BACKENDS, clear_fragment_cache, write_html_document
+
+def build_fake_summary(cell_count: int) -> str:
+    """
+    Builds a summary shaped like generate_notebook_summary output, with a mix of
+    lists, inline code and fenced code blocks in the cell explanations.
+
+    Args:
+        cell_count (int): Number of cell entries in the summary.
+
+    Returns:
+        str: The Markdown summary.
+    """
+    lines = ["## Notebook Overview:",
+             "This notebook loads a dataset, preprocesses it, trains a model and evaluates it.\n",
+             "## Cell-by-Cell Summary:"]
+    for i in range(1, cell_count + 1):
+        if i % 3 == 0:
+            lines.append(f"● **Cell {i} (Markdown):** Documentation/Explanation. Preview: \"## Step {i}...\"")
+        else:
+            lines.append(
+                f"● **Cell {i} (Code):** This cell calls `model.fit(X_train, y_train)` to train the classifier.\n"
+                f"* Uses **scikit-learn** for training.\n"
+                f"* Stores the result in `model_{i}`.\n\n"
+                f"```python\nmodel_{i} = RandomForestClassifier(n_estimators={i})\n```"
+            )
+    return "\n".join(lines)
+
+def _time(callable_, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        callable_()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmark(cell_count: int, repeats: int) -> None:
+    """Times the legacy whole-document conversion against every renderer backend, cold and warm."""
+    summary = build_fake_summary(cell_count)
+    print(f"Rendering a {cell_count}-cell report ({len(summary):,} chars), best of {repeats}:")
+
+    legacy = _time(lambda: markdown.markdown(summary, extensions=['fenced_code', 'tables', 'nl2br']), repeats)
+    print(f"  {'legacy markdown.markdown':<32} {legacy * 1000:9.1f} ms")
+
+    for backend in MARKDOWN_BACKENDS:
+        def render():
+            write_html_document(summary, "benchmark", io.StringIO(), backend)
+        def render_cold():
+            clear_fragment_cache()
+            render()
+        cold = _time(render_cold, repeats)
+        render() # Warm the fragment cache
+        warm = _time(render, repeats)
+        print(f"  {backend + ' (cold cache)':<32} {cold * 1000:9.1f} ms")
+        print(f"  {backend + ' (warm cache)':<32} {warm * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark for the HTML report renderer backends.")
+    parser.add_argument("--cells", type=int, default=1000, help="Number of cells in the synthetic report.")
+    parser.add_argument("--repeats", type=int, default=5, help="Timing repetitions per backend (best is reported).")
+    args = parser.parse_args()
+    run_benchmark(args.cells, args.repeats)
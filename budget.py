@@ -0,0 +1,244 @@
+import ast
+import threading
+import time
+from collections import OrderedDict
+from dataflow import strip_notebook_magics
+
+# --- Estimation constants ---
+EXPECTED_OUTPUT_TOKENS_PER_CELL = 150 # Typical length of one code cell explanation
+LOCAL_PREVIEW_TOKENS = 30 # A local preview line as it appears in the overview prompt
+OVERVIEW_OUTPUT_TOKENS = 500 # Typical length of the overall workflow summary
+BATCH_SIZE = 5 # Code cells per prompt once the pipeline degrades to batching
+
+# --- Per-user usage ledger (in-process) ---
+_user_usage = {}
+_user_usage_lock = threading.Lock()
+PROMPT_CLAIM_TTL_S = 900 # How long a paid prompt stays claimed for a run that overlaps it (e.g. speculative + real run)
+_prompt_claims = OrderedDict() # (user_id, prompt key) -> time the prompt was paid for, oldest first
+
+def get_user_remaining_tokens(user_id: str, per_user_budget: int) -> int | None:
+    """
+    Returns how many tokens a user may still spend.
+
+    Args:
+        user_id (str): Identifier of the user submitting the notebook.
+        per_user_budget (int): Total tokens a user may spend; 0 or less disables the limit.
+
+    Returns:
+        int | None: Remaining tokens, or None if the user is not limited.
+    """
+    if not user_id or per_user_budget <= 0:
+        return None
+    with _user_usage_lock:
+        return max(per_user_budget - _user_usage.get(user_id, 0), 0)
+
+def charge_user_tokens(user_id: str, tokens: int) -> None:
+    """
+    Records tokens spent on behalf of a user.
+
+    Args:
+        user_id (str): Identifier of the user (ignored if empty).
+        tokens (int): Estimated tokens consumed by the job.
+    """
+    if not user_id:
+        return
+    with _user_usage_lock:
+        _user_usage[user_id] = _user_usage.get(user_id, 0) + tokens
+
+def claim_user_prompt(user_id: str, prompt_key: str) -> bool:
+    """
+    Claims the payment for one prompt, so two overlapping runs of a user never both pay for it.
+    The first run to claim a prompt pays for it; the second finds the claim, consumes it and pays nothing.
+
+    Args:
+        user_id (str): Identifier of the user (every claim succeeds if empty).
+        prompt_key (str): Key from response_cache_key.
+
+    Returns:
+        bool: True if the caller should charge the prompt.
+    """
+    if not user_id:
+        return True
+    now = time.monotonic()
+    with _user_usage_lock:
+        while _prompt_claims and next(iter(_prompt_claims.values())) < now - PROMPT_CLAIM_TTL_S:
+            _prompt_claims.popitem(last=False)
+        if _prompt_claims.pop((user_id, prompt_key), None) is not None:
+            return False
+        _prompt_claims[(user_id, prompt_key)] = now
+        return True
+
+# --- Cost estimation ---
+
+def cell_complexity(source: str, tree: ast.Module | None = None) -> int:
+    """
+    Scores how complex a code cell is by counting its AST nodes.
+    Falls back to the number of non-blank lines if the cell cannot be parsed.
+
+    Args:
+        source (str): Python source of a code cell.
+        tree (ast.Module | None): The already parsed cell (e.g. Cell.tree), to skip re-parsing.
+
+    Returns:
+        int: The complexity score (higher means more worth an LLM explanation).
+    """
+    try:
+        return sum(1 for _ in ast.walk(tree or ast.parse(strip_notebook_magics(source))))
+    except SyntaxError:
+        return sum(1 for line in source.split('\n') if line.strip())
+
+def _batched(indices: list[int], size: int) -> list[list[int]]:
+    return [indices[start:start + size] for start in range(0, len(indices), size)]
+
+def project_tokens(batches: list[list[int]], cell_tokens: dict[int, int], template_tokens: int,
+                   overview_tokens: int, local_count: int) -> int:
+    """
+    Projects the total tokens (input + output) a run will consume for a given batching.
+
+    Args:
+        batches (list[list[int]]): Groups of code cell indices sent together in one prompt.
+        cell_tokens (dict[int, int]): Estimated prompt tokens of each code cell (code plus context).
+        template_tokens (int): Tokens of the fixed per-prompt instructions.
+        overview_tokens (int): Tokens of the fixed overview prompt instructions.
+        local_count (int): Number of code cells that only get a local preview.
+
+    Returns:
+        int: The projected token count for the whole notebook.
+    """
+    total = 0
+    explained = 0
+    for batch in batches:
+        total += template_tokens + sum(cell_tokens[i] for i in batch)
+        total += EXPECTED_OUTPUT_TOKENS_PER_CELL * len(batch)
+        explained += len(batch)
+    return total + project_overview_tokens(overview_tokens, explained, local_count)
+
+def project_overview_tokens(overview_tokens: int, explained_count: int, local_count: int) -> int:
+    """
+    Projects the tokens of the overview prompt, which carries every cell summary, plus its output.
+
+    Args:
+        overview_tokens (int): Tokens of the fixed overview prompt instructions.
+        explained_count (int): Number of code cells explained by the LLM.
+        local_count (int): Number of code cells that only get a local preview.
+
+    Returns:
+        int: The projected token count of the overview step.
+    """
+    return (overview_tokens + EXPECTED_OUTPUT_TOKENS_PER_CELL * explained_count
+            + LOCAL_PREVIEW_TOKENS * local_count + OVERVIEW_OUTPUT_TOKENS)
+
+def plan_within_budget(cell_tokens: dict[int, int], complexity: dict[int, int], template_tokens: int,
+                       overview_tokens: int, token_budget: int | None) -> dict:
+    """
+    Chooses how to spend the LLM budget on a notebook, degrading in order:
+    1. 'full': one prompt per code cell.
+    2. 'batched': consecutive code cells share a prompt (BATCH_SIZE per prompt).
+    3. 'top_n': only the largest/most complex cells are explained (batched);
+       the rest get cheap local previews.
+    4. 'local': not even the overview prompt fits (e.g. the user's budget is used up),
+       so no LLM call is made at all; every code cell gets a local preview.
+
+    Args:
+        cell_tokens (dict[int, int]): Estimated prompt tokens of each code cell, keyed by cell index.
+        complexity (dict[int, int]): Complexity score of each code cell, keyed by cell index.
+        template_tokens (int): Tokens of the fixed per-prompt instructions.
+        overview_tokens (int): Tokens of the fixed overview prompt instructions.
+        token_budget (int | None): Maximum projected tokens for the job; None means unlimited.
+
+    Returns:
+        dict: A plan with 'mode', 'batches' (lists of cell indices per prompt), 'local_cells'
+              (indices explained locally), 'overview' (whether the overview prompt is sent),
+              'projected_tokens', 'full_tokens' and 'budget'.
+    """
+    code_indices = sorted(cell_tokens)
+    full_batches = [[i] for i in code_indices]
+    full_tokens = project_tokens(full_batches, cell_tokens, template_tokens, overview_tokens, 0)
+    plan = {'mode': 'full', 'batches': full_batches, 'local_cells': [], 'overview': True,
+            'projected_tokens': full_tokens, 'full_tokens': full_tokens, 'budget': token_budget}
+    if token_budget is None or full_tokens <= token_budget:
+        return plan
+
+    batches = _batched(code_indices, BATCH_SIZE)
+    batched_tokens = project_tokens(batches, cell_tokens, template_tokens, overview_tokens, 0)
+    if batched_tokens <= token_budget:
+        plan.update(mode='batched', batches=batches, projected_tokens=batched_tokens)
+        return plan
+
+    # Greedily keep the most complex cells (largest first on ties) while the projection fits
+    ranked = sorted(code_indices, key=lambda i: (complexity[i], cell_tokens[i]), reverse=True)
+    selected = []
+    for index in ranked:
+        candidate = sorted(selected + [index])
+        local_count = len(code_indices) - len(candidate)
+        tokens = project_tokens(_batched(candidate, BATCH_SIZE), cell_tokens, template_tokens,
+                                overview_tokens, local_count)
+        if tokens <= token_budget:
+            selected = candidate
+    batches = _batched(selected, BATCH_SIZE)
+    selected_set = set(selected)
+    local_cells = [i for i in code_indices if i not in selected_set]
+    projected = project_tokens(batches, cell_tokens, template_tokens, overview_tokens, len(local_cells))
+    if projected > token_budget: # Nothing was selected and the overview alone does not fit either
+        plan.update(mode='local', batches=[], local_cells=code_indices, overview=False, projected_tokens=0)
+        return plan
+    plan.update(mode='top_n', batches=batches, local_cells=local_cells, projected_tokens=projected)
+    return plan
+
+def describe_plan(plan: dict) -> str | None:
+    """
+    Produces a human-readable note about how the run was degraded, for the final output.
+
+    Args:
+        plan (dict): The plan returned by plan_within_budget.
+
+    Returns:
+        str | None: The note, or None if the notebook was explained in full.
+    """
+    if plan['mode'] == 'full':
+        return None
+    note = (f"The projected cost (~{plan['full_tokens']:,} tokens) exceeded the budget "
+            f"of {plan['budget']:,} tokens, so ")
+    if plan['mode'] == 'batched':
+        return note + f"code cells were explained in batches of up to {BATCH_SIZE}."
+    if plan['mode'] == 'local':
+        return note + ("no AI explanation was requested: every code cell received a local preview "
+                       "and the overview is a local summary.")
+    explained = sum(len(batch) for batch in plan['batches'])
+    return note + (f"only the {explained} most complex code cells were explained by the AI; "
+                   f"{len(plan['local_cells'])} cells received a local preview instead.")
+
+# --- Local previews ---
+
+def local_code_preview(source: str, defined_names: list[str], tree: ast.Module | None = None) -> str:
+    """
+    Builds a cheap, non-AI description of a code cell from static analysis.
+
+    Args:
+        source (str): Python source of the code cell.
+        defined_names (list[str]): Names the cell defines (from the dataflow analysis).
+        tree (ast.Module | None): The already parsed cell (e.g. Cell.tree), to skip re-parsing.
+
+    Returns:
+        str: e.g. "Local preview (not AI-generated): 12 lines; imports pandas; defines data, X."
+    """
+    line_count = sum(1 for line in source.split('\n') if line.strip())
+    parts = [f"{line_count} lines"]
+    imports, import_bindings = [], set()
+    try:
+        for node in ast.walk(tree or ast.parse(strip_notebook_magics(source))):
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                if isinstance(node, ast.Import):
+                    imports.extend(alias.name for alias in node.names)
+                elif node.module:
+                    imports.append(node.module)
+                import_bindings.update(alias.asname or alias.name.split('.')[0] for alias in node.names)
+    except SyntaxError:
+        pass
+    if imports:
+        parts.append("imports " + ", ".join(dict.fromkeys(imports)))
+    definitions = [name for name in defined_names if name not in import_bindings]
+    if definitions:
+        shown = ", ".join(definitions[:8]) + (", ..." if len(definitions) > 8 else "")
+        parts.append("defines " + shown)
+    return "Local preview (not AI-generated): " + "; ".join(parts) + "."
@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+class RequestCancelled(Exception):
+    """Raised when the job or session that issued an LLM request has been cancelled."""
+
+# --- Outcome classification ---
+THROTTLE_STATUS_CODES = {429}
+SERVER_ERROR_STATUS_CODES = {500, 502, 503, 504}
+_THROTTLE_EXCEPTION_NAMES = {'ResourceExhausted', 'TooManyRequests'}
+_SERVER_ERROR_EXCEPTION_NAMES = {'InternalServerError', 'ServiceUnavailable', 'DeadlineExceeded', 'BadGateway'}
+
+def classify_exception(error: Exception) -> str:
+    """
+    Maps an LLM client exception to an outcome the controller understands.
+
+    google-api-core exceptions carry the HTTP status in `.code`; the class name is used as a fallback.
+
+    Args:
+        error (Exception): The exception raised by the LLM client.
+
+    Returns:
+        str: 'throttled' (429), 'server_error' (5xx) or 'error' (anything else, e.g. a bad prompt).
+    """
+    code = getattr(error, 'code', None)
+    name = type(error).__name__
+    if code in THROTTLE_STATUS_CODES or name in _THROTTLE_EXCEPTION_NAMES:
+        return 'throttled'
+    if code in SERVER_ERROR_STATUS_CODES or name in _SERVER_ERROR_EXCEPTION_NAMES:
+        return 'server_error'
+    return 'error'
+
+def _percentile(sorted_values: list[float], percent: float) -> float | None:
+    if not sorted_values:
+        return None
+    index = min(int(round(percent / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+# --- AIMD Controller ---
+
+class AdaptiveConcurrencyController:
+    """
+    Limits how many LLM requests are in flight, adapting the limit AIMD-style:
+    the window grows by roughly one slot per window's worth of healthy responses
+    (additive increase) and is halved on throttling, 5xx errors or a rolling p95
+    latency above the target (multiplicative decrease), so a single slow call does
+    not shrink the window. Decreases are rate-limited to one per cooldown period so
+    a burst of concurrent 429s only counts once. Decisions are kept in `snapshot()`.
+
+    Use `with controller.slot(): ...` around each request and report the result
+    with `record_success(latency)` or `record_failure(latency, outcome)`.
+    """
+
+    def __init__(self, initial_window: float = 4, min_window: float = 1, max_window: float = 32,
+                 decrease_factor: float = 0.5, latency_target_s: float = 20.0,
+                 cooldown_s: float = 2.0, sample_size: int = 200, min_latency_samples: int = 20):
+        self.window = float(initial_window)
+        self.min_window = float(min_window)
+        self.max_window = float(max_window)
+        self.decrease_factor = decrease_factor
+        self.latency_target_s = latency_target_s
+        self.cooldown_s = cooldown_s
+        self.min_latency_samples = min_latency_samples
+        self.in_flight = 0
+        self._latencies = deque(maxlen=sample_size)
+        self._judged_latencies = deque(maxlen=sample_size) # Samples since the last decrease; the p95 is judged on these
+        self._outcomes = deque(maxlen=sample_size)
+        self._decisions = deque(maxlen=50)
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self, cancel_event: threading.Event | None = None):
+        """
+        Blocks until the current window has room for another in-flight request.
+        Raises RequestCancelled if `cancel_event` is set while waiting, so abandoned
+        jobs give up their place in the queue to live ones.
+        """
+        with self._condition:
+            while self.in_flight >= max(int(self.window), 1):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise RequestCancelled()
+                # Timed wait: cancellation does not notify the condition
+                self._condition.wait(timeout=0.1 if cancel_event is not None else None)
+            if cancel_event is not None and cancel_event.is_set():
+                raise RequestCancelled()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def record_success(self, latency_s: float) -> None:
+        """Records a successful request; widens the window unless latency signals congestion."""
+        with self._condition:
+            self._latencies.append(latency_s)
+            self._judged_latencies.append(latency_s)
+            self._outcomes.append('ok')
+            p95 = self._latency_p95()
+            if p95 is not None and p95 > self.latency_target_s:
+                self._decrease(f"p95 latency {p95:.1f}s above target {self.latency_target_s:.1f}s")
+            elif p95 is not None or not self.latency_target_s or latency_s <= self.latency_target_s:
+                self._increase() # Until there are enough samples to judge, slow calls do not widen the window
+
+    def _latency_p95(self) -> float | None:
+        """
+        Rolling p95 latency of the samples recorded since the last decrease, or None while there
+        are too few of them to judge congestion. Samples from before a decrease are not judged
+        again, so one latency spike cuts the window once instead of on every later success.
+        """
+        if not self.latency_target_s or len(self._judged_latencies) < self.min_latency_samples:
+            return None
+        return _percentile(sorted(self._judged_latencies), 95)
+
+    def record_failure(self, latency_s: float, outcome: str) -> None:
+        """
+        Records a failed request. Throttling and server errors shrink the window;
+        other errors (bad prompt, safety block) say nothing about capacity and are only counted.
+        """
+        with self._condition:
+            self._latencies.append(latency_s)
+            self._judged_latencies.append(latency_s)
+            self._outcomes.append(outcome)
+            if outcome in ('throttled', 'server_error'):
+                self._decrease(outcome)
+
+    def _increase(self) -> None:
+        if self.window >= self.max_window:
+            return
+        previous = self.window
+        self.window = min(self.window + 1 / self.window, self.max_window)
+        if int(self.window) > int(previous): # Only log when a whole new slot opens
+            self._log('increase', 'healthy responses')
+            self._condition.notify_all()
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown_s:
+            return
+        self._last_decrease = now
+        self.window = max(self.window * self.decrease_factor, self.min_window)
+        self._judged_latencies.clear()
+        self._log('decrease', reason)
+
+    def _log(self, action: str, reason: str) -> None:
+        self._decisions.append({'time': time.time(), 'action': action,
+                                'window': round(self.window, 2), 'reason': reason})
+
+    def snapshot(self) -> dict:
+        """
+        Returns the controller's current state for debugging and dashboards.
+
+        Returns:
+            dict: 'window', 'in_flight', latency percentiles ('p50_s', 'p95_s', 'p99_s'),
+                  'throttle_rate', 'server_error_rate' over the rolling sample,
+                  and the most recent window 'decisions'.
+        """
+        with self._condition:
+            latencies = sorted(self._latencies)
+            outcomes = list(self._outcomes)
+            total = len(outcomes) or 1
+            return {
+                'window': round(self.window, 2),
+                'effective_limit': max(int(self.window), 1),
+                'in_flight': self.in_flight,
+                'p50_s': _percentile(latencies, 50),
+                'p95_s': _percentile(latencies, 95),
+                'p99_s': _percentile(latencies, 99),
+                'throttle_rate': outcomes.count('throttled') / total,
+                'server_error_rate': outcomes.count('server_error') / total,
+                'samples': len(outcomes),
+                'decisions': list(self._decisions),
+            }
@@ -0,0 +1,228 @@
+import ast
+from token_utils import estimate_tokens
+
+# --- Static def-use analysis over notebook code cells ---
+
+def strip_notebook_magics(source: str) -> str:
+    """
+    Blanks out IPython magics and shell escapes (e.g. `%matplotlib inline`, `!pip install`)
+    so the rest of the cell can be parsed as plain Python. Line numbers are preserved.
+    """
+    lines = []
+    for line in source.split('\n'):
+        stripped = line.lstrip()
+        if stripped.startswith(('%', '!')):
+            lines.append('')
+        else:
+            lines.append(line)
+    return '\n'.join(lines)
+
+def _parameter_names(args: ast.arguments) -> set[str]:
+    params = args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]
+    return {arg.arg for arg in params if arg is not None}
+
+def _free_names(nodes: list[ast.AST], bound: set[str] = frozenset()) -> set[str]:
+    """Names a nested scope (function, lambda, class or comprehension body) reads from outside itself."""
+    collector = _NameCollector()
+    for node in nodes:
+        collector.visit(node)
+    return collector.uses - collector.defs - bound
+
+class _NameCollector(ast.NodeVisitor):
+    """
+    Collects the names a piece of code binds (`defs`) and reads (`uses`) in its own scope.
+    Nested scopes only contribute their free names to `uses`: parameters and names bound
+    inside a function, lambda, class body or comprehension stay local to it.
+    """
+
+    def __init__(self):
+        self.defs, self.uses = set(), set()
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.uses.add(node.id)
+        elif isinstance(node.ctx, ast.Store):
+            self.defs.add(node.id)
+        # `del x` neither defines nor reads a value another cell needs
+
+    def visit_AugAssign(self, node: ast.AugAssign) -> None:
+        if isinstance(node.target, ast.Name):
+            self.uses.add(node.target.id) # `x += 1` reads x before writing it
+        self.generic_visit(node)
+
+    def visit_Import(self, node: ast.Import | ast.ImportFrom) -> None:
+        for alias in node.names:
+            if alias.name != '*':
+                self.defs.add(alias.asname or alias.name.split('.')[0])
+
+    visit_ImportFrom = visit_Import
+
+    def _visit_all(self, nodes: list[ast.AST | None]) -> None:
+        for node in nodes:
+            if node is not None:
+                self.visit(node)
+
+    def _visit_signature(self, args: ast.arguments) -> None:
+        # Defaults and annotations are evaluated where the function is defined
+        self._visit_all(args.defaults + args.kw_defaults)
+        self._visit_all([arg.annotation for arg in args.posonlyargs + args.args + args.kwonlyargs
+                         + [args.vararg, args.kwarg] if arg is not None])
+
+    def visit_FunctionDef(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        self.defs.add(node.name)
+        self._visit_all(node.decorator_list + [node.returns])
+        self._visit_signature(node.args)
+        self.uses |= _free_names(node.body, _parameter_names(node.args))
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        self._visit_signature(node.args)
+        self.uses |= _free_names([node.body], _parameter_names(node.args))
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self.defs.add(node.name)
+        self._visit_all(node.decorator_list + node.bases + [keyword.value for keyword in node.keywords])
+        self.uses |= _free_names(node.body)
+
+    def _visit_comprehension(self, node: ast.ListComp | ast.SetComp | ast.GeneratorExp | ast.DictComp) -> None:
+        # The first iterable is evaluated in the enclosing scope; targets and the rest are local
+        self.visit(node.generators[0].iter)
+        targets = _NameCollector()
+        for generator in node.generators:
+            targets.visit(generator.target)
+        elements = [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+        nested = [generator.iter for generator in node.generators[1:]]
+        nested += [condition for generator in node.generators for condition in generator.ifs]
+        self.uses |= _free_names(nested + elements, targets.defs)
+
+    visit_ListComp = visit_SetComp = visit_GeneratorExp = visit_DictComp = _visit_comprehension
+
+def _statement_names(stmt: ast.stmt) -> tuple[set[str], set[str]]:
+    """
+    Collects the names a single top-level statement defines and the names it reads.
+
+    Returns:
+        tuple[set[str], set[str]]: (defined names, loaded names)
+    """
+    collector = _NameCollector()
+    collector.visit(stmt)
+    return collector.defs, collector.uses
+
+_EMPTY_DATAFLOW = {'defs': {}, 'uses': set(), 'statements': []}
+
+def analyze_cell_dataflow(source: str, tree: ast.Module | None = None) -> dict:
+    """
+    Runs a static def-use analysis over a single code cell.
+
+    Args:
+        source (str): The Python source of the cell.
+        tree (ast.Module | None): The already parsed cell (e.g. Cell.tree), to skip re-parsing.
+
+    Returns:
+        dict: A dictionary with:
+            - 'defs': {name: source of the last top-level statement defining it}
+            - 'uses': set of names read before being defined within the cell
+                      (i.e. names that must come from earlier cells).
+            - 'statements': one {'line', 'source', 'defs', 'uses'} record per top-level
+                            statement, in source order.
+            All are empty if the cell cannot be parsed.
+    """
+    if tree is None:
+        try:
+            tree = ast.parse(strip_notebook_magics(source))
+        except SyntaxError:
+            return _EMPTY_DATAFLOW
+
+    defs, free_uses, statements = {}, set(), []
+    for stmt in tree.body:
+        stmt_defs, stmt_uses = _statement_names(stmt)
+        free_uses |= stmt_uses - defs.keys()
+        segment = ast.get_source_segment(source, stmt) or ''
+        statements.append({'line': stmt.lineno, 'source': segment, 'defs': stmt_defs, 'uses': stmt_uses})
+        for name in stmt_defs:
+            defs[name] = segment
+    return {'defs': defs, 'uses': free_uses, 'statements': statements}
+
+def analyze_notebook_dataflow(notebook_cells: list) -> list[dict]:
+    """
+    Runs `analyze_cell_dataflow` over every cell of a parsed notebook, reusing each cell's
+    precomputed AST. Markdown and unparseable cells get empty results so indices line up
+    with `notebook_cells`.
+
+    Args:
+        notebook_cells (list[Cell]): Cells as returned by parse_notebook_content.
+
+    Returns:
+        list[dict]: One def-use record per cell, in notebook order.
+    """
+    return [
+        analyze_cell_dataflow(cell.content, cell.tree) if cell.tree is not None else _EMPTY_DATAFLOW
+        for cell in notebook_cells
+    ]
+
+def _resolve_definition(dataflow: list[dict], name: str, cell_index: int, before_line: int = 1) -> tuple[int, dict] | None:
+    """
+    Finds the statement that last defined `name` before line `before_line` of cell `cell_index`:
+    first among the earlier statements of that same cell, then in earlier cells.
+
+    Returns:
+        tuple[int, dict] | None: (cell index, statement record), or None if nothing defines it.
+    """
+    for statement in reversed(dataflow[cell_index]['statements']):
+        if statement['line'] < before_line and name in statement['defs']:
+            return cell_index, statement
+    for index in range(cell_index - 1, -1, -1):
+        if name in dataflow[index]['defs']:
+            for statement in reversed(dataflow[index]['statements']):
+                if name in statement['defs']:
+                    return index, statement
+    return None
+
+def select_upstream_context(dataflow: list[dict], cell_index: int, token_budget: int) -> str:
+    """
+    Picks the minimal set of upstream definitions a cell depends on, nearest first,
+    and stops once the token budget would be exceeded.
+
+    Direct dependencies are added before transitive ones, so e.g. for
+    `model.fit(X_train_processed, y_train)` the statements defining `X_train_processed`
+    and `y_train` come before whatever those statements themselves read.
+
+    Args:
+        dataflow (list[dict]): Per-cell records from analyze_notebook_dataflow.
+        cell_index (int): Index of the cell the prompt is being built for.
+        token_budget (int): Maximum estimated tokens for the returned context.
+
+    Returns:
+        str: The selected definition statements in notebook order, or an empty string.
+    """
+    if token_budget <= 0:
+        return ""
+
+    selected = {} # (cell index, line) -> statement source
+    used_tokens = 0
+    # The cell's own free names can only come from earlier cells (line 1 has no statements before it)
+    frontier = [(name, cell_index, 1) for name in sorted(dataflow[cell_index]['uses'])]
+    seen = set()
+    while frontier:
+        next_frontier = []
+        for name, reader_index, reader_line in frontier:
+            resolved = _resolve_definition(dataflow, name, reader_index, reader_line)
+            if resolved is None:
+                continue
+            source_index, statement = resolved
+            key = (source_index, statement['line'])
+            if (name, key) in seen:
+                continue
+            seen.add((name, key))
+            if key not in selected:
+                cost = estimate_tokens(statement['source'])
+                if used_tokens + cost > token_budget:
+                    continue
+                used_tokens += cost
+                selected[key] = statement['source']
+            # Follow what the defining statement itself reads, one hop further upstream
+            next_frontier.extend((dep, source_index, statement['line']) for dep in sorted(statement['uses']))
+        frontier = next_frontier
+
+    return "\n".join(selected[key] for key in sorted(selected))
@@ -1,103 +1,410 @@
-import os
-import nbformat
-import base64 # For generating download links
-from io import StringIO, BytesIO
-from ai_logic import generate_notebook_summary, parse_notebook_content
-import markdown # Will need to 'pip install markdown' for HTML conversion
-
-def save_and_get_summary(uploaded_file, output_format: str = "markdown") -> tuple[str, str | None, bool, str | None]:
-    """
-    Handles an uploaded .ipynb file, parses it, generates a summary using AI logic,
-    and returns the summary text along with a downloadable link, a success status,
-    and an error message if applicable.
-
-    Args:
-        uploaded_file (streamlit.runtime.uploaded_file_manager.UploadedFile):
-            The file object uploaded via Streamlit's st.file_uploader.
-        output_format (str): The desired output format ('markdown' or 'html').
-
-    Returns:
-        tuple[str, str | None, bool, str | None]: A tuple containing:
-            - The generated summary text (Markdown format) if successful, otherwise an empty string.
-            - A base64 encoded download link for the generated summary file (str) or None.
-            - A boolean indicating if the operation was successful (True/False).
-            - An error message (str) if the operation failed, otherwise None.
-    """
-    if uploaded_file is None:
-        return "", None, False, "Please upload a .ipynb file to get started."
-
-    temp_notebook_path = None # Initialize to None for finally block
-    try:
-        # Read the content of the uploaded .ipynb file
-        notebook_content = uploaded_file.read().decode("utf-8")
-        
-        # Save the uploaded content to a temporary file for nbformat to read
-        temp_notebook_path = f"temp_{os.path.basename(uploaded_file.name)}" # Use basename to avoid path issues
-        with open(temp_notebook_path, "w", encoding="utf-8") as f:
-            f.write(notebook_content)
-
-        # Parse the notebook using the function from ai_logic
-        cells = parse_notebook_content(temp_notebook_path)
-        
-        if not cells:
-            return "", None, False, "Could not parse the uploaded notebook. It might be empty or corrupted."
-
-        # Generate the summary using the AI logic
-        summary_text = generate_notebook_summary(cells)
-
-        # Prepare the file for download based on output_format
-        download_filename_prefix = uploaded_file.name.replace(".ipynb", "")
-        download_link = None
-        mime_type = None
-        output_content = summary_text
-
-        if output_format == "markdown":
-            download_filename = f"{download_filename_prefix}_explanation.md"
-            encoded_content = base64.b64encode(output_content.encode("utf-8")).decode()
-            mime_type = "text/markdown"
-            download_link = f'data:{mime_type};base64,{encoded_content}'
-        elif output_format == "html":
-            # Convert markdown summary to HTML
-            html_summary = markdown.markdown(output_content, extensions=['fenced_code', 'tables', 'nl2br'])
-            # Add basic HTML structure for a standalone file
-            html_content = f"""
-            <!DOCTYPE html>
-            <html lang="en">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>Notebook Explanation - {download_filename_prefix}</title>
-                <style>
-                    body {{ font-family: 'Inter', sans-serif; line-height: 1.6; margin: 20px; color: #333; }}
-                    h1, h2, h3 {{ font-family: 'Inter', sans-serif; color: #2E86C1; }}
-                    h2 {{ border-bottom: 1px solid #eee; padding-bottom: 5px; margin-top: 30px; }}
-                    pre {{ background-color: #f4f4f4; padding: 10px; border-radius: 5px; overflow-x: auto; }}
-                    code {{ background-color: #f9f9f9; padding: 2px 4px; border-radius: 3px; font-family: monospace; }}
-                    ul {{ list-style-type: none; padding-left: 0; }}
-                    ul li:before {{ content: "• "; color: #2E86C1; font-weight: bold; display: inline-block; width: 1em; margin-left: -1em; }}
-                </style>
-            </head>
-            <body>
-                {html_summary}
-            </body>
-            </html>
-            """
-            download_filename = f"{download_filename_prefix}_explanation.html"
-            encoded_content = base64.b64encode(html_content.encode("utf-8")).decode()
-            mime_type = "text/html"
-            download_link = f'data:{mime_type};base64,{encoded_content}'
-        else:
-            return summary_text, None, False, "Unsupported output format. Only Markdown and HTML are supported for download."
-
-        return summary_text, download_link, True, None # Success!
-
-    except Exception as e:
-        return "", None, False, f"An unexpected error occurred: {e}"
-    finally:
-        # Ensure temporary file is removed even if an error occurs
-        if temp_notebook_path and os.path.exists(temp_notebook_path):
-            os.remove(temp_notebook_path)
-
-# --- Main guard for testing features.py in isolation ---
-if __name__ == "__main__":
+import os
+import re
+import hashlib
+import threading
+import tarfile
+import zipfile
+import zlib
+import nbformat
+import base64 # For generating download links
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
+from io import StringIO, BytesIO, TextIOWrapper
+from typing import BinaryIO
+from ai_logic import (explain_notebook, generate_notebook_summary, parse_notebook_content, parse_notebook_string,
+                      prefetch_cell_explanations)
+from concurrency import RequestCancelled
+from static_summary import summarize_notebook_locally, summarize_corpus
+from archive_reader import is_archive_name, iter_archive_notebooks, count_archive_notebooks
+from profiling import profile_stage, profiled
+from renderer import render_html_document, write_html_document
+from models import Cell, NotebookExplanation
+
+# --- Speculative processing configuration from .env ---
+SPECULATIVE_MODE = os.getenv("SPECULATIVE_MODE", "false").lower() == "true" # Default for the sidebar toggle
+SPECULATIVE_MAX_PROMPTS = int(os.getenv("SPECULATIVE_MAX_PROMPTS", "8")) # LLM prompts allowed before the button click
+
+# --- Multi-notebook configuration from .env ---
+MULTI_NOTEBOOK_WORKERS = int(os.getenv("MULTI_NOTEBOOK_WORKERS", "4")) # Notebooks processed at the same time
+MAX_ARCHIVE_NOTEBOOKS = int(os.getenv("MAX_ARCHIVE_NOTEBOOKS", "200")) # Notebooks taken from uploaded archives per run
+MAX_ARCHIVE_TOTAL_BYTES = int(os.getenv("MAX_ARCHIVE_TOTAL_BYTES", str(256 * 1024 * 1024))) # Decompressed notebook bytes taken from archives per run
+REPORT_ZIP_SPOOL_BYTES = int(os.getenv("REPORT_ZIP_SPOOL_BYTES", str(8 * 1024 * 1024))) # Larger ZIP downloads are assembled on disk
+
+# --- Report display configuration from .env ---
+REPORT_PAGE_SIZE = int(os.getenv("REPORT_PAGE_SIZE", "25")) # Cell explanations shown per page in the UI
+
+# An ATX heading line ("## Data Preprocessing") in a markdown cell opens a new report section
+_MARKDOWN_HEADING = re.compile(r'^ {0,3}#{1,6}\s+(.+?)(?:\s+#+)?\s*$')
+_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+
+@profiled("save_and_get_summary")
+def save_and_get_summary(uploaded_file, output_format: str = "markdown",
+                         cancel_event: threading.Event | None = None) -> tuple[str, str | None, bool, str | None, dict | None]:
+    """
+    Handles an uploaded .ipynb file, parses it, generates a summary using AI logic,
+    and returns the summary text along with a downloadable link, a success status,
+    and an error message if applicable.
+
+    Args:
+        uploaded_file (streamlit.runtime.uploaded_file_manager.UploadedFile):
+            The file object uploaded via Streamlit's st.file_uploader.
+        output_format (str): The desired output format ('markdown' or 'html').
+        cancel_event (threading.Event | None): Set it to stop issuing LLM requests (e.g. the session ended).
+
+    Returns:
+        tuple[str, str | None, bool, str | None, dict | None]: A tuple containing:
+            - The generated summary text (Markdown format) if successful, otherwise an empty string.
+            - A base64 encoded download link for the generated summary file (str) or None.
+            - A boolean indicating if the operation was successful (True/False).
+            - An error message (str) if the operation failed, otherwise None.
+            - The report outline from build_report_outline, with the run's 'compaction_report', if successful, otherwise None.
+    """
+    if uploaded_file is None:
+        return "", None, False, "Please upload a .ipynb file to get started.", None
+
+    temp_notebook_path = None # Initialize to None for finally block
+    try:
+        # Read the content of the uploaded .ipynb file
+        notebook_content = uploaded_file.read().decode("utf-8")
+        
+        # Save the uploaded content to a temporary file for nbformat to read
+        temp_notebook_path = f"temp_{os.path.basename(uploaded_file.name)}" # Use basename to avoid path issues
+        with open(temp_notebook_path, "w", encoding="utf-8") as f:
+            f.write(notebook_content)
+
+        # Parse the notebook using the function from ai_logic
+        cells = parse_notebook_content(temp_notebook_path)
+        
+        if not cells:
+            return "", None, False, "Could not parse the uploaded notebook. It might be empty or corrupted.", None
+
+        # Generate the explanation using the AI logic
+        run_stats = {}
+        explanation = explain_notebook(cells, run_stats, cancel_event=cancel_event)
+        summary_text = explanation.to_markdown()
+
+        # Prepare the file for download based on output_format
+        download_filename_prefix = uploaded_file.name.replace(".ipynb", "")
+        download_link = None
+        mime_type = None
+        output_content = summary_text
+
+        if output_format == "markdown":
+            download_filename = f"{download_filename_prefix}_explanation.md"
+            encoded_content = base64.b64encode(output_content.encode("utf-8")).decode()
+            mime_type = "text/markdown"
+            download_link = f'data:{mime_type};base64,{encoded_content}'
+        elif output_format == "html":
+            with profile_stage('render'):
+                html_content = render_html_document(output_content, download_filename_prefix)
+            download_filename = f"{download_filename_prefix}_explanation.html"
+            encoded_content = base64.b64encode(html_content.encode("utf-8")).decode()
+            mime_type = "text/html"
+            download_link = f'data:{mime_type};base64,{encoded_content}'
+        else:
+            return summary_text, None, False, "Unsupported output format. Only Markdown and HTML are supported for download.", None
+
+        outline = build_report_outline(explanation, cells)
+        outline['compaction_report'] = run_stats.get('compaction_report')
+        return summary_text, download_link, True, None, outline # Success!
+
+    except RequestCancelled:
+        return "", None, False, "The explanation was cancelled.", None
+    except Exception as e:
+        return "", None, False, f"An unexpected error occurred: {e}", None
+    finally:
+        # Ensure temporary file is removed even if an error occurs
+        if temp_notebook_path and os.path.exists(temp_notebook_path):
+            os.remove(temp_notebook_path)
+
+def _first_heading(cell: Cell) -> str | None:
+    """Returns the text of the first heading in a markdown cell's source (fenced code is skipped)."""
+    fence = None
+    for line in cell.content.split('\n'):
+        match = _FENCE.match(line)
+        if match:
+            marker = match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence):
+                fence = None
+            continue
+        if fence is None:
+            heading = _MARKDOWN_HEADING.match(line)
+            if heading:
+                return heading.group(1).strip()
+    return None
+
+def build_report_outline(explanation: NotebookExplanation, notebook_cells: list[Cell]) -> dict:
+    """
+    Splits an explanation into its overview and the cell explanations grouped by the
+    notebook's markdown headings, so the UI can page through large reports.
+
+    Args:
+        explanation (NotebookExplanation): The result of explain_notebook.
+        notebook_cells (list[Cell]): The cells the explanation was generated from.
+
+    Returns:
+        dict: 'overview' (Markdown shown above the cells, including any notes) and 'entries',
+              a list of {'section', 'markdown', 'search_text'} dicts in notebook order.
+    """
+    entries = []
+    section = "Before the first heading"
+    for cell_explanation in explanation.cells:
+        cell = notebook_cells[cell_explanation.cell_index]
+        if cell.type == 'markdown':
+            section = _first_heading(cell) or section
+        markdown = cell_explanation.to_markdown()
+        entries.append({'section': section, 'markdown': markdown, 'search_text': markdown.lower()})
+    return {'overview': explanation.overview_markdown(), 'entries': entries}
+
+def paginate_report_entries(entries: list[dict], query: str, page: int,
+                            page_size: int = REPORT_PAGE_SIZE) -> tuple[list[tuple[str, list[str]]], int, int]:
+    """
+    Filters cell explanations by a search query and returns one page of them, grouped by section.
+
+    Args:
+        entries (list[dict]): 'entries' from build_report_outline.
+        query (str): Case-insensitive text to search for (empty shows every entry).
+        page (int): 1-based page number; out-of-range values are clamped.
+        page_size (int): Entries per page.
+
+    Returns:
+        tuple: ([(section title, [entry Markdown, ...]), ...] for the page, number of matching entries, page count).
+    """
+    query = query.strip().lower()
+    matches = [entry for entry in entries if query in entry['search_text']] if query else entries
+    page_count = max(1, -(-len(matches) // page_size))
+    page = min(max(page, 1), page_count)
+    groups = []
+    for entry in matches[(page - 1) * page_size:page * page_size]:
+        if not groups or groups[-1][0] != entry['section']:
+            groups.append((entry['section'], []))
+        groups[-1][1].append(entry['markdown'])
+    return groups, len(matches), page_count
+
+@dataclass(frozen=True)
+class ArchivedNotebook:
+    """A notebook read from an uploaded archive; usable wherever an UploadedFile is (.name / .getvalue())."""
+    name: str
+    data: bytes
+
+    def getvalue(self) -> bytes:
+        return self.data
+
+def expand_uploaded_archives(uploaded_files: list) -> tuple[list, int, list[str]]:
+    """
+    Replaces uploaded ZIP/tar archives by the notebooks inside them, read directly from
+    the upload in memory (nothing is extracted to disk). Plain .ipynb uploads are kept as-is.
+    Archived notebooks are taken until MAX_ARCHIVE_NOTEBOOKS of them or MAX_ARCHIVE_TOTAL_BYTES
+    of decompressed data are reached; the rest are only counted from the archive's directory,
+    not decompressed.
+
+    Args:
+        uploaded_files (list): Streamlit UploadedFile objects.
+
+    Returns:
+        tuple[list, int, list[str]]: (notebook files, number of archived notebooks left out
+                                      because of those limits, one error message per archive
+                                      that could not be read).
+    """
+    notebooks, from_archives, archive_bytes, left_out, errors = [], 0, 0, 0, []
+    for uploaded_file in uploaded_files:
+        if not is_archive_name(uploaded_file.name):
+            notebooks.append(uploaded_file)
+            continue
+        data = uploaded_file.getvalue()
+        taken = []
+        try:
+            if from_archives >= MAX_ARCHIVE_NOTEBOOKS or archive_bytes >= MAX_ARCHIVE_TOTAL_BYTES:
+                left_out += count_archive_notebooks(BytesIO(data))
+                continue
+            with closing(iter_archive_notebooks(BytesIO(data))) as members:
+                for member_name, member_bytes in members:
+                    if archive_bytes + len(member_bytes) > MAX_ARCHIVE_TOTAL_BYTES:
+                        left_out += count_archive_notebooks(BytesIO(data)) - len(taken)
+                        archive_bytes = MAX_ARCHIVE_TOTAL_BYTES
+                        break
+                    taken.append(ArchivedNotebook(f"{uploaded_file.name}/{member_name}", member_bytes))
+                    archive_bytes += len(member_bytes)
+                    if from_archives + len(taken) >= MAX_ARCHIVE_NOTEBOOKS:
+                        left_out += count_archive_notebooks(BytesIO(data)) - len(taken)
+                        break
+        except (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError,
+                RuntimeError, NotImplementedError) as e:
+            # RuntimeError: encrypted ZIP member; NotImplementedError: unsupported ZIP compression
+            errors.append(f"{uploaded_file.name} could not be read as a ZIP or tar archive ({e}).")
+        notebooks.extend(taken) # Notebooks read before an error are still explained
+        from_archives += len(taken)
+    return notebooks, left_out, errors
+
+def summarize_uploads_locally(uploaded_files: list) -> tuple[list[tuple[str, dict | None]], dict]:
+    """
+    Computes the instant static-analysis summary of each uploaded notebook (no LLM calls),
+    plus corpus-wide statistics across all of them.
+
+    Args:
+        uploaded_files (list): Streamlit UploadedFile objects (anything with .name and .getvalue()).
+
+    Returns:
+        tuple: ([(file name, local summary or None if unparseable), ...], corpus statistics).
+    """
+    summaries = []
+    for uploaded_file in uploaded_files:
+        cells = parse_notebook_string(uploaded_file.getvalue().decode("utf-8", errors="replace"))
+        summaries.append((uploaded_file.name, summarize_notebook_locally(cells) if cells else None))
+    corpus = summarize_corpus([summary for _, summary in summaries if summary is not None])
+    return summaries, corpus
+
+def _explain_notebook_job(job: dict, file_bytes: bytes) -> None:
+    """
+    Worker for submit_notebook_batch: parses one notebook from memory and explains it,
+    updating the job's progress as prompts complete.
+    """
+    job['stage'] = 'parsing'
+    cells = parse_notebook_string(file_bytes.decode("utf-8", errors="replace"))
+    if not cells:
+        job.update(stage='failed', error="Could not parse the uploaded notebook. It might be empty or corrupted.")
+        return
+
+    def on_progress(completed: int, total: int) -> None:
+        job.update(stage='explaining', completed=completed, total=total)
+
+    try:
+        job['summary_text'] = generate_notebook_summary(cells, progress_callback=on_progress,
+                                                        cancel_event=job['cancel_event'])
+        job['stage'] = 'done'
+    except RequestCancelled:
+        job.update(stage='cancelled', error="Cancelled.")
+    except Exception as e:
+        job.update(stage='failed', error=f"An unexpected error occurred: {e}")
+
+def submit_notebook_batch(uploaded_files: list) -> list[dict]:
+    """
+    Starts explaining several uploaded notebooks concurrently. All of them share the
+    process-wide LLM concurrency window, so more notebooks do not mean more in-flight requests.
+
+    Args:
+        uploaded_files (list): Streamlit UploadedFile objects (anything with .name and .getvalue()).
+
+    Returns:
+        list[dict]: One job per file with 'name', 'stage' ('queued', 'parsing', 'explaining',
+                    'done', 'failed' or 'cancelled'), 'completed'/'total' prompts, 'summary_text',
+                    'error', the 'future' to wait on and its 'cancel_event'. Jobs are updated in
+                    place from worker threads.
+    """
+    executor = ThreadPoolExecutor(max_workers=MULTI_NOTEBOOK_WORKERS, thread_name_prefix="notebook-batch")
+    jobs = []
+    for uploaded_file in uploaded_files:
+        job = {'name': uploaded_file.name, 'stage': 'queued', 'completed': 0, 'total': 0,
+               'summary_text': None, 'error': None, 'cancel_event': threading.Event()}
+        job['future'] = executor.submit(_explain_notebook_job, job, uploaded_file.getvalue())
+        jobs.append(job)
+    executor.shutdown(wait=False) # Lets queued jobs run; the threads exit once the batch is done
+    return jobs
+
+def cancel_notebook_batch(jobs: list[dict]) -> None:
+    """
+    Stops every unfinished job of a batch (e.g. the user left or started over): queued notebooks
+    are never started and running ones stop issuing LLM requests.
+
+    Args:
+        jobs (list[dict]): Jobs from submit_notebook_batch.
+    """
+    for job in jobs:
+        job['cancel_event'].set()
+        if job['future'].cancel():
+            job.update(stage='cancelled', error="Cancelled.")
+
+def build_reports_zip(jobs: list[dict], archive: BinaryIO) -> None:
+    """
+    Writes the Markdown and HTML explanation of every finished job into one ZIP archive.
+    Each report is streamed straight into its compressed archive member; no report is
+    base64-encoded or held as a separate full copy in memory.
+
+    Args:
+        jobs (list[dict]): Jobs from submit_notebook_batch, after they have finished.
+        archive (BinaryIO): Writable binary stream (file, BytesIO, HTTP response body, ...).
+    """
+    used_prefixes = set()
+    errors = []
+    with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for job in jobs:
+            if job['stage'] != 'done':
+                errors.append(f"{job['name']}: {job['error'] or 'not finished'}")
+                continue
+            prefix = os.path.basename(job['name']).replace(".ipynb", "")
+            unique_prefix, counter = prefix, 1
+            while unique_prefix in used_prefixes: # Same notebook name uploaded from different folders
+                counter += 1
+                unique_prefix = f"{prefix}_{counter}"
+            used_prefixes.add(unique_prefix)
+            with zf.open(f"{unique_prefix}_explanation.md", 'w') as member:
+                member.write(job['summary_text'].encode("utf-8"))
+            with zf.open(f"{unique_prefix}_explanation.html", 'w') as member:
+                with TextIOWrapper(member, encoding="utf-8") as text_member:
+                    write_html_document(job['summary_text'], prefix, text_member)
+        if errors:
+            zf.writestr("errors.txt", "\n".join(errors) + "\n")
+
+def _run_speculative_processing(file_bytes: bytes, handle: dict, user_id: str | None) -> None:
+    """
+    Background worker for start_speculative_processing. Parses the notebook and warms the
+    response cache; when the whole notebook, overview prompt included, fits the prompt budget,
+    the overview is warmed too.
+    """
+    cancel_event = handle['cancel_event']
+    try:
+        cells = parse_notebook_string(file_bytes.decode("utf-8"))
+        if cells and not cancel_event.is_set():
+            sent, planned = prefetch_cell_explanations(cells, SPECULATIVE_MAX_PROMPTS, cancel_event, user_id)
+            handle['prompts_sent'] = sent
+            if sent == planned and sent < SPECULATIVE_MAX_PROMPTS and not cancel_event.is_set():
+                # Every cell prompt is cached, so this only pays for (and charges) the overview prompt
+                generate_notebook_summary(cells, user_id=user_id, cancel_event=cancel_event)
+                handle['prompts_sent'] = sent + 1
+        handle['status'] = 'cancelled' if cancel_event.is_set() else 'done'
+    except RequestCancelled:
+        handle['status'] = 'cancelled'
+    except Exception as e:
+        handle['status'] = 'failed'
+        print(f"Speculative processing failed: {e}")
+
+def start_speculative_processing(file_bytes: bytes, user_id: str | None = None) -> dict:
+    """
+    Starts parsing and prefetching LLM explanations for an uploaded notebook in the background,
+    so results are (mostly) cached by the time the user clicks "Generate Explanation".
+    At most SPECULATIVE_MAX_PROMPTS prompts are sent, and they are charged to `user_id`.
+    A click while prompts are still in flight waits for those answers instead of resending them.
+
+    Args:
+        file_bytes (bytes): The raw content of the uploaded .ipynb file.
+        user_id (str | None): Identifier of the user, for the TOKEN_BUDGET_PER_USER ledger.
+
+    Returns:
+        dict: A handle with 'file_hash', 'status' ('running', 'done', 'cancelled' or 'failed'),
+              'prompts_sent' and the 'cancel_event' used by cancel_speculative_processing.
+    """
+    handle = {
+        'file_hash': hashlib.sha256(file_bytes).hexdigest(),
+        'status': 'running',
+        'prompts_sent': 0,
+        'cancel_event': threading.Event(),
+    }
+    threading.Thread(target=_run_speculative_processing, args=(file_bytes, handle, user_id), daemon=True).start()
+    return handle
+
+def cancel_speculative_processing(handle: dict | None) -> None:
+    """
+    Stops a speculative run before it sends any further prompts (e.g. when the file is replaced).
+
+    Args:
+        handle (dict | None): The handle returned by start_speculative_processing.
+    """
+    if handle is not None:
+        handle['cancel_event'].set()
+
+# --- Main guard for testing features.py in isolation ---
+if __name__ == "__main__":
     print("This file contains features for the Streamlit app. Run main.py to test.")
\ No newline at end of file
@@ -0,0 +1,150 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+# --- Configuration from .env ---
+JOURNAL_ENABLED = os.getenv("JOURNAL_ENABLED", "true").lower() == "true" # Resume interrupted runs from a per-job journal
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", ".explainer_journal") # Where job journals are kept until the job completes
+JOURNAL_FSYNC_INTERVAL_S = float(os.getenv("JOURNAL_FSYNC_INTERVAL_S", "1.0")) # Max time a record waits for fsync
+JOURNAL_FSYNC_BATCH = int(os.getenv("JOURNAL_FSYNC_BATCH", "32")) # Records that trigger an early fsync
+JOURNAL_TTL_S = float(os.getenv("JOURNAL_TTL_S", "604800")) # Journals of abandoned jobs are deleted after this long (default 7 days)
+
+def journal_key(*parts: str) -> str:
+    """
+    Identifies a job for resuming: the same notebook content and options yield the same key.
+
+    Args:
+        *parts (str): Everything that changes the prompts, e.g. cell content hashes and model names.
+
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    return hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()
+
+def prompt_digest(prompt: str) -> str:
+    """Returns the key a prompt's answer is journaled under."""
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+def prune_stale_journals(directory: str = JOURNAL_DIR, ttl_s: float = JOURNAL_TTL_S) -> int:
+    """
+    Deletes journals that have not been written to for ttl_s seconds, i.e. of jobs that were
+    interrupted and never rerun.
+
+    Args:
+        directory (str): The journal directory.
+        ttl_s (float): Maximum age of a journal's last write; 0 or less keeps every journal.
+
+    Returns:
+        int: The number of journals deleted.
+    """
+    if ttl_s <= 0:
+        return 0
+    cutoff = time.time() - ttl_s
+    deleted = 0
+    for path in glob.glob(os.path.join(directory, "*.jsonl")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                deleted += 1
+        except OSError:
+            continue # Removed by another process, or still open on Windows
+    return deleted
+
+class JobJournal:
+    """
+    Append-only JSON-lines journal of the LLM answers a job has received so far.
+
+    Every attempt writes its own file, {key}.{attempt}.jsonl, so two identical jobs running at
+    the same time never interleave records; on open, the files of earlier attempts of the same
+    job are read to resume from. Records are written to the OS immediately but fsync'ed in
+    batches by a background thread, every JOURNAL_FSYNC_INTERVAL_S seconds or as soon as
+    JOURNAL_FSYNC_BATCH records are pending, so journaling never adds a disk flush to the
+    caller. A crash can lose at most the last unsynced batch, and those prompts are simply
+    sent again on resume.
+    """
+
+    def __init__(self, key: str, directory: str = JOURNAL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        prune_stale_journals(directory)
+        self._earlier_paths = sorted(glob.glob(os.path.join(directory, f"{key}.*.jsonl")))
+        self.completed = self._load(self._earlier_paths)
+        self.path = os.path.join(directory, f"{key}.{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl")
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._sync_requested = threading.Event()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True, name="journal-fsync")
+        self._flusher.start()
+
+    @staticmethod
+    def _load(paths: list[str]) -> dict[str, str]:
+        """Reads the answers recorded by earlier attempts; torn lines are ignored."""
+        completed = {}
+        for path in paths:
+            try:
+                with open(path, encoding='utf-8', errors='replace') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                            completed[record['prompt']] = record['response']
+                        except (ValueError, KeyError, TypeError):
+                            continue
+            except OSError:
+                continue # Pruned or discarded by another job in the meantime
+        return completed
+
+    def record(self, prompt_key: str, cell_indices: list[int], response: str) -> None:
+        """
+        Appends one completed prompt's answer.
+
+        Args:
+            prompt_key (str): prompt_digest() of the prompt.
+            cell_indices (list[int]): Cells the prompt explains (for inspection only).
+            response (str): The LLM's answer.
+        """
+        line = json.dumps({'prompt': prompt_key, 'cells': cell_indices, 'response': response}) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= JOURNAL_FSYNC_BATCH:
+                self._sync_requested.set() # The flusher syncs it; the caller does not wait for the disk
+        self.completed[prompt_key] = response
+
+    def _sync(self) -> None:
+        # fsync runs outside the lock so record() never waits for the disk
+        with self._lock:
+            if not self._unsynced:
+                return
+            self._unsynced = 0
+        os.fsync(self._file.fileno())
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.is_set():
+            self._sync_requested.wait(JOURNAL_FSYNC_INTERVAL_S)
+            self._sync_requested.clear()
+            self._sync()
+
+    def close(self) -> None:
+        """Syncs and closes the journal; the file stays so a later run of the same job can resume from it."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._sync_requested.set()
+        self._flusher.join()
+        self._sync()
+        self._file.close()
+
+    def discard(self) -> None:
+        """Closes and deletes this attempt's journal and those it resumed from, once the job has produced a result."""
+        self.close()
+        for path in [self.path] + self._earlier_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                continue # Already removed by an identical job that finished first
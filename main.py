@@ -1,110 +1,350 @@
-import streamlit as st
-from ai_logic import GOOGLE_API_KEY # Just to check if API key is loaded
-from styling import apply_custom_styles
-from features import save_and_get_summary
-import os
-
-def main():
-    """
-    Main function to run the Streamlit application for the Data Science Notebook Explainer.
-    """
-    # 1. Set Streamlit Page Configuration
-    st.set_page_config(
-        page_title="Data Science Notebook Explainer",
-        page_icon="📚",
-        layout="wide", # Use a wide layout for better content display
-        initial_sidebar_state="expanded" # Keep sidebar expanded by default
-    )
-
-    # 2. Apply Custom Styles (from styling.py)
-    apply_custom_styles()
-
-    # --- Header Section ---
-    st.title("Data Science Notebook Explainer 📝")
-    st.markdown("""
-        Unlock the secrets of your Jupyter or Colab notebooks! This AI-powered assistant
-        analyzes your `.ipynb` files and generates clear, structured explanations of each
-        code block, its purpose, and the overall workflow.
-        
-        **Simply upload your notebook and let the AI do the heavy lifting!**
-    """)
-
-    # --- API Key Check (Optional but good for debugging) ---
-    if not GOOGLE_API_KEY:
-        st.error("🚨 Google Gemini API Key is not set! Please add `GOOGLE_API_KEY=\"YOUR_API_KEY\"` to your `.env` file.")
-        st.stop() # Stop the app if API key is missing
-
-    # --- Sidebar for File Upload and Options ---
-    st.sidebar.header("Upload Your Notebook")
-    uploaded_file = st.sidebar.file_uploader(
-        "Choose a `.ipynb` file",
-        type="ipynb",
-        help="Upload your Jupyter or Google Colab notebook file here."
-    )
-
-    st.sidebar.header("Output Options")
-    output_format = st.sidebar.radio(
-        "Select Output Format:",
-        ("Markdown", "HTML"),
-        help="Choose the format for the downloadable explanation."
-    ).lower() # Convert to lowercase for internal use
-
-    process_button = st.sidebar.button("Generate Explanation", use_container_width=True)
-
-    # --- Main Content Area ---
-    st.markdown("---") # Visual separator
-
-    if uploaded_file is not None and process_button:
-        with st.spinner("Analyzing your notebook and generating explanation... This might take a moment."):
-            # Call the main feature function to process the file and get summary/link
-            summary_text, download_link, success, error_message = save_and_get_summary(uploaded_file, output_format)
-
-            if success:
-                st.success("Explanation Generated Successfully!")
-                
-                # Display the explanation
-                st.subheader("Generated Notebook Explanation")
-                # Using st.markdown to render the generated Markdown text
-                st.markdown(summary_text)
-
-                st.markdown("---")
-                st.subheader("Download Your Explanation")
-                # Create a download button based on the generated link and format
-                st.download_button(
-                    label=f"Download {output_format.upper()} Explanation",
-                    data=download_link,
-                    file_name=uploaded_file.name.replace(".ipynb", f"_explanation.{output_format}"),
-                    mime=f"text/{output_format}",
-                    key="download_button",
-                    help=f"Click to download the notebook explanation as a .{output_format} file."
-                )
-                
-            else:
-                st.error(f"Failed to generate explanation: {error_message}")
-                if "API key" in error_message or "authentication" in error_message: # More robust check for API errors
-                    st.warning("Ensure your Google Gemini API key is correctly set in the `.env` file and has sufficient permissions.")
-
-    elif uploaded_file is None and process_button:
-        st.warning("Please upload a `.ipynb` file first before clicking 'Generate Explanation'.")
-        
-    elif uploaded_file is None:
-        st.info("Upload a notebook file on the left sidebar and click 'Generate Explanation' to begin.")
-        # Use the Unsplash image (ensure URL is valid or replace with a local asset)
-        st.image("https://images.unsplash.com/photo-1596495632007-9b43d3b7f141?crop=entropy&cs=tinysrgb&fit=max&fm=jpg&ixid=M3w1NjY1OTR8MHwxfHNlYXJjaHw0OXx8ZGF0YSUyMHNjaWVuY2V8ZW58MHx8fHwxNzE5MTUyNDQ2fDA&ixlib=rb-4.0.3&q=80&w=1080",
-                 caption="Visualize your data science journey with AI explanations",
-                 use_column_width=True)
-
-
-    # --- Footer ---
-    st.markdown("---")
-    st.markdown(
-        """
-        <div style="text-align: center; font-size: small; color: var(--text-medium);">
-            Developed with ❤️ by Your Name/Organization. Powered by Google Gemini and Streamlit.
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-
-if __name__ == "__main__":
+import streamlit as st
+from ai_logic import GOOGLE_API_KEY # Just to check if API key is loaded
+from styling import apply_custom_styles
+from features import (save_and_get_summary, start_speculative_processing, cancel_speculative_processing,
+                      SPECULATIVE_MODE, submit_notebook_batch, build_reports_zip,
+                      paginate_report_entries, cancel_notebook_batch,
+                      summarize_uploads_locally, expand_uploaded_archives, MAX_ARCHIVE_NOTEBOOKS, MAX_ARCHIVE_TOTAL_BYTES,
+                      REPORT_ZIP_SPOOL_BYTES)
+from archive_reader import is_archive_name
+from static_summary import format_local_summary, format_corpus_summary
+import os
+import time
+import hashlib
+import tempfile
+import threading
+
+def update_speculative_processing(uploaded_file, enabled: bool):
+    """
+    Keeps at most one speculative run alive per session: starts one when a new file lands,
+    and cancels the previous run when the file is removed, replaced or the mode is turned off.
+    """
+    handle = st.session_state.get("speculative_handle")
+    file_bytes = uploaded_file.getvalue() if (uploaded_file is not None and enabled) else None
+    file_hash = hashlib.sha256(file_bytes).hexdigest() if file_bytes is not None else None
+    if handle is not None and handle['file_hash'] == file_hash:
+        return # Already working on (or finished) this exact file
+    cancel_speculative_processing(handle)
+    st.session_state["speculative_handle"] = start_speculative_processing(file_bytes) if file_bytes is not None else None
+
+def run_cancellable(target, *args):
+    """
+    Runs target(*args, cancel_event=...) in a worker thread while this script run keeps polling.
+    Streamlit interrupts a script run (rerun, new upload, closed tab) at its next element update,
+    so the polling loop touches a placeholder; if the run is interrupted the work is cancelled
+    instead of spending LLM quota on a result nobody will see.
+    """
+    cancel_event = threading.Event()
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(value=target(*args, cancel_event=cancel_event)), daemon=True)
+    worker.start()
+    heartbeat = st.empty()
+    try:
+        while worker.is_alive():
+            heartbeat.empty() # Gives Streamlit a chance to stop this run
+            time.sleep(0.25)
+    finally:
+        if worker.is_alive():
+            cancel_event.set()
+    return result['value']
+
+def render_paged_explanation(outline: dict):
+    """
+    Shows the overview, then only the current page of cell explanations, grouped into
+    collapsible sections by the notebook's markdown headings, with a search box.
+    Large reports stay responsive because only one page is sent to the browser.
+    """
+    st.markdown(outline['overview'])
+
+    st.markdown("## Cell-by-Cell Summary:")
+    query = st.text_input("Search cell explanations", key="explanation_search",
+                          placeholder="e.g. a library, variable or cell number")
+    _, match_count, page_count = paginate_report_entries(outline['entries'], query, 1)
+    page = 1
+    if page_count > 1:
+        # No key: the widget resets to page 1 whenever the page count changes (e.g. a new search)
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+    groups, _, _ = paginate_report_entries(outline['entries'], query, page)
+    if query:
+        st.caption(f"{match_count} of {len(outline['entries'])} cells match \"{query}\".")
+
+    for position, (section, entries) in enumerate(groups):
+        with st.expander(section, expanded=bool(query) or position == 0):
+            st.markdown("\n\n".join(entries))
+
+    if outline.get('compaction_report'):
+        st.caption(outline['compaction_report'])
+
+def render_local_summary(local_summary: str):
+    """Shows the instant static-analysis summary, which is available before any AI output."""
+    st.subheader("Quick Facts (local analysis)")
+    st.markdown(local_summary)
+
+def render_explanation(result: dict):
+    """
+    Displays a generated explanation and its download button. Called on every rerun while the
+    result is kept in session state, so paging and searching do not regenerate it.
+    """
+    st.success("Explanation Generated Successfully!")
+
+    if result.get('local_summary'):
+        render_local_summary(result['local_summary'])
+
+    # Display the explanation
+    st.subheader("Generated Notebook Explanation")
+    render_paged_explanation(result['outline'])
+
+    st.markdown("---")
+    st.subheader("Download Your Explanation")
+    # Create a download button based on the generated link and format
+    output_format = result['output_format']
+    st.download_button(
+        label=f"Download {output_format.upper()} Explanation",
+        data=result['download_link'],
+        file_name=result['file_name'].replace(".ipynb", f"_explanation.{output_format}"),
+        mime=f"text/{output_format}",
+        key="download_button",
+        on_click="ignore", # Keep the explanation on screen after downloading
+        help=f"Click to download the notebook explanation as a .{output_format} file."
+    )
+
+def run_notebook_batch(uploaded_files: list) -> dict:
+    """
+    Explains several notebooks concurrently, showing one progress bar per notebook.
+
+    Returns:
+        dict: The batch result kept in session state: 'quick_facts' (corpus Markdown),
+              'notebook_facts' ([(name, Markdown or None)]) and 'jobs' (name, stage,
+              summary_text and error of every notebook).
+    """
+    st.subheader(f"Explaining {len(uploaded_files)} Notebooks")
+    jobs = submit_notebook_batch(uploaded_files)
+
+    # Instant local statistics while the AI explanations are generated
+    local_summaries, corpus = summarize_uploads_locally(uploaded_files)
+    batch = {
+        'quick_facts': format_corpus_summary(corpus),
+        'notebook_facts': [(name, format_local_summary(summary) if summary else None) for name, summary in local_summaries],
+    }
+    facts = st.empty()
+    with facts.container():
+        render_batch_facts(batch)
+
+    progress_bars = [st.progress(0.0, text=f"{job['name']}: queued") for job in jobs]
+
+    # Streamlit elements can only be updated from this script thread, so poll the jobs.
+    # If the run is interrupted (rerun, new upload, closed tab), the unfinished jobs are cancelled.
+    finished = False
+    try:
+        while True:
+            finished = all(job['future'].done() for job in jobs)
+            for progress_bar, job in zip(progress_bars, jobs):
+                fraction = job['completed'] / job['total'] if job['total'] else 0.0
+                if job['stage'] in ('done', 'failed', 'cancelled'):
+                    fraction = 1.0
+                progress_bar.progress(fraction, text=f"{job['name']}: {job['stage']}")
+            if finished:
+                break
+            time.sleep(0.25)
+    finally:
+        if not finished:
+            cancel_notebook_batch(jobs)
+
+    facts.empty() # Shown again with the results
+    for progress_bar in progress_bars:
+        progress_bar.empty()
+    batch['jobs'] = [{key: job[key] for key in ('name', 'stage', 'summary_text', 'error')} for job in jobs]
+    return batch
+
+def render_batch_facts(batch: dict):
+    """Shows the corpus-wide and per-notebook local statistics of a batch."""
+    st.subheader("Quick Facts (local analysis)")
+    st.markdown(batch['quick_facts'])
+    with st.expander("Per-notebook facts"):
+        for name, facts in batch['notebook_facts']:
+            st.markdown(f"**{name}**")
+            st.markdown(facts or "Could not parse this notebook.")
+
+def render_batch_results(batch: dict):
+    """
+    Displays the results of a finished batch and the ZIP download. Called on every rerun while
+    the batch is kept in session state, so the download click does not lose the results.
+    """
+    jobs = batch['jobs']
+    render_batch_facts(batch)
+    succeeded = [job for job in jobs if job['stage'] == 'done']
+    if succeeded:
+        st.success(f"Explanations generated for {len(succeeded)} of {len(jobs)} notebooks!")
+    for job in jobs:
+        if job['stage'] != 'done':
+            st.error(f"Failed to explain {job['name']}: {job['error']}")
+
+    for job in succeeded:
+        with st.expander(f"Explanation: {job['name']}"):
+            st.markdown(job['summary_text'])
+
+    if succeeded:
+        st.markdown("---")
+        st.subheader("Download All Explanations")
+
+        def make_archive():
+            # Built only when the button is clicked. Reports are streamed into the ZIP entry by
+            # entry, and the archive spills to a temporary file once it outgrows REPORT_ZIP_SPOOL_BYTES;
+            # Streamlit then reads the finished file once to serve it.
+            with tempfile.SpooledTemporaryFile(max_size=REPORT_ZIP_SPOOL_BYTES) as archive:
+                build_reports_zip(jobs, archive)
+                archive.seek(0)
+                return archive.read()
+
+        st.download_button(
+            label="Download ZIP (Markdown + HTML)",
+            data=make_archive,
+            file_name="notebook_explanations.zip",
+            mime="application/zip",
+            key="download_zip_button",
+            on_click="ignore", # Keep the results on screen after downloading
+            help="One Markdown and one HTML explanation per notebook."
+        )
+
+def main():
+    """
+    Main function to run the Streamlit application for the Data Science Notebook Explainer.
+    """
+    # 1. Set Streamlit Page Configuration
+    st.set_page_config(
+        page_title="Data Science Notebook Explainer",
+        page_icon="📚",
+        layout="wide", # Use a wide layout for better content display
+        initial_sidebar_state="expanded" # Keep sidebar expanded by default
+    )
+
+    # 2. Apply Custom Styles (from styling.py)
+    apply_custom_styles()
+
+    # --- Header Section ---
+    st.title("Data Science Notebook Explainer 📝")
+    st.markdown("""
+        Unlock the secrets of your Jupyter or Colab notebooks! This AI-powered assistant
+        analyzes your `.ipynb` files and generates clear, structured explanations of each
+        code block, its purpose, and the overall workflow.
+        
+        **Simply upload your notebook and let the AI do the heavy lifting!**
+    """)
+
+    # --- API Key Check (Optional but good for debugging) ---
+    if not GOOGLE_API_KEY:
+        st.error("🚨 Google Gemini API Key is not set! Please add `GOOGLE_API_KEY=\"YOUR_API_KEY\"` to your `.env` file.")
+        st.stop() # Stop the app if API key is missing
+
+    # --- Sidebar for File Upload and Options ---
+    st.sidebar.header("Upload Your Notebook")
+    uploaded_files = st.sidebar.file_uploader(
+        "Choose one or more `.ipynb` files or a `.zip` of notebooks",
+        type=["ipynb", "zip"],
+        accept_multiple_files=True,
+        help="Upload your Jupyter or Google Colab notebook file here. Select several files, or a ZIP archive, to explain a whole project."
+    )
+    archive_uploaded = any(is_archive_name(f.name) for f in uploaded_files)
+    uploaded_file = uploaded_files[0] if len(uploaded_files) == 1 and not archive_uploaded else None
+
+    st.sidebar.header("Output Options")
+    output_format = st.sidebar.radio(
+        "Select Output Format:",
+        ("Markdown", "HTML"),
+        help="Choose the format for the downloadable explanation."
+    ).lower() # Convert to lowercase for internal use
+
+    speculative_mode = st.sidebar.checkbox(
+        "Start processing on upload",
+        value=SPECULATIVE_MODE,
+        help="Begin parsing and explaining the first cells as soon as the file is uploaded, so results are ready sooner."
+    )
+    update_speculative_processing(uploaded_file, speculative_mode)
+
+    process_button = st.sidebar.button("Generate Explanation", use_container_width=True)
+
+    # --- Main Content Area ---
+    st.markdown("---") # Visual separator
+
+    batch_upload_ids = tuple(f.file_id for f in uploaded_files)
+    if (len(uploaded_files) > 1 or archive_uploaded) and process_button:
+        st.session_state.pop("batch", None)
+        notebook_files, left_out, archive_errors = expand_uploaded_archives(uploaded_files)
+        for archive_error in archive_errors:
+            st.error(archive_error)
+        if left_out:
+            st.warning(f"Only the first {MAX_ARCHIVE_NOTEBOOKS} notebooks from the uploaded archives are explained (at most {MAX_ARCHIVE_TOTAL_BYTES // 1024 ** 2} MiB in total); {left_out} were left out.")
+        if notebook_files:
+            batch = run_notebook_batch(notebook_files)
+            # Keep the results so reruns (including the download click) can show them again
+            st.session_state["batch"] = {**batch, 'upload_ids': batch_upload_ids}
+            render_batch_results(st.session_state["batch"])
+        elif not archive_errors:
+            st.warning("No `.ipynb` files were found in the uploaded archive.")
+
+    elif (len(uploaded_files) > 1 or archive_uploaded) and "batch" in st.session_state \
+            and st.session_state["batch"]['upload_ids'] == batch_upload_ids:
+        render_batch_results(st.session_state["batch"])
+
+    elif uploaded_file is not None and process_button:
+        st.session_state.pop("explanation", None)
+        st.session_state.pop("explanation_search", None)
+        local_summary = None
+        local_summaries, _ = summarize_uploads_locally([uploaded_file])
+        quick_facts = st.empty()
+        if local_summaries[0][1] is not None:
+            local_summary = format_local_summary(local_summaries[0][1])
+            with quick_facts.container():
+                render_local_summary(local_summary)
+        with st.spinner("Analyzing your notebook and generating explanation... This might take a moment."):
+            # Call the main feature function to process the file and get summary/link
+            summary_text, download_link, success, error_message, outline = run_cancellable(
+                save_and_get_summary, uploaded_file, output_format)
+
+        if success:
+            quick_facts.empty() # Shown again at the top of the explanation
+            # Keep the result so paging and searching (which rerun the script) can show it again
+            st.session_state["explanation"] = {
+                'file_id': uploaded_file.file_id,
+                'file_name': uploaded_file.name,
+                'output_format': output_format,
+                'summary_text': summary_text,
+                'outline': outline,
+                'download_link': download_link,
+                'local_summary': local_summary,
+            }
+            render_explanation(st.session_state["explanation"])
+        else:
+            st.error(f"Failed to generate explanation: {error_message}")
+            if "API key" in error_message or "authentication" in error_message: # More robust check for API errors
+                st.warning("Ensure your Google Gemini API key is correctly set in the `.env` file and has sufficient permissions.")
+
+    elif (uploaded_file is not None and "explanation" in st.session_state
+          and st.session_state["explanation"]['file_id'] == uploaded_file.file_id
+          and st.session_state["explanation"]['output_format'] == output_format):
+        render_explanation(st.session_state["explanation"])
+
+    elif not uploaded_files and process_button:
+        st.warning("Please upload a `.ipynb` file first before clicking 'Generate Explanation'.")
+        
+    elif not uploaded_files:
+        st.info("Upload a notebook file on the left sidebar and click 'Generate Explanation' to begin.")
+        # Use the Unsplash image (ensure URL is valid or replace with a local asset)
+        st.image("https://images.unsplash.com/photo-1596495632007-9b43d3b7f141?crop=entropy&cs=tinysrgb&fit=max&fm=jpg&ixid=M3w1NjY1OTR8MHwxfHNlYXJjaHw0OXx8ZGF0YSUyMHNjaWVuY2V8ZW58MHx8fHwxNzE5MTUyNDQ2fDA&ixlib=rb-4.0.3&q=80&w=1080",
+                 caption="Visualize your data science journey with AI explanations",
+                 use_column_width=True)
+
+
+    # --- Footer ---
+    st.markdown("---")
+    st.markdown(
+        """
+        <div style="text-align: center; font-size: small; color: var(--text-medium);">
+            Developed with ❤️ by Your Name/Organization. Powered by Google Gemini and Streamlit.
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,117 @@
+import ast
+import hashlib
+from dataclasses import dataclass, field
+from dataflow import strip_notebook_magics
+from token_utils import estimate_tokens
+
+# --- Typed, immutable pipeline models ---
+
+@dataclass(frozen=True, slots=True)
+class Cell:
+    """
+    A single notebook cell with everything derived from it computed once at creation:
+    content hash, line count, token estimate and (for code cells) the parsed AST.
+    Build instances with Cell.create() rather than the constructor.
+    """
+    type: str
+    content: str
+    output_digest: str
+    content_hash: str
+    line_count: int
+    token_estimate: int
+    tree: ast.Module | None = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def create(cls, cell_type: str, content: str, output_digest: str = "") -> "Cell":
+        """
+        Creates a cell and precomputes its derived fields.
+
+        Args:
+            cell_type (str): 'code' or 'markdown'.
+            content (str): The cell source.
+            output_digest (str): Digest of the recorded outputs (code cells only).
+
+        Returns:
+            Cell: The immutable cell. `tree` is None for markdown and unparseable code.
+        """
+        tree = None
+        if cell_type == 'code':
+            try:
+                tree = ast.parse(strip_notebook_magics(content))
+            except (SyntaxError, ValueError): # ValueError: source contains null bytes
+                tree = None
+        return cls(
+            type=cell_type,
+            content=content,
+            output_digest=output_digest,
+            content_hash=hashlib.sha256(f"{cell_type}\0{content}".encode('utf-8')).hexdigest(),
+            line_count=content.count('\n') + 1 if content else 0,
+            token_estimate=estimate_tokens(content),
+            tree=tree,
+        )
+
+    @classmethod
+    def from_dict(cls, cell: dict) -> "Cell":
+        """Converts a legacy {'type': ..., 'content': ...} cell dictionary."""
+        return cls.create(cell['type'], cell['content'], cell.get('output_digest', ""))
+
+    def markdown_preview(self, max_lines: int = 2) -> str:
+        """Returns the first lines of the cell joined on one line, with '...' if there is more."""
+        first_lines = self.content.split('\n', max_lines)[:max_lines]
+        preview = ' '.join(first_lines).strip()
+        if self.line_count > max_lines:
+            preview += "..." # Indicate more content
+        return preview
+
+def ensure_cells(notebook_cells: list) -> list[Cell]:
+    """
+    Accepts a list of Cell objects or legacy cell dictionaries and returns Cell objects.
+
+    Args:
+        notebook_cells (list): Cells from parse_notebook_content or hand-built dictionaries.
+
+    Returns:
+        list[Cell]: The cells as Cell instances (existing instances are reused as-is).
+    """
+    return [cell if isinstance(cell, Cell) else Cell.from_dict(cell) for cell in notebook_cells]
+
+@dataclass(frozen=True, slots=True)
+class CellExplanation:
+    """
+    The explanation of one cell. `origin` records who produced it:
+    'llm', 'local' (static preview when over budget) or 'markdown' (markdown cell preview).
+    """
+    cell_index: int
+    cell_type: str
+    text: str
+    origin: str
+
+    def to_markdown(self) -> str:
+        """Formats the explanation as one entry of the Cell-by-Cell Summary."""
+        label = "Code" if self.cell_type == 'code' else "Markdown"
+        return f"● **Cell {self.cell_index + 1} ({label}):** {self.text}"
+
+@dataclass(frozen=True, slots=True)
+class NotebookExplanation:
+    """
+    The complete explanation of a notebook: overview, per-cell explanations and
+    processing notes (Markdown strings shown as block quotes under the overview).
+    """
+    overview: str
+    cells: tuple[CellExplanation, ...]
+    notes: tuple[str, ...] = ()
+
+    def cell_summaries_markdown(self) -> str:
+        """Returns the Cell-by-Cell Summary entries, one per line."""
+        return "\n".join(cell.to_markdown() for cell in self.cells)
+
+    def overview_markdown(self) -> str:
+        """Renders the overview section, followed by any notes."""
+        parts = ["## Notebook Overview:\n", self.overview.strip(), "\n\n"]
+        for note in self.notes:
+            parts.append(f"> {note}\n\n")
+        return "".join(parts)
+
+    def to_markdown(self) -> str:
+        """Renders the explanation in the Markdown layout the UI, exports and API use."""
+        return self.overview_markdown() + "## Cell-by-Cell Summary:\n" + self.cell_summaries_markdown()
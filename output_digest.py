@@ -0,0 +1,63 @@
+from token_utils import CHARS_PER_TOKEN
+
+# --- Configuration ---
+STREAM_HEAD_LINES = 5 # Lines kept from the start of a long stream
+STREAM_TAIL_LINES = 3 # Lines kept from the end of a long stream (final metrics usually print last)
+MAX_LINE_CHARS = 160 # Longer individual lines are cut
+TEXT_MIME_TYPES = ('text/plain',) # The only payloads ever read; everything else is listed by MIME type only
+
+def _as_text(value) -> str:
+    """Notebook JSON may store multi-line text either as a string or as a list of lines."""
+    return ''.join(value) if isinstance(value, list) else str(value)
+
+def _head_tail(text: str) -> str:
+    """Keeps the first and last few lines of a long text, marking how much was skipped."""
+    lines = [line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS] + "..."
+             for line in text.rstrip('\n').split('\n')]
+    if len(lines) <= STREAM_HEAD_LINES + STREAM_TAIL_LINES:
+        return '\n'.join(lines)
+    skipped = len(lines) - STREAM_HEAD_LINES - STREAM_TAIL_LINES
+    return '\n'.join(lines[:STREAM_HEAD_LINES] + [f"... ({skipped} more lines) ..."] + lines[-STREAM_TAIL_LINES:])
+
+def _digest_output(output: dict) -> str | None:
+    """Summarizes a single output; returns None for outputs with nothing worth sending."""
+    output_type = output.get('output_type')
+    if output_type == 'stream':
+        text = _as_text(output.get('text', ''))
+        return f"[{output.get('name', 'stdout')}]\n{_head_tail(text)}" if text.strip() else None
+    if output_type == 'error':
+        message = _as_text(output.get('evalue', ''))[:MAX_LINE_CHARS]
+        return f"[error] {output.get('ename', 'Exception')}: {message}"
+    if output_type in ('execute_result', 'display_data'):
+        data = output.get('data', {})
+        # Only look at the keys for non-text payloads: images and other base64 blobs are never read
+        other_types = [mime for mime in data if mime not in TEXT_MIME_TYPES]
+        parts = []
+        if other_types:
+            parts.append(f"[{output_type}: {', '.join(other_types)}]")
+        if 'text/plain' in data:
+            parts.append(_head_tail(_as_text(data['text/plain'])))
+        return '\n'.join(parts) or None
+    return None
+
+def digest_cell_outputs(outputs: list, max_tokens: int) -> str:
+    """
+    Builds a compact, size-capped summary of a code cell's recorded outputs: stream heads and
+    tails, exception names and messages, text/plain results and the MIME types present.
+    Image and other binary payloads are skipped without being decoded.
+
+    Args:
+        outputs (list): The cell's `outputs` list from the notebook.
+        max_tokens (int): Approximate token cap for the whole digest (0 disables digests).
+
+    Returns:
+        str: The digest, or an empty string if the cell has no useful output.
+    """
+    if not outputs or max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    digests = [digest for digest in (_digest_output(output) for output in outputs) if digest]
+    text = '\n'.join(digests)
+    if len(text) > max_chars:
+        text = text[:max_chars].rstrip() + "\n... (output truncated)"
+    return text
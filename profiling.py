@@ -0,0 +1,138 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- Configuration from .env ---
+PROFILING_ENABLED = os.getenv("PROFILING_MODE", "false").lower() == "true" # Profile every explanation
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles") # Where per-run profile reports are written
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "25")) # Functions and allocation sites listed per report
+
+_active = threading.local()
+# tracemalloc and cProfile are process-wide (start/stop, reset_peak), so only one run is profiled
+# at a time; runs that start while it is active, e.g. other API jobs, proceed unprofiled.
+_run_lock = threading.Lock()
+
+def enable_profiling(enabled: bool = True) -> None:
+    """Turns profiling mode on or off at runtime (e.g. from a CLI flag)."""
+    global PROFILING_ENABLED
+    PROFILING_ENABLED = enabled
+
+@contextmanager
+def profile_stage(name: str):
+    """
+    Times one pipeline stage (parse, prompt building, LLM waiting, rendering) and records the
+    peak traced memory while it ran. Does nothing unless a profiled_run is active in this thread.
+
+    Args:
+        name (str): Stage name; repeated stages are accumulated.
+    """
+    run = getattr(_active, 'run', None)
+    if run is None:
+        yield
+        return
+    run['peak_bytes'] = max(run['peak_bytes'], tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start_time
+        peak = tracemalloc.get_traced_memory()[1]
+        stage = run['stages'].setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': 0})
+        stage['calls'] += 1
+        stage['seconds'] += elapsed
+        stage['peak_bytes'] = max(stage['peak_bytes'], peak)
+        run['peak_bytes'] = max(run['peak_bytes'], peak)
+
+@contextmanager
+def profiled_run(label: str):
+    """
+    Profiles everything inside the block with cProfile and tracemalloc and writes a report
+    to PROFILE_DIR. Only active in profiling mode and for one run at a time; nested runs
+    fold into the outer one and concurrent runs are not profiled. cProfile covers the calling
+    thread; time spent waiting on LLM worker threads shows up in the stage timings instead.
+
+    Args:
+        label (str): Name used in the report file names (e.g. the profiled function).
+
+    Yields:
+        dict | None: The run record being filled in, or None when not profiling.
+    """
+    if (not PROFILING_ENABLED or getattr(_active, 'run', None) is not None
+            or not _run_lock.acquire(blocking=False)):
+        yield None
+        return
+    run = {'label': label, 'started_at': datetime.now().isoformat(timespec='seconds'),
+           'seconds': 0.0, 'peak_bytes': 0, 'stages': {}}
+    started_tracing = not tracemalloc.is_tracing()
+    try:
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        _active.run = run
+        start_time = time.perf_counter()
+        profiler.enable()
+    except BaseException:
+        _run_lock.release()
+        raise
+    try:
+        yield run
+    finally:
+        profiler.disable()
+        _active.run = None
+        run['seconds'] = time.perf_counter() - start_time
+        try:
+            run['peak_bytes'] = max(run['peak_bytes'], tracemalloc.get_traced_memory()[1])
+            snapshot = tracemalloc.take_snapshot()
+            _write_report(run, profiler, snapshot)
+        except Exception as e:
+            # A failed report must never fail the explanation it was profiling
+            print(f"Could not write the profile report: {e}")
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            _run_lock.release()
+
+def profiled(label: str):
+    """Decorator form of profiled_run."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiled_run(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _write_report(run: dict, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot) -> None:
+    """Writes <base>.prof (for snakeviz/pstats), <base>.txt (human-readable) and <base>.json."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S}_{run['label']}_{os.getpid()}")
+    profiler.dump_stats(base + ".prof")
+
+    allocations = [{'site': str(stat.traceback), 'bytes': stat.size, 'blocks': stat.count}
+                   for stat in snapshot.statistics('lineno')[:PROFILE_TOP_N]]
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump({**run, 'top_allocations': allocations}, f, indent=2)
+
+    functions = io.StringIO()
+    pstats.Stats(profiler, stream=functions).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+    lines = [f"Profile of {run['label']} started {run['started_at']}: "
+             f"{run['seconds']:.3f}s, peak traced memory {run['peak_bytes'] / 1024 ** 2:.1f} MiB", "",
+             f"{'Stage':<20} {'Calls':>6} {'Seconds':>10} {'Peak MiB':>10}"]
+    for name, stage in run['stages'].items():
+        lines.append(f"{name:<20} {stage['calls']:>6} {stage['seconds']:>10.3f} {stage['peak_bytes'] / 1024 ** 2:>10.1f}")
+    lines += ["", "Top allocation sites:"]
+    lines += [f"  {allocation['bytes'] / 1024:10.1f} KiB  {allocation['site']}" for allocation in allocations]
+    lines += ["", "Top functions by cumulative time:", functions.getvalue()]
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    print(f"Profile report written to {base}.txt")
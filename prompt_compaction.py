@@ -0,0 +1,191 @@
+import ast
+import inspect
+import io
+import re
+import tokenize
+from dataflow import strip_notebook_magics
+from token_utils import estimate_tokens
+
+# --- Configuration ---
+LITERAL_CHAR_THRESHOLD = 200 # Literals longer than this (in source characters) are summarized
+BANNER_COMMENT_PATTERN = re.compile(r'^\s*#[\s\W_]*$') # Comment lines with no words, e.g. "# ======"
+_SOURCE_LINE_PATTERN = re.compile(r'[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+$')
+
+_TYPE_PLURALS = {'int': 'ints', 'float': 'floats', 'str': 'strings', 'bool': 'bools',
+                 'bytes': 'byte strings', 'NoneType': 'Nones', 'list': 'lists',
+                 'tuple': 'tuples', 'dict': 'dicts', 'set': 'sets', 'complex': 'complex numbers'}
+
+# --- Prompt Compaction ---
+
+def compact_template(template: str) -> str:
+    """
+    Removes the source-code indentation a triple-quoted template picks up from its
+    surrounding function, along with leading/trailing blank lines.
+
+    Templates should be compacted once (at import time) and filled with `.format()`
+    afterwards, so interpolated code keeps its own indentation.
+
+    Args:
+        template (str): The raw triple-quoted template text.
+
+    Returns:
+        str: The dedented template.
+    """
+    return inspect.cleandoc(template)
+
+def _element_type(node: ast.expr) -> str:
+    """Type name of a literal element; signed numbers like -1.5 (a UnaryOp) count as their operand's type."""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        node = node.operand
+    if isinstance(node, ast.Constant):
+        return type(node.value).__name__
+    return type(node).__name__.lower()
+
+def _describe_literal(node: ast.expr, source_segment: str) -> str:
+    """Builds a short placeholder such as 'list of 10,000 floats' for a literal node."""
+    if isinstance(node, ast.Constant):
+        kind = type(node.value).__name__
+        return f"{kind} of {len(source_segment):,} chars"
+    if isinstance(node, ast.Dict):
+        return f"dict with {len(node.keys):,} entries"
+
+    kind = type(node).__name__.lower() # List, Tuple, Set
+    elements = node.elts
+    element_types = {_element_type(elt) for elt in elements}
+    if len(element_types) == 1:
+        element_type = element_types.pop()
+        noun = _TYPE_PLURALS.get(element_type, f"{element_type} values") if len(elements) != 1 else element_type
+    else:
+        noun = "mixed values"
+    return f"{kind} of {len(elements):,} {noun}"
+
+def _is_pure_literal(node: ast.expr) -> bool:
+    """True if the node can be evaluated with ast.literal_eval (no names or calls)."""
+    try:
+        ast.literal_eval(node)
+        return True
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return False
+
+def summarize_large_literals(source: str, threshold: int = LITERAL_CHAR_THRESHOLD,
+                             tree: ast.Module | None = None) -> str:
+    """
+    Replaces oversized inline literals (embedded lists, dict data, base64 strings, ...)
+    with short placeholders like `<list of 10,000 floats>`.
+
+    Args:
+        source (str): Python source of a code cell.
+        threshold (int): Minimum source length of a literal before it is summarized.
+        tree (ast.Module | None): The already parsed cell (e.g. Cell.tree), to skip re-parsing.
+
+    Returns:
+        str: The source with large literals replaced. Returned unchanged if it cannot be parsed.
+    """
+    if len(source) <= threshold:
+        return source
+    if tree is None:
+        try:
+            tree = ast.parse(strip_notebook_magics(source)) # Magic lines are blanked, so offsets still match
+        except SyntaxError:
+            return source # Invalid code; leave as-is rather than guess
+
+    lines = _SOURCE_LINE_PATTERN.findall(source) # Same line breaks the tokenizer recognizes
+    line_offsets = [0]
+    for line in lines:
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    def span(node):
+        # ast columns are UTF-8 byte offsets; convert them to str offsets
+        start_line = lines[node.lineno - 1].encode('utf-8')
+        end_line = lines[node.end_lineno - 1].encode('utf-8')
+        start = line_offsets[node.lineno - 1] + len(start_line[:node.col_offset].decode('utf-8'))
+        end = line_offsets[node.end_lineno - 1] + len(end_line[:node.end_col_offset].decode('utf-8'))
+        return start, end
+
+    replacements = []
+    pending = [tree]
+    while pending: # Walk top-down so only the outermost large literal is replaced
+        node = pending.pop()
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set, ast.Dict, ast.Constant)) and hasattr(node, 'lineno'):
+            start, end = span(node)
+            if end - start > threshold and _is_pure_literal(node):
+                segment = source[start:end]
+                replacements.append((start, end, f"<{_describe_literal(node, segment)}>"))
+                continue
+        pending.extend(ast.iter_child_nodes(node))
+
+    for start, end, placeholder in sorted(replacements, reverse=True):
+        source = source[:start] + placeholder + source[end:]
+    return source
+
+_LAYOUT_TOKENS = {tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER}
+
+def strip_code_noise(source: str) -> str:
+    """
+    Drops blank lines, trailing whitespace and decorative comment banners from a code cell.
+    Regular comments are kept since they often explain intent. Lines inside multi-line
+    strings are code, not noise, and are left untouched.
+
+    Args:
+        source (str): Python source of a code cell.
+
+    Returns:
+        str: The cleaned source, or the source unchanged if it cannot be tokenized.
+    """
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return source # Cannot tell string contents from code; leave as-is rather than guess
+    kept_lines, string_lines = set(), set()
+    for token in tokens:
+        if token.type in _LAYOUT_TOKENS:
+            continue
+        if token.type == tokenize.COMMENT and BANNER_COMMENT_PATTERN.match(token.string):
+            continue
+        kept_lines.update(range(token.start[0], token.end[0] + 1))
+        string_lines.update(range(token.start[0], token.end[0])) # Lines that end inside a multi-line token
+    lines = []
+    for number, line in enumerate(source.split('\n'), start=1):
+        if number in kept_lines:
+            lines.append(line if number in string_lines else line.rstrip())
+    return '\n'.join(lines)
+
+def compact_code(source: str, tree: ast.Module | None = None) -> str:
+    """
+    Applies every code compaction step: literal summarization, then noise stripping.
+
+    Args:
+        source (str): Python source of a code cell.
+        tree (ast.Module | None): The already parsed cell (e.g. Cell.tree), to skip re-parsing.
+
+    Returns:
+        str: Compacted source suitable for embedding in a prompt.
+    """
+    return strip_code_noise(summarize_large_literals(source, tree=tree))
+
+def record_compaction(stats: dict, original: str, compacted: str) -> None:
+    """
+    Adds the token counts of one compacted prompt section to a running per-notebook tally.
+
+    Args:
+        stats (dict): Tally with 'original_tokens' and 'compacted_tokens' keys (created if missing).
+        original (str): The text before compaction.
+        compacted (str): The text after compaction.
+    """
+    stats['original_tokens'] = stats.get('original_tokens', 0) + estimate_tokens(original)
+    stats['compacted_tokens'] = stats.get('compacted_tokens', 0) + estimate_tokens(compacted)
+
+def compaction_report(stats: dict) -> str:
+    """
+    Formats the per-notebook compaction tally as a one-line report.
+
+    Args:
+        stats (dict): Tally filled by record_compaction.
+
+    Returns:
+        str: e.g. "Prompt compaction saved ~1,234 tokens (38.2%)."
+    """
+    original = stats.get('original_tokens', 0)
+    saved = original - stats.get('compacted_tokens', 0)
+    percent = (saved / original * 100) if original else 0.0
+    return f"Prompt compaction saved ~{saved:,} tokens ({percent:.1f}%)."
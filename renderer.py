@@ -0,0 +1,248 @@
+import html
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterator, TextIO
+
+import markdown # Will need to 'pip install markdown' for HTML conversion
+
+try:
+    import mistune # Optional, much faster backend: 'pip install mistune'
+except ImportError:
+    mistune = None
+
+# --- Configuration from .env ---
+RENDER_BACKEND = os.getenv("RENDER_BACKEND", "auto") # 'auto', 'mistune' or 'python-markdown'
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "8192")) # Rendered fragments kept in memory
+RENDER_BATCH_FRAGMENTS = int(os.getenv("RENDER_BATCH_FRAGMENTS", "256")) # Uncached fragments rendered per backend call
+
+# --- Precompiled document template ---
+# Split once at import time; rendering only concatenates the head, fragments and tail.
+_DOCUMENT_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Notebook Explanation - {title}</title>
+    <style>
+        body { font-family: 'Inter', sans-serif; line-height: 1.6; margin: 20px; color: #333; }
+        h1, h2, h3 { font-family: 'Inter', sans-serif; color: #2E86C1; }
+        h2 { border-bottom: 1px solid #eee; padding-bottom: 5px; margin-top: 30px; }
+        pre { background-color: #f4f4f4; padding: 10px; border-radius: 5px; overflow-x: auto; }
+        code { background-color: #f9f9f9; padding: 2px 4px; border-radius: 3px; font-family: monospace; }
+        ul { list-style-type: none; padding-left: 0; }
+        ul li:before { content: "• "; color: #2E86C1; font-weight: bold; display: inline-block; width: 1em; margin-left: -1em; }
+    </style>
+</head>
+<body>
+"""
+_DOCUMENT_TITLE_SLOT = _DOCUMENT_HEAD.index("{title}")
+_DOCUMENT_HEAD_BEFORE_TITLE = _DOCUMENT_HEAD[:_DOCUMENT_TITLE_SLOT]
+_DOCUMENT_HEAD_AFTER_TITLE = _DOCUMENT_HEAD[_DOCUMENT_TITLE_SLOT + len("{title}"):]
+_DOCUMENT_TAIL = """</body>
+</html>
+"""
+
+# A new fragment starts at every section heading and every cell entry of the summary
+_FRAGMENT_START = ('## ', '● **Cell ')
+_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+
+# --- Markdown backends ---
+_python_markdown_local = threading.local()
+
+def _render_python_markdown(text: str) -> str:
+    # Building a Markdown instance loads every extension; reuse one per thread and reset() it instead
+    converter = getattr(_python_markdown_local, 'converter', None)
+    if converter is None:
+        converter = markdown.Markdown(extensions=['fenced_code', 'tables', 'nl2br'])
+        _python_markdown_local.converter = converter
+    return converter.reset().convert(text)
+
+_mistune_renderer = None
+if mistune is not None:
+    # hard_wrap matches Python-Markdown's nl2br; fenced code is built in
+    _mistune_renderer = mistune.create_markdown(escape=False, hard_wrap=True, plugins=['table'])
+
+def _render_mistune(text: str) -> str:
+    return _mistune_renderer(text)
+
+MARKDOWN_BACKENDS = {'python-markdown': _render_python_markdown}
+if _mistune_renderer is not None:
+    MARKDOWN_BACKENDS['mistune'] = _render_mistune
+
+def resolve_backend(backend: str | None = None) -> str:
+    """
+    Picks the Markdown backend to use.
+
+    Args:
+        backend (str | None): 'auto', 'mistune', 'python-markdown' or None (use RENDER_BACKEND).
+
+    Returns:
+        str: The name of an available backend. 'auto' prefers mistune when it is installed.
+    """
+    backend = backend or RENDER_BACKEND
+    if backend == 'auto':
+        return 'mistune' if 'mistune' in MARKDOWN_BACKENDS else 'python-markdown'
+    if backend not in MARKDOWN_BACKENDS:
+        print(f"Markdown backend '{backend}' is not available, falling back to python-markdown.")
+        return 'python-markdown'
+    return backend
+
+# --- Fragment rendering ---
+# Rendered fragments keyed by (fragment, backend), least recently used first
+_fragment_cache = OrderedDict()
+_fragment_cache_lock = threading.Lock()
+
+# Cache misses are rendered in one backend call, joined by thematic breaks (the cheapest block
+# for both backends: no inline processing) and split again at the <hr> tags. Fragments that
+# could render an <hr> of their own are rendered separately.
+_BATCH_SEPARATOR = "\n\n***\n\n"
+_RENDERED_BREAK = re.compile(r'<hr\s*/?>')
+_MAY_RENDER_BREAK = re.compile(r'^ {0,3}([-*_])[ \t]*(?:\1[ \t]*){2,}$|<hr', re.MULTILINE | re.IGNORECASE)
+
+def _cache_fragment(key: tuple[str, str], rendered: str) -> None:
+    with _fragment_cache_lock:
+        _fragment_cache[key] = rendered
+        _fragment_cache.move_to_end(key)
+        while len(_fragment_cache) > FRAGMENT_CACHE_SIZE:
+            _fragment_cache.popitem(last=False)
+
+def clear_fragment_cache() -> None:
+    """Forgets every rendered fragment (e.g. to benchmark a cold render)."""
+    with _fragment_cache_lock:
+        _fragment_cache.clear()
+
+def render_fragment(fragment: str, backend: str) -> str:
+    """
+    Renders one Markdown fragment (a section heading block or a single cell entry) to HTML.
+    Results are cached, so unchanged cells are not re-rendered across reports or reruns.
+
+    Args:
+        fragment (str): The Markdown source of the fragment.
+        backend (str): A key of MARKDOWN_BACKENDS.
+
+    Returns:
+        str: The rendered HTML.
+    """
+    return render_fragments([fragment], backend)[0]
+
+def render_fragments(fragments: list[str], backend: str) -> list[str]:
+    """
+    Renders several fragments, taking cached ones from the fragment cache and rendering all
+    the others in a single backend call, so a cold render costs about as much as converting
+    the whole document at once while re-renders only pay for fragments that changed.
+
+    Args:
+        fragments (list[str]): Markdown fragments, e.g. from split_fragments.
+        backend (str): A key of MARKDOWN_BACKENDS.
+
+    Returns:
+        list[str]: The rendered HTML of each fragment, in order.
+    """
+    rendered = [None] * len(fragments)
+    missing = []
+    with _fragment_cache_lock:
+        for index, fragment in enumerate(fragments):
+            cached = _fragment_cache.get((fragment, backend))
+            if cached is None:
+                missing.append(index)
+            else:
+                _fragment_cache.move_to_end((fragment, backend))
+                rendered[index] = cached
+    if not missing:
+        return rendered
+
+    convert = MARKDOWN_BACKENDS[backend]
+    batched = [index for index in missing if not _MAY_RENDER_BREAK.search(fragments[index])]
+    parts = {}
+    if len(batched) > 1:
+        joined = _BATCH_SEPARATOR.join(fragments[index].rstrip("\n") for index in batched)
+        batch_parts = _RENDERED_BREAK.split(convert(joined))
+        if len(batch_parts) == len(batched):
+            parts = {index: part.strip("\n") for index, part in zip(batched, batch_parts)}
+    for index in missing:
+        if index not in parts: # Not batchable, or the batch did not split cleanly
+            parts[index] = convert(fragments[index])
+        rendered[index] = parts[index]
+        _cache_fragment((fragments[index], backend), parts[index])
+    return rendered
+
+def split_fragments(summary_text: str) -> list[str]:
+    """
+    Splits a generated summary into independently renderable fragments:
+    one per section heading block and one per "● **Cell N ...**" entry.
+    Lines inside fenced code blocks (``` or ~~~) never start a fragment, so a
+    fence is always kept whole even if an LLM answer contains "## " in code.
+
+    Args:
+        summary_text (str): The summary produced by generate_notebook_summary.
+
+    Returns:
+        list[str]: Non-empty fragments in document order.
+    """
+    fragments, current = [], []
+    fence = None # The opening fence marker while inside a fenced block
+    for line in summary_text.splitlines(keepends=True):
+        match = _FENCE.match(line)
+        if fence is None:
+            if match:
+                fence = match.group(1)
+            elif line.startswith(_FRAGMENT_START) and current:
+                fragments.append("".join(current))
+                current = []
+        elif match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence) \
+                and not line[match.end():].strip():
+            fence = None
+        current.append(line)
+    fragments.append("".join(current))
+    return [fragment for fragment in fragments if fragment.strip()]
+
+def iter_html_document(summary_text: str, title: str, backend: str | None = None) -> Iterator[str]:
+    """
+    Streams a standalone, styled HTML document for a summary, fragment by fragment,
+    so callers can write it out without holding the whole document in memory.
+
+    Args:
+        summary_text (str): The generated summary in Markdown format.
+        title (str): Name shown in the document title (usually the notebook name).
+        backend (str | None): Markdown backend override (see resolve_backend).
+
+    Yields:
+        str: Consecutive chunks of the HTML document.
+    """
+    backend = resolve_backend(backend)
+    yield _DOCUMENT_HEAD_BEFORE_TITLE + html.escape(title) + _DOCUMENT_HEAD_AFTER_TITLE
+    fragments = split_fragments(summary_text)
+    batch_size = max(RENDER_BATCH_FRAGMENTS, 1)
+    for start in range(0, len(fragments), batch_size):
+        for rendered in render_fragments(fragments[start:start + batch_size], backend):
+            yield rendered + "\n"
+    yield _DOCUMENT_TAIL
+
+def write_html_document(summary_text: str, title: str, output: TextIO, backend: str | None = None) -> None:
+    """
+    Writes the HTML document for a summary to an open text stream, chunk by chunk.
+
+    Args:
+        summary_text (str): The generated summary in Markdown format.
+        title (str): Name shown in the document title.
+        output (TextIO): Destination file or stream.
+        backend (str | None): Markdown backend override (see resolve_backend).
+    """
+    for chunk in iter_html_document(summary_text, title, backend):
+        output.write(chunk)
+
+def render_html_document(summary_text: str, title: str, backend: str | None = None) -> str:
+    """
+    Converts a Markdown summary into a standalone, styled HTML document.
+
+    Args:
+        summary_text (str): The generated summary in Markdown format.
+        title (str): Name shown in the document title (usually the notebook name).
+        backend (str | None): Markdown backend override (see resolve_backend).
+
+    Returns:
+        str: The complete HTML document.
+    """
+    return "".join(iter_html_document(summary_text, title, backend))
@@ -0,0 +1,264 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+try:
+    import redis # Optional shared cache tier: 'pip install redis'
+except ImportError:
+    redis = None
+
+# --- Configuration from .env ---
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048")) # Max cached LLM responses per process (0 = off)
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "") # Redis-compatible server shared by all replicas, e.g. redis://cache:6379/0 (empty = off)
+SHARED_CACHE_TTL_S = int(os.getenv("SHARED_CACHE_TTL_S", "604800")) # Expiry of shared entries (default 7 days)
+SHARED_CACHE_TIMEOUT_S = float(os.getenv("SHARED_CACHE_TIMEOUT_S", "0.5")) # Socket timeout; a slow cache must not slow down explanations
+SHARED_CACHE_MISS_TTL_S = float(os.getenv("SHARED_CACHE_MISS_TTL_S", "60")) # Prefetched misses are trusted this long
+SHARED_CACHE_BREAKER_FAILURES = int(os.getenv("SHARED_CACHE_BREAKER_FAILURES", "3")) # Consecutive failures that open the breaker
+SHARED_CACHE_BREAKER_BACKOFF_S = float(os.getenv("SHARED_CACHE_BREAKER_BACKOFF_S", "5")) # First pause; doubles while the cache stays down
+SHARED_CACHE_BREAKER_MAX_BACKOFF_S = float(os.getenv("SHARED_CACHE_BREAKER_MAX_BACKOFF_S", "300"))
+SHARED_CACHE_PREFIX = "nbexplainer:response:"
+
+# --- In-process LRU cache of LLM responses ---
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# --- Shared (remote) cache tier ---
+# Any client with redis-py's mget(keys) and set(name, value, ex=seconds) methods works here.
+_shared_cache = None
+
+def _connect_shared_cache():
+    if not SHARED_CACHE_URL:
+        return None
+    if redis is None:
+        print("SHARED_CACHE_URL is set but the 'redis' package is not installed; using the local cache only.")
+        return None
+    return redis.Redis.from_url(SHARED_CACHE_URL, decode_responses=True,
+                                socket_timeout=SHARED_CACHE_TIMEOUT_S,
+                                socket_connect_timeout=SHARED_CACHE_TIMEOUT_S)
+
+_shared_cache = _connect_shared_cache()
+
+# Keys the last prefetch found missing from the shared tier, with their expiry. Lookups for them
+# skip the remote round trip, so a cold notebook costs one MGET instead of one GET per prompt.
+_recent_misses = OrderedDict()
+
+# Circuit breaker: after SHARED_CACHE_BREAKER_FAILURES consecutive failures (errors or timeouts),
+# the shared tier is skipped for an exponentially growing backoff, so a hung server cannot stall
+# every cell on its socket timeout. The first call after the backoff probes the server again.
+_breaker_lock = threading.Lock()
+_breaker = {'failures': 0, 'open_until': 0.0, 'backoff_s': SHARED_CACHE_BREAKER_BACKOFF_S}
+
+def set_shared_cache(client) -> None:
+    """
+    Replaces the shared cache tier, e.g. with a client for a different server.
+
+    Args:
+        client: A redis-py compatible client (mget / set with `ex`), or None to use the local cache only.
+    """
+    global _shared_cache
+    _shared_cache = client
+    with _breaker_lock:
+        _breaker.update(failures=0, open_until=0.0, backoff_s=SHARED_CACHE_BREAKER_BACKOFF_S)
+    with _cache_lock:
+        _recent_misses.clear()
+
+def _shared_client():
+    """Returns the shared cache client, or None if none is configured or the breaker is open."""
+    client = _shared_cache
+    if client is None:
+        return None
+    with _breaker_lock:
+        if time.monotonic() < _breaker['open_until']:
+            return None
+    return client
+
+def _record_shared_success() -> None:
+    with _breaker_lock:
+        _breaker.update(failures=0, backoff_s=SHARED_CACHE_BREAKER_BACKOFF_S)
+
+def _record_shared_failure(action: str, error: Exception) -> None:
+    with _breaker_lock:
+        _breaker['failures'] += 1
+        if _breaker['failures'] < SHARED_CACHE_BREAKER_FAILURES:
+            print(f"Shared cache {action} failed: {error}")
+            return
+        backoff = _breaker['backoff_s']
+        _breaker['open_until'] = time.monotonic() + backoff
+        _breaker['backoff_s'] = min(backoff * 2, SHARED_CACHE_BREAKER_MAX_BACKOFF_S)
+    print(f"Shared cache {action} failed: {error}; skipping the shared cache for {backoff:.0f}s.")
+
+def _remember(key: str, response: str) -> None:
+    # Caller must hold _cache_lock
+    _cache[key] = response
+    _cache.move_to_end(key)
+    while len(_cache) > RESPONSE_CACHE_SIZE:
+        _cache.popitem(last=False)
+    _recent_misses.pop(key, None)
+
+def _remember_misses(keys: list[str]) -> None:
+    # Caller must hold _cache_lock
+    expires_at = time.monotonic() + SHARED_CACHE_MISS_TTL_S
+    for key in keys:
+        _recent_misses[key] = expires_at
+        _recent_misses.move_to_end(key)
+    while len(_recent_misses) > max(RESPONSE_CACHE_SIZE, len(keys)):
+        _recent_misses.popitem(last=False)
+
+def _is_recent_miss(key: str) -> bool:
+    # Caller must hold _cache_lock
+    expires_at = _recent_misses.get(key)
+    if expires_at is None:
+        return False
+    if time.monotonic() >= expires_at:
+        del _recent_misses[key]
+        return False
+    return True
+
+def _shared_mget(keys: list[str]) -> list[str | None] | None:
+    """Looks keys up in the shared tier; None if it is not configured, unavailable or failed."""
+    client = _shared_client()
+    if client is None or not keys:
+        return None
+    try:
+        responses = client.mget([SHARED_CACHE_PREFIX + key for key in keys])
+    except Exception as e:
+        # The shared tier is an optimization: on any failure, fall back to calling the LLM
+        _record_shared_failure("lookup", e)
+        return None
+    _record_shared_success()
+    return responses
+
+def response_cache_key(model_name: str, prompt: str) -> str:
+    """
+    Builds the cache key for a prompt sent to a given model.
+
+    Args:
+        model_name (str): The Gemini model the prompt is sent to.
+        prompt (str): The full prompt text.
+
+    Returns:
+        str: A hex SHA-256 digest identifying the request.
+    """
+    return hashlib.sha256(f"{model_name}\0{prompt}".encode('utf-8')).hexdigest()
+
+def get_cached_response(key: str) -> str | None:
+    """
+    Looks up a previously successful LLM response, first in this process and then
+    in the shared cache tier (if configured). Keys that prefetch_cached_responses just
+    found missing from the shared tier are not looked up there again.
+
+    Args:
+        key (str): Key from response_cache_key.
+
+    Returns:
+        str | None: The cached response text, or None on a miss.
+    """
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+        if _is_recent_miss(key):
+            return None
+    responses = _shared_mget([key])
+    response = responses[0] if responses else None
+    if response is not None and RESPONSE_CACHE_SIZE > 0:
+        with _cache_lock:
+            _remember(key, response)
+    return response
+
+def prefetch_cached_responses(keys: list[str]) -> set[str]:
+    """
+    Loads every key missing from the local cache from the shared tier in a single
+    round trip (MGET), so the per-prompt lookups that follow are local hits, and
+    remembers the keys the shared tier does not have so they are not asked for again.
+
+    Args:
+        keys (list[str]): Keys from response_cache_key, typically every cell prompt of one notebook.
+
+    Returns:
+        set[str]: The keys that are now cached locally.
+    """
+    with _cache_lock:
+        missing = [key for key in dict.fromkeys(keys) if key not in _cache]
+    responses = _shared_mget(missing)
+    if responses is not None:
+        found = {key: response for key, response in zip(missing, responses) if response is not None}
+        with _cache_lock:
+            if RESPONSE_CACHE_SIZE > 0:
+                for key, response in found.items():
+                    _remember(key, response)
+            _remember_misses([key for key in missing if key not in found])
+    with _cache_lock:
+        return {key for key in keys if key in _cache}
+
+def store_response(key: str, response: str) -> None:
+    """
+    Caches a successful LLM response, evicting the least recently used entry when full,
+    and publishes it to the shared tier with SHARED_CACHE_TTL_S so other replicas reuse it.
+    Error responses must not be stored.
+
+    Args:
+        key (str): Key from response_cache_key.
+        response (str): The response text.
+    """
+    with _cache_lock:
+        if RESPONSE_CACHE_SIZE > 0:
+            _remember(key, response)
+        else:
+            _recent_misses.pop(key, None)
+    client = _shared_client()
+    if client is not None:
+        try:
+            client.set(SHARED_CACHE_PREFIX + key, response, ex=SHARED_CACHE_TTL_S)
+        except Exception as e:
+            _record_shared_failure("store", e)
+        else:
+            _record_shared_success()
+
+# --- In-flight requests ---
+# Prompts currently being sent to the LLM, so a second caller asking for the same prompt
+# (e.g. the real run catching up with a speculative one) waits for that answer instead of
+# sending a duplicate request.
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+def begin_request(key: str) -> tuple[bool, Future]:
+    """
+    Registers an LLM request that is about to be sent, or joins the identical one already in flight.
+
+    Args:
+        key (str): Key from response_cache_key.
+
+    Returns:
+        tuple[bool, Future]: (True, future) if the caller now owns the request and must call
+                             finish_request; otherwise (False, future) resolving to the owner's
+                             response, or to None if the owner produced no cacheable answer.
+    """
+    with _in_flight_lock:
+        pending = _in_flight.get(key)
+        if pending is not None:
+            return False, pending
+        with _cache_lock:
+            cached = _cache.get(key)
+        pending = Future()
+        if cached is not None: # Answered while the caller was checking the cache
+            pending.set_result(cached)
+            return False, pending
+        _in_flight[key] = pending
+        return True, pending
+
+def finish_request(key: str, response: str | None) -> None:
+    """
+    Completes a request registered with begin_request and hands its response to any waiters.
+
+    Args:
+        key (str): Key from response_cache_key.
+        response (str | None): The stored response, or None if the request failed or was cancelled.
+    """
+    with _in_flight_lock:
+        pending = _in_flight.pop(key, None)
+    if pending is not None:
+        pending.set_result(response)
@@ -0,0 +1,129 @@
+import ast
+import threading
+from dataflow import strip_notebook_magics
+
+# --- Scoring weights ---
+LINE_WEIGHT = 1 # Per non-blank line
+NESTING_WEIGHT = 4 # Per level of the deepest nested block (loops, ifs, defs, try, with)
+CALL_WEIGHT = 2 # Per distinct function/method called
+
+_NESTING_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try,
+                  ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Match)
+
+# --- Complexity scoring ---
+
+def _call_name(func: ast.expr) -> str | None:
+    """Returns the dotted name of a call target, e.g. 'pd.read_csv' or 'model.fit'."""
+    parts = []
+    while isinstance(func, ast.Attribute):
+        parts.append(func.attr)
+        func = func.value
+    if isinstance(func, ast.Name):
+        parts.append(func.id)
+        return '.'.join(reversed(parts))
+    return None
+
+def _max_nesting(node: ast.AST, depth: int = 0) -> int:
+    deepest = depth
+    for child in ast.iter_child_nodes(node):
+        child_depth = depth + 1 if isinstance(child, _NESTING_NODES) else depth
+        deepest = max(deepest, _max_nesting(child, child_depth))
+    return deepest
+
+def score_cell(source: str, tree: ast.Module | None = None) -> dict:
+    """
+    Scores a code cell from its AST for model routing.
+
+    Args:
+        source (str): Python source of a code cell.
+        tree (ast.Module | None): The already parsed cell (e.g. Cell.tree), to skip re-parsing.
+
+    Returns:
+        dict: 'lines' (non-blank), 'nesting' (deepest block level), 'distinct_calls'
+              and the weighted 'score'. Unparseable cells are scored on line count only.
+    """
+    lines = sum(1 for line in source.split('\n') if line.strip())
+    nesting, calls = 0, set()
+    try:
+        tree = tree or ast.parse(strip_notebook_magics(source))
+        nesting = _max_nesting(tree)
+        calls = {name for node in ast.walk(tree) if isinstance(node, ast.Call)
+                 for name in [_call_name(node.func)] if name}
+    except (SyntaxError, RecursionError):
+        pass
+    score = LINE_WEIGHT * lines + NESTING_WEIGHT * nesting + CALL_WEIGHT * len(calls)
+    return {'lines': lines, 'nesting': nesting, 'distinct_calls': len(calls), 'score': score}
+
+def choose_tier(cells: list, threshold: int) -> str:
+    """
+    Picks the model tier for a prompt covering one or more cells.
+    The most complex cell decides, so a batch with one hard cell goes to the strong tier.
+
+    Args:
+        cells (list[Cell]): The code cells in the prompt.
+        threshold (int): Scores at or above this go to the strong tier.
+
+    Returns:
+        str: 'fast' or 'strong'.
+    """
+    top_score = max((score_cell(cell.content, cell.tree)['score'] for cell in cells), default=0)
+    return 'strong' if top_score >= threshold else 'fast'
+
+# --- Cascade quality check ---
+
+def passes_quality_check(explanation: str, min_chars: int = 40) -> bool:
+    """
+    Cheap check that a fast-tier answer is usable; failing answers are escalated to the strong tier.
+
+    Args:
+        explanation (str): The LLM's answer.
+        min_chars (int): Shortest answer that counts as a real explanation.
+
+    Returns:
+        bool: False for errors, empty/too-short answers or refusals.
+    """
+    text = explanation.strip()
+    if len(text) < min_chars:
+        return False
+    lowered = text[:200].lower()
+    failure_markers = ("an error occurred", "error: unexpected gemini response",
+                       "i cannot", "i can't", "i'm unable", "i am unable")
+    return not lowered.startswith(failure_markers)
+
+# --- Per-tier metrics ---
+_tier_metrics = {}
+_tier_metrics_lock = threading.Lock()
+
+def record_tier_call(tier: str, latency_s: float, escalated: bool = False) -> None:
+    """
+    Records one LLM call for a tier, for tuning the routing threshold.
+
+    Args:
+        tier (str): 'fast' or 'strong'.
+        latency_s (float): Wall-clock time of the call.
+        escalated (bool): True if this strong-tier call was a cascade escalation.
+    """
+    with _tier_metrics_lock:
+        metrics = _tier_metrics.setdefault(tier, {'count': 0, 'total_latency_s': 0.0,
+                                                  'max_latency_s': 0.0, 'escalations': 0})
+        metrics['count'] += 1
+        metrics['total_latency_s'] += latency_s
+        metrics['max_latency_s'] = max(metrics['max_latency_s'], latency_s)
+        if escalated:
+            metrics['escalations'] += 1
+
+def routing_snapshot() -> dict:
+    """
+    Returns per-tier call counts and latencies since process start.
+
+    Returns:
+        dict: {tier: {'count', 'mean_latency_s', 'max_latency_s', 'escalations'}}
+    """
+    with _tier_metrics_lock:
+        return {
+            tier: {'count': m['count'],
+                   'mean_latency_s': m['total_latency_s'] / m['count'] if m['count'] else 0.0,
+                   'max_latency_s': m['max_latency_s'],
+                   'escalations': m['escalations']}
+            for tier, m in _tier_metrics.items()
+        }
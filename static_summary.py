@@ -0,0 +1,237 @@
+import ast
+import os
+import threading
+from collections import Counter
+from models import Cell, ensure_cells
+
+# --- Configuration from .env ---
+STATIC_FACTS_CACHE_SIZE = int(os.getenv("STATIC_FACTS_CACHE_SIZE", "50000")) # Analyzed code cells remembered by content hash
+
+# --- Workflow stage detection ---
+# Stages are listed in their usual workflow order; a call matches a stage by its function/method name.
+WORKFLOW_STAGES = ('load', 'preprocess', 'train', 'evaluate', 'plot')
+_STAGE_CALLS = {
+    'load': {'open', 'loadtxt', 'genfromtxt', 'load', 'load_dataset', 'load_workbook', 'imread'},
+    'preprocess': {'fillna', 'dropna', 'drop_duplicates', 'get_dummies', 'fit_transform', 'transform',
+                   'train_test_split', 'StandardScaler', 'MinMaxScaler', 'RobustScaler', 'OneHotEncoder',
+                   'LabelEncoder', 'OrdinalEncoder', 'SimpleImputer', 'ColumnTransformer', 'astype',
+                   'replace', 'merge', 'pivot_table', 'melt', 'normalize', 'Tokenizer', 'pad_sequences'},
+    'train': {'fit', 'partial_fit', 'fit_generator', 'train', 'compile', 'GridSearchCV', 'RandomizedSearchCV'},
+    'evaluate': {'predict', 'predict_proba', 'score', 'evaluate', 'accuracy_score', 'precision_score',
+                 'recall_score', 'f1_score', 'roc_auc_score', 'mean_squared_error', 'mean_absolute_error',
+                 'r2_score', 'confusion_matrix', 'classification_report', 'cross_val_score'},
+    'plot': {'plot', 'show', 'hist', 'scatter', 'bar', 'barh', 'boxplot', 'heatmap', 'imshow', 'figure',
+             'subplots', 'savefig', 'pairplot', 'countplot', 'histplot', 'lineplot', 'scatterplot', 'barplot'},
+}
+_STAGE_PREFIXES = {'load': ('read_', 'load_', 'fetch_')}
+_OPEN_MODE_CHARS = set('rwxabtU+')
+_PLOTTING_MODULES = {'plt', 'sns', 'px', 'go', 'matplotlib', 'seaborn', 'plotly'}
+
+def _call_names(node: ast.Call) -> tuple[str | None, str | None]:
+    """Returns (called name, root object name), e.g. ('read_csv', 'pd') for pd.read_csv(...)."""
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id, None
+    if isinstance(func, ast.Attribute):
+        root = func.value
+        while isinstance(root, ast.Attribute):
+            root = root.value
+        return func.attr, root.id if isinstance(root, ast.Name) else None
+    return None, None
+
+def _literal_str(node: ast.expr | None) -> str | None:
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+def _open_arguments(node: ast.Call) -> tuple[str | None, str]:
+    """
+    Returns (literal path, mode) of an open() call. Handles open(path, mode), io/gzip/codecs.open(path, mode)
+    and the pathlib form path.open(mode), whose first argument is the mode rather than the path.
+    """
+    literals = [_literal_str(arg) for arg in node.args[:2]]
+    mode = next((_literal_str(kw.value) for kw in node.keywords if kw.arg == 'mode'), None)
+    if isinstance(node.func, ast.Attribute) and literals and literals[0] is not None \
+            and len(literals[0]) <= 3 and set(literals[0]) <= _OPEN_MODE_CHARS:
+        return None, mode or literals[0]
+    path = literals[0] if literals else None
+    return path, mode or (literals[1] if len(literals) > 1 and literals[1] else 'r')
+
+def _call_stage(name: str, root: str | None) -> str | None:
+    if root in _PLOTTING_MODULES and name not in _STAGE_CALLS['load']:
+        return 'plot'
+    for stage in WORKFLOW_STAGES:
+        if name in _STAGE_CALLS[stage] or name.startswith(_STAGE_PREFIXES.get(stage, ())):
+            return stage
+    return None
+
+def _analyze_code(tree: ast.Module) -> dict:
+    imports, functions, classes, data_files, stages = {}, {}, {}, {}, {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(dict.fromkeys(alias.name.split('.')[0] for alias in node.names))
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            imports[node.module.split('.')[0]] = None
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions[node.name] = None
+        elif isinstance(node, ast.ClassDef):
+            classes[node.name] = None
+        elif isinstance(node, ast.Call):
+            name, root = _call_names(node)
+            stage = _call_stage(name, root) if name else None
+            if stage is None:
+                continue
+            path = _literal_str(node.args[0]) if node.args else None
+            if name == 'open':
+                path, mode = _open_arguments(node)
+                if set(mode) & set('wxa+'):
+                    continue # Opened for writing: an output, not data the notebook reads
+            stages[stage] = None
+            if stage == 'load' and path is not None:
+                data_files[path] = None
+    return {
+        'imports': tuple(imports),
+        'functions': tuple(functions),
+        'classes': tuple(classes),
+        'data_files': tuple(data_files),
+        'stages': tuple(stage for stage in WORKFLOW_STAGES if stage in stages),
+    }
+
+_EMPTY_FACTS = {'imports': (), 'functions': (), 'classes': (), 'data_files': (), 'stages': ()}
+_facts_cache = {}
+_facts_cache_lock = threading.Lock()
+
+def cell_facts(cell: Cell) -> dict:
+    """
+    Statically analyzes one code cell. Results are memoized by content hash, so cells repeated
+    across notebooks (boilerplate imports, shared helpers) are analyzed only once per process.
+
+    Args:
+        cell (Cell): A code cell (markdown and unparseable cells yield empty facts).
+
+    Returns:
+        dict: Tuples of 'imports' (top-level packages), 'functions', 'classes', 'data_files'
+              (literal paths passed to loaders) and 'stages' (in WORKFLOW_STAGES order).
+    """
+    if cell.type != 'code' or cell.tree is None:
+        return _EMPTY_FACTS
+    facts = _facts_cache.get(cell.content_hash)
+    if facts is None:
+        facts = _analyze_code(cell.tree)
+        with _facts_cache_lock:
+            if len(_facts_cache) >= STATIC_FACTS_CACHE_SIZE:
+                _facts_cache.clear()
+            _facts_cache[cell.content_hash] = facts
+    return facts
+
+# --- Per-notebook summary ---
+
+def summarize_notebook_locally(notebook_cells: list[Cell]) -> dict:
+    """
+    Builds an instant, non-AI summary of a parsed notebook.
+
+    Args:
+        notebook_cells (list[Cell]): Cells as returned by parse_notebook_content.
+
+    Returns:
+        dict: 'code_cells', 'markdown_cells', 'lines_of_code' (non-blank), 'unparsed_cells' and
+              first-seen-ordered lists of 'imports', 'functions', 'classes', 'data_files', plus
+              'stages' as [(stage, first cell number), ...] in workflow order.
+    """
+    notebook_cells = ensure_cells(notebook_cells)
+    summary = {'code_cells': 0, 'markdown_cells': 0, 'lines_of_code': 0, 'unparsed_cells': 0}
+    collected = {key: {} for key in ('imports', 'functions', 'classes', 'data_files')}
+    first_stage_cell = {}
+    for number, cell in enumerate(notebook_cells, start=1):
+        if cell.type == 'markdown':
+            summary['markdown_cells'] += 1
+            continue
+        summary['code_cells'] += 1
+        summary['lines_of_code'] += sum(1 for line in cell.content.split('\n') if line.strip())
+        if cell.tree is None:
+            summary['unparsed_cells'] += 1
+            continue
+        facts = cell_facts(cell)
+        for key, values in collected.items():
+            values.update(dict.fromkeys(facts[key]))
+        for stage in facts['stages']:
+            first_stage_cell.setdefault(stage, number)
+    for key, values in collected.items():
+        summary[key] = list(values)
+    summary['stages'] = [(stage, first_stage_cell[stage]) for stage in WORKFLOW_STAGES if stage in first_stage_cell]
+    return summary
+
+def _format_names(names: list[str], limit: int = 12) -> str:
+    shown = ", ".join(f"`{name}`" for name in names[:limit])
+    return shown + (f" and {len(names) - limit} more" if len(names) > limit else "")
+
+def format_local_summary(summary: dict) -> str:
+    """
+    Formats a summarize_notebook_locally result as Markdown.
+
+    Args:
+        summary (dict): The local summary of one notebook.
+
+    Returns:
+        str: A short bullet list; empty facts are left out.
+    """
+    lines = [f"* **Cells:** {summary['code_cells']} code, {summary['markdown_cells']} markdown "
+             f"({summary['lines_of_code']:,} lines of code)"]
+    if summary['imports']:
+        lines.append(f"* **Libraries:** {_format_names(summary['imports'])}")
+    if summary['stages']:
+        lines.append("* **Workflow stages:** " + " → ".join(f"{stage} (cell {number})" for stage, number in summary['stages']))
+    if summary['functions'] or summary['classes']:
+        lines.append(f"* **Defines:** {_format_names(summary['classes'] + summary['functions'])}")
+    if summary['data_files']:
+        lines.append(f"* **Data files read:** {_format_names(summary['data_files'])}")
+    if summary['unparsed_cells']:
+        lines.append(f"* {summary['unparsed_cells']} code cell(s) could not be parsed and were skipped.")
+    return "\n".join(lines)
+
+# --- Corpus-wide statistics (batch mode) ---
+
+def summarize_corpus(summaries: list[dict]) -> dict:
+    """
+    Aggregates per-notebook local summaries into corpus-wide statistics.
+
+    Args:
+        summaries (list[dict]): Results of summarize_notebook_locally, one per notebook.
+
+    Returns:
+        dict: 'notebooks', 'code_cells', 'markdown_cells', 'lines_of_code' totals and Counters of
+              how many notebooks use each library ('imports'), reach each stage ('stages') and
+              read each data file ('data_files').
+    """
+    corpus = {'notebooks': len(summaries), 'code_cells': 0, 'markdown_cells': 0, 'lines_of_code': 0,
+              'imports': Counter(), 'stages': Counter(), 'data_files': Counter()}
+    for summary in summaries:
+        for key in ('code_cells', 'markdown_cells', 'lines_of_code'):
+            corpus[key] += summary[key]
+        corpus['imports'].update(summary['imports'])
+        corpus['stages'].update(stage for stage, _ in summary['stages'])
+        corpus['data_files'].update(summary['data_files'])
+    return corpus
+
+def format_corpus_summary(corpus: dict, top_n: int = 10) -> str:
+    """
+    Formats summarize_corpus statistics as Markdown.
+
+    Args:
+        corpus (dict): The corpus statistics.
+        top_n (int): How many libraries and data files to list.
+
+    Returns:
+        str: A short bullet list.
+    """
+    notebooks = corpus['notebooks']
+    lines = [f"* **Notebooks:** {notebooks:,} ({corpus['code_cells']:,} code cells, "
+             f"{corpus['markdown_cells']:,} markdown cells, {corpus['lines_of_code']:,} lines of code)"]
+    if corpus['imports']:
+        lines.append("* **Most used libraries:** " + ", ".join(
+            f"`{name}` ({count}/{notebooks})" for name, count in corpus['imports'].most_common(top_n)))
+    if corpus['stages']:
+        lines.append("* **Workflow stages:** " + ", ".join(
+            f"{stage} in {corpus['stages'][stage]}/{notebooks}" for stage in WORKFLOW_STAGES if corpus['stages'][stage]))
+    if corpus['data_files']:
+        lines.append("* **Most read data files:** " + ", ".join(
+            f"`{name}` ({count})" for name, count in corpus['data_files'].most_common(top_n)))
+    return "\n".join(lines)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# ai_logic refuses to import without an API key; the tests never reach the real API.
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+os.environ.setdefault("JOURNAL_ENABLED", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,100 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import nbformat
+import pytest
+
+pytest.importorskip("httpx") # Required by FastAPI's TestClient
+from fastapi.testclient import TestClient
+
+import ai_logic
+import api_server
+
+NOTEBOOK = nbformat.writes(nbformat.v4.new_notebook(cells=[
+    nbformat.v4.new_markdown_cell("# Churn model"),
+    nbformat.v4.new_code_cell("import pandas as pd\ndf = pd.read_csv('churn.csv')"),
+]))
+
+class _FakeModel:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def generate_content(self, prompt, **kwargs):
+        return SimpleNamespace(parts=[SimpleNamespace(text="Loads the churn data.")])
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(ai_logic.genai, "GenerativeModel", _FakeModel)
+    monkeypatch.setattr(api_server, "jobs", {})
+    with TestClient(api_server.app) as test_client:
+        yield test_client
+
+def _finished_job(client):
+    response = client.post("/jobs?filename=churn.ipynb", content=NOTEBOOK)
+    assert response.status_code == 202
+    job_id = response.json()['job_id']
+    for _ in range(200):
+        status = client.get(f"/jobs/{job_id}").json()
+        if status['status'] not in ('queued', 'running'):
+            break
+        time.sleep(0.02)
+    assert status['status'] == 'done', status
+    return job_id
+
+def test_results_in_every_format(client):
+    job_id = _finished_job(client)
+
+    markdown = client.get(f"/jobs/{job_id}/result?format=markdown")
+    assert markdown.headers['content-type'].startswith("text/markdown")
+    assert "## Cell-by-Cell Summary:" in markdown.text
+
+    html = client.get(f"/jobs/{job_id}/result?format=html")
+    assert html.headers['content-type'].startswith("text/html")
+    assert "<title>Notebook Explanation - churn</title>" in html.text
+
+    result = client.get(f"/jobs/{job_id}/result?format=json").json()
+    assert result['overview'] == "Loads the churn data."
+    assert [(cell['cell_index'], cell['cell_type'], cell['origin']) for cell in result['cells']] == [
+        (0, 'markdown', 'markdown'), (1, 'code', 'llm')]
+    assert result['cells'][1]['text'] == "Loads the churn data."
+    assert result['summary_markdown'] == markdown.text
+
+    assert client.get(f"/jobs/{job_id}/result?format=pdf").status_code == 400
+
+def test_bad_upload_is_rejected(client):
+    response = client.post("/jobs", content=b"this is not a notebook")
+    assert response.status_code == 400
+    assert api_server.jobs == {}
+
+def test_full_queue_is_rejected_before_reading_the_body(client, monkeypatch):
+    monkeypatch.setattr(api_server, "API_MAX_QUEUED_JOBS", 1)
+    api_server.jobs['busy'] = {'status': 'running', 'finished_at': None}
+
+    def unreadable_body(*args, **kwargs):
+        raise AssertionError("the body of a rejected upload must not be read")
+
+    monkeypatch.setattr(api_server, "_read_body_capped", unreadable_body)
+    response = client.post("/jobs", content=NOTEBOOK)
+    assert response.status_code == 429
+    assert response.headers['retry-after'] == "5"
+
+def test_deleted_job_is_cancelled(client, monkeypatch):
+    release = threading.Event()
+
+    def blocked_request(prompt, model_name, cancel_event=None):
+        release.wait(timeout=10)
+        return "Loads the churn data."
+
+    monkeypatch.setattr(ai_logic, "get_gemini_response", blocked_request)
+    job_id = client.post("/jobs", content=NOTEBOOK).json()['job_id']
+    assert client.delete(f"/jobs/{job_id}").status_code == 202
+    for _ in range(200):
+        status = client.get(f"/jobs/{job_id}").json()
+        if status['status'] not in ('queued', 'running'):
+            break
+        time.sleep(0.02)
+    release.set()
+    assert status['status'] == 'cancelled'
+    assert client.get(f"/jobs/{job_id}/result").status_code != 200
+    assert client.delete("/jobs/unknown").status_code == 404
@@ -0,0 +1,66 @@
+import io
+import tarfile
+import zipfile
+
+import nbformat
+
+import features
+from archive_reader import count_archive_notebooks
+from features import ArchivedNotebook, expand_uploaded_archives
+
+NOTEBOOK = nbformat.writes(nbformat.v4.new_notebook(cells=[nbformat.v4.new_code_cell("x = 1")])).encode()
+
+def _zip(names):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name in names:
+            archive.writestr(name, NOTEBOOK)
+    return buffer.getvalue()
+
+def _tar(names):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for name in names:
+            info = tarfile.TarInfo(name)
+            info.size = len(NOTEBOOK)
+            archive.addfile(info, io.BytesIO(NOTEBOOK))
+    return buffer.getvalue()
+
+def test_count_reads_only_the_directory():
+    names = ["a.ipynb", "nested/b.ipynb", ".ipynb_checkpoints/a-checkpoint.ipynb", "data.csv"]
+    assert count_archive_notebooks(io.BytesIO(_zip(names))) == 2
+    assert count_archive_notebooks(io.BytesIO(_tar(names))) == 2
+
+def test_limit_stops_reading_and_counts_the_rest(monkeypatch):
+    monkeypatch.setattr(features, "MAX_ARCHIVE_NOTEBOOKS", 3)
+    uploads = [ArchivedNotebook("first.zip", _zip([f"{i}.ipynb" for i in range(5)])),
+               ArchivedNotebook("second.tar.gz", _tar([f"{i}.ipynb" for i in range(4)]))]
+    notebooks, left_out, errors = expand_uploaded_archives(uploads)
+    assert [notebook.name for notebook in notebooks] == ["first.zip/0.ipynb", "first.zip/1.ipynb", "first.zip/2.ipynb"]
+    assert left_out == 2 + 4
+    assert errors == []
+
+def test_unreadable_archive_is_reported():
+    uploads = [ArchivedNotebook("broken.zip", b"this is not an archive"),
+               ArchivedNotebook("plain.ipynb", NOTEBOOK)]
+    notebooks, left_out, errors = expand_uploaded_archives(uploads)
+    assert [notebook.name for notebook in notebooks] == ["plain.ipynb"]
+    assert left_out == 0
+    assert len(errors) == 1 and errors[0].startswith("broken.zip")
+
+def test_total_decompressed_bytes_are_capped(monkeypatch):
+    monkeypatch.setattr(features, "MAX_ARCHIVE_TOTAL_BYTES", len(NOTEBOOK) * 2)
+    uploads = [ArchivedNotebook("corpus.zip", _zip([f"{i}.ipynb" for i in range(5)])),
+               ArchivedNotebook("more.zip", _zip(["x.ipynb"]))]
+    notebooks, left_out, errors = expand_uploaded_archives(uploads)
+    assert len(notebooks) == 2
+    assert left_out == 3 + 1
+    assert errors == []
+
+def test_encrypted_member_is_reported():
+    data = bytearray(_zip(["open.ipynb", "secret.ipynb"]))
+    entry = data.rindex(b"PK\x01\x02") # Central directory record of the last member
+    data[entry + 8] |= 0x1 # Mark it as encrypted
+    notebooks, left_out, errors = expand_uploaded_archives([ArchivedNotebook("locked.zip", bytes(data))])
+    assert [notebook.name for notebook in notebooks] == ["locked.zip/open.ipynb"]
+    assert len(errors) == 1 and "encrypted" in errors[0]
@@ -0,0 +1,69 @@
+import io
+import zipfile
+from types import SimpleNamespace
+
+import nbformat
+import pytest
+from streamlit.delta_generator import DeltaGenerator
+from streamlit.testing.v1 import AppTest
+
+import ai_logic
+import response_cache
+from features import ArchivedNotebook, build_reports_zip
+
+NOTEBOOK = nbformat.writes(nbformat.v4.new_notebook(cells=[
+    nbformat.v4.new_markdown_cell("# Churn model"),
+    nbformat.v4.new_code_cell("import pandas as pd\ndf = pd.read_csv('churn.csv')"),
+])).encode("utf-8")
+
+class _UploadedFile(ArchivedNotebook):
+    """Stands in for Streamlit's UploadedFile, which AppTest cannot create."""
+
+    def __init__(self, name, data):
+        super().__init__(name, data)
+        self.file_id = name
+
+@pytest.fixture
+def app(monkeypatch):
+    response_cache._cache.clear()
+    prompts = []
+    monkeypatch.setattr(ai_logic, "get_gemini_response",
+                        lambda prompt, model_name, cancel_event=None: prompts.append(prompt) or "Loads the churn data.")
+    uploads = [_UploadedFile("a.ipynb", NOTEBOOK), _UploadedFile("b.ipynb", NOTEBOOK)]
+    monkeypatch.setattr(DeltaGenerator, "file_uploader", lambda self, *args, **kwargs: uploads)
+    test = AppTest.from_file("../main.py", default_timeout=30)
+    test.prompts, test.uploads = prompts, uploads
+    return test
+
+def _process(app):
+    app.run()
+    next(button for button in app.sidebar.button if button.label == "Generate Explanation").click().run()
+
+def test_batch_results_survive_reruns(app):
+    _process(app)
+    assert not app.exception
+    assert [success.value for success in app.success] == ["Explanations generated for 2 of 2 notebooks!"]
+    sent = len(app.prompts)
+    assert sent
+
+    app.run() # e.g. the rerun triggered by the ZIP download click
+    assert [success.value for success in app.success] == ["Explanations generated for 2 of 2 notebooks!"]
+    assert [expander.label for expander in app.expander][-2:] == ["Explanation: a.ipynb", "Explanation: b.ipynb"]
+    assert len(app.prompts) == sent # Shown from session state, not explained again
+
+    app.uploads[1] = _UploadedFile("c.ipynb", NOTEBOOK) # A different set of uploads drops the old results
+    app.run()
+    assert not app.success
+
+def test_reports_zip_has_markdown_and_html_per_notebook():
+    jobs = [{'name': name, 'stage': 'done', 'summary_text': "## Notebook Overview:\nLoads data.", 'error': None}
+            for name in ("a.ipynb", "nested/a.ipynb")]
+    jobs.append({'name': "broken.ipynb", 'stage': 'failed', 'summary_text': None, 'error': "Not a notebook."})
+    archive = io.BytesIO()
+    build_reports_zip(jobs, archive)
+    with zipfile.ZipFile(archive) as zf:
+        names = zf.namelist()
+        assert names[:4] == ["a_explanation.md", "a_explanation.html", "a_2_explanation.md", "a_2_explanation.html"]
+        assert zf.read("a_explanation.md") == b"## Notebook Overview:\nLoads data."
+        assert b"<h2>Notebook Overview:</h2>" in zf.read("a_explanation.html")
+        assert any("broken.ipynb: Not a notebook." in zf.read(name).decode() for name in names[4:])
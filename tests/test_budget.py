@@ -0,0 +1,97 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import ai_logic
+import budget
+import response_cache
+from budget import (BATCH_SIZE, charge_user_tokens, claim_user_prompt, describe_plan, get_user_remaining_tokens,
+                    plan_within_budget)
+from models import Cell
+
+CELL_TOKENS = {i: 100 for i in range(10)}
+COMPLEXITY = {i: i for i in range(10)}
+
+def _plan(token_budget):
+    return plan_within_budget(CELL_TOKENS, COMPLEXITY, template_tokens=50, overview_tokens=80,
+                              token_budget=token_budget)
+
+def test_notebook_that_fits_is_explained_in_full():
+    plan = _plan(None)
+    assert plan['mode'] == 'full' and plan['overview']
+    assert plan['batches'] == [[i] for i in range(10)]
+    assert _plan(plan['full_tokens'])['mode'] == 'full'
+    assert describe_plan(plan) is None
+
+def test_tighter_budget_batches_cells():
+    plan = _plan(_plan(None)['full_tokens'] - 1)
+    assert plan['mode'] == 'batched'
+    assert all(len(batch) <= BATCH_SIZE for batch in plan['batches'])
+    assert plan['projected_tokens'] <= plan['budget']
+
+def test_small_budget_keeps_most_complex_cells():
+    plan = _plan(1500)
+    assert plan['mode'] == 'top_n' and plan['overview']
+    explained = [i for batch in plan['batches'] for i in batch]
+    assert explained and min(explained) > max(plan['local_cells'])
+    assert plan['projected_tokens'] <= 1500
+    assert "most complex" in describe_plan(plan)
+
+def test_no_room_for_overview_plans_no_llm_calls():
+    plan = _plan(0)
+    assert plan['mode'] == 'local' and not plan['overview']
+    assert plan['batches'] == [] and plan['local_cells'] == list(range(10))
+    assert plan['projected_tokens'] == 0
+    assert "local summary" in describe_plan(plan)
+
+def test_exhausted_user_gets_local_explanation_without_llm(monkeypatch):
+    monkeypatch.setattr(ai_logic, "TOKEN_BUDGET_PER_USER", 1000)
+    monkeypatch.setattr(budget, "_user_usage", {})
+    charge_user_tokens("alice", 1000)
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("the LLM must not be called")
+
+    monkeypatch.setattr(ai_logic, "get_gemini_response", no_llm)
+    cells = [Cell.create('markdown', "# Churn"), Cell.create('code', "import pandas as pd\ndf = pd.read_csv('churn.csv')")]
+    explanation = ai_logic.explain_notebook(cells, user_id="alice")
+    assert get_user_remaining_tokens("alice", 1000) == 0
+    assert budget._user_usage["alice"] == 1000
+    assert explanation.cells[1].text.startswith("Local preview (not AI-generated)")
+    assert "`churn.csv`" in explanation.overview
+    assert "local summary" in explanation.notes[0]
+
+def test_prompt_is_paid_by_the_first_claim_only(monkeypatch):
+    monkeypatch.setattr(budget, "_prompt_claims", budget.OrderedDict())
+    assert claim_user_prompt("alice", "key")
+    assert not claim_user_prompt("alice", "key") # The overlapping run consumes the claim
+    assert claim_user_prompt("bob", "key")
+    assert claim_user_prompt("", "key") and claim_user_prompt("", "key")
+    monkeypatch.setattr(budget, "PROMPT_CLAIM_TTL_S", -1)
+    assert claim_user_prompt("carol", "key") and claim_user_prompt("carol", "key") # Expired claims are dropped
+
+class _SlowModel:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(0.2)
+        return SimpleNamespace(parts=[SimpleNamespace(text="Explains the cell.")])
+
+def test_overlapping_speculative_run_is_not_charged_twice(monkeypatch):
+    monkeypatch.setattr(ai_logic.genai, "GenerativeModel", _SlowModel)
+    monkeypatch.setattr(budget, "_user_usage", {})
+    monkeypatch.setattr(budget, "_prompt_claims", budget.OrderedDict())
+    cells = [Cell.create('code', f"step_{i} = {i} * 2\nprint(step_{i})") for i in range(3)]
+
+    response_cache._cache.clear()
+    ai_logic.explain_notebook(cells, user_id="solo")
+
+    response_cache._cache.clear()
+    speculation = threading.Thread(target=ai_logic.prefetch_cell_explanations, args=(cells, 10, None, "alice"))
+    speculation.start()
+    time.sleep(0.1) # The user asks while the first speculative prompt is in flight
+    ai_logic.explain_notebook(cells, user_id="alice")
+    speculation.join()
+    assert budget._user_usage["alice"] == budget._user_usage["solo"]
+    response_cache._cache.clear()
@@ -0,0 +1,34 @@
+import threading
+import time
+
+import pytest
+
+import ai_logic
+import response_cache
+from concurrency import RequestCancelled
+from models import Cell
+
+def test_cancelled_run_drops_queued_prompts_and_stops_waiting(monkeypatch):
+    response_cache._cache.clear()
+    release, started = threading.Event(), []
+
+    def blocked_request(prompt, model_name, cancel_event=None):
+        if cancel_event is not None and cancel_event.is_set():
+            raise RequestCancelled()
+        started.append(prompt)
+        release.wait(timeout=10) # A request the LLM has not answered yet
+        return "Explains the cell."
+
+    monkeypatch.setattr(ai_logic, "get_gemini_response", blocked_request)
+    monkeypatch.setattr(ai_logic, "LLM_MAX_CONCURRENCY", 2)
+    cells = [Cell.create('code', f"result_{i} = compute({i})") for i in range(6)]
+    cancel_event = threading.Event()
+    threading.Timer(0.2, cancel_event.set).start()
+    start = time.monotonic()
+    try:
+        with pytest.raises(RequestCancelled):
+            ai_logic.explain_notebook(cells, cancel_event=cancel_event)
+        assert time.monotonic() - start < 2 # Did not wait for the two requests in flight
+        assert len(started) == 2 # The queued prompts were never sent
+    finally:
+        release.set()
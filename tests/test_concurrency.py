@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from concurrency import AdaptiveConcurrencyController, RequestCancelled
+
+def _controller():
+    return AdaptiveConcurrencyController(initial_window=8, latency_target_s=1.0, cooldown_s=0, min_latency_samples=20)
+
+def test_single_slow_call_does_not_cut_window(capsys):
+    controller = _controller()
+    for _ in range(30):
+        controller.record_success(0.1)
+    window = controller.window
+    controller.record_success(30.0)
+    assert controller.window >= window
+    assert capsys.readouterr().out == ""
+
+def test_sustained_high_p95_cuts_window(capsys):
+    controller = _controller()
+    for _ in range(30):
+        controller.record_success(5.0)
+    snapshot = controller.snapshot()
+    assert snapshot['window'] < 8
+    assert snapshot['decisions'][-1]['action'] == 'decrease'
+    assert capsys.readouterr().out == ""
+
+def test_window_recovers_after_latency_spike():
+    controller = AdaptiveConcurrencyController(initial_window=16, latency_target_s=1.0, cooldown_s=0,
+                                               min_latency_samples=20)
+    for _ in range(30):
+        controller.record_success(0.1)
+    for _ in range(12):
+        controller.record_success(5.0)
+    assert 1 < controller.window < 16
+    for _ in range(150):
+        controller.record_success(0.1)
+    snapshot = controller.snapshot()
+    assert snapshot['window'] >= 16
+    assert snapshot['decisions'][-1]['action'] == 'increase'
+    assert sum(decision['action'] == 'decrease' for decision in snapshot['decisions']) <= 2
+
+def test_cancelled_request_gives_up_its_place_in_the_queue():
+    controller = AdaptiveConcurrencyController(initial_window=1)
+    cancel_event = threading.Event()
+    outcome = []
+
+    def waiting_request():
+        try:
+            with controller.slot(cancel_event):
+                outcome.append('sent')
+        except RequestCancelled:
+            outcome.append('cancelled')
+
+    with controller.slot():
+        waiter = threading.Thread(target=waiting_request)
+        waiter.start()
+        cancel_event.set()
+        waiter.join(timeout=2)
+        assert outcome == ['cancelled']
+        assert controller.in_flight == 1
+    assert controller.in_flight == 0
+    with pytest.raises(RequestCancelled):
+        with controller.slot(cancel_event): # Already cancelled: never takes a free slot
+            pass
@@ -0,0 +1,57 @@
+from dataflow import analyze_cell_dataflow, select_upstream_context
+
+def _notebook(*sources):
+    return [analyze_cell_dataflow(source) for source in sources]
+
+def test_same_cell_definition_is_resolved_in_that_cell():
+    dataflow = _notebook(
+        "raw = load()",
+        "raw = clean(raw)\nfeatures = raw * 2",
+        "model.fit(features)",
+    )
+    context = select_upstream_context(dataflow, 2, 1000)
+    # `features` reads the `raw` defined just above it in cell 1, which in turn reads cell 0's `raw`
+    assert context.split("\n") == ["raw = load()", "raw = clean(raw)", "features = raw * 2"]
+
+def test_redefinition_uses_latest_statement_in_source_order():
+    dataflow = _notebook(
+        "b = 1\na = 1\na = b + 1",
+        "print(a)",
+    )
+    context = select_upstream_context(dataflow, 1, 1000)
+    assert context.split("\n") == ["b = 1", "a = b + 1"]
+
+def test_later_redefinition_in_reading_cell_is_ignored():
+    dataflow = _notebook(
+        "x = 1",
+        "y = x\nx = 2",
+    )
+    assert select_upstream_context(dataflow, 1, 1000) == "x = 1"
+
+def test_budget_limits_context():
+    dataflow = _notebook("data = " + "1 + " * 200 + "1", "print(data)")
+    assert select_upstream_context(dataflow, 1, 5) == ""
+
+def test_function_locals_and_parameters_are_not_outer_uses():
+    record = analyze_cell_dataflow(
+        "def train(data, n=n_default):\n    model = RandomForest()\n    model.fit(data)\n    return model"
+    )
+    assert set(record['defs']) == {'train'}
+    assert record['uses'] == {'RandomForest', 'n_default'}
+
+def test_unrelated_upstream_definition_is_not_selected():
+    dataflow = _notebook(
+        "model = XGBClassifier(n_estimators=500)",
+        "def train(data):\n    model = RandomForest()\n    return model.fit(data)",
+    )
+    assert select_upstream_context(dataflow, 1, 1000) == ""
+
+def test_lambda_and_comprehension_variables_are_local():
+    record = analyze_cell_dataflow("f = lambda row: row * scale\nsquares = [x * x for x in values if x > limit]")
+    assert record['uses'] == {'scale', 'values', 'limit'}
+    assert set(record['defs']) == {'f', 'squares'}
+
+def test_del_is_neither_definition_nor_use():
+    dataflow = _notebook("df = load()", "del df", "print(df.head())")
+    assert dataflow[1]['defs'] == {} and dataflow[1]['uses'] == set()
+    assert select_upstream_context(dataflow, 2, 1000) == "df = load()"
@@ -0,0 +1,37 @@
+from features import build_report_outline, paginate_report_entries
+from models import Cell, CellExplanation, NotebookExplanation
+
+def _explanation(cells):
+    entries = []
+    for index, cell in enumerate(cells):
+        text = f"Explains cell {index + 1}." if cell.type == 'code' else \
+            f"Documentation/Explanation. Preview: \"{cell.markdown_preview()}\""
+        entries.append(CellExplanation(index, cell.type, text, 'llm' if cell.type == 'code' else 'markdown'))
+    return NotebookExplanation(overview="Trains a churn model.", cells=tuple(entries), notes=("**Budget note:** batched.",))
+
+def test_outline_sections_come_from_cell_headings():
+    cells = [
+        Cell.create('code', "import pandas as pd"),
+        Cell.create('markdown', "Some intro text\n## Data Loading\nMore text\nand more"),
+        Cell.create('code', "df = pd.read_csv('data.csv')"),
+        Cell.create('markdown', "```python\n# not a heading\n```\n### Model Training ###"),
+        Cell.create('code', "model.fit(X, y)"),
+        Cell.create('markdown', "Just prose, no heading."),
+        Cell.create('code', "model.score(X, y)"),
+    ]
+    outline = build_report_outline(_explanation(cells), cells)
+    assert [entry['section'] for entry in outline['entries']] == [
+        "Before the first heading", "Data Loading", "Data Loading",
+        "Model Training", "Model Training", "Model Training", "Model Training",
+    ]
+    assert outline['overview'].startswith("## Notebook Overview:\nTrains a churn model.")
+    assert "> **Budget note:** batched." in outline['overview']
+    assert outline['entries'][2]['markdown'] == "● **Cell 3 (Code):** Explains cell 3."
+
+def test_pagination_groups_by_section():
+    cells = [Cell.create('markdown', "# Part A")] + [Cell.create('code', f"x{i} = {i}") for i in range(4)]
+    outline = build_report_outline(_explanation(cells), cells)
+    groups, match_count, page_count = paginate_report_entries(outline['entries'], "", 2, page_size=3)
+    assert (match_count, page_count) == (5, 2)
+    assert [section for section, _ in groups] == ["Part A"]
+    assert len(groups[0][1]) == 2
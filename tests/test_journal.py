@@ -0,0 +1,28 @@
+import os
+import time
+
+from journal import JobJournal, prune_stale_journals
+
+def test_identical_jobs_write_separate_files_and_resume_from_both(tmp_path):
+    first = JobJournal("job", directory=str(tmp_path))
+    second = JobJournal("job", directory=str(tmp_path))
+    first.record("a", [0], "answer a")
+    second.record("b", [1], "answer b")
+    first.close()
+    second.close()
+    assert first.path != second.path
+
+    resumed = JobJournal("job", directory=str(tmp_path))
+    assert resumed.completed == {"a": "answer a", "b": "answer b"}
+    resumed.discard()
+    assert os.listdir(tmp_path) == []
+
+def test_stale_journals_are_pruned(tmp_path):
+    stale = tmp_path / "old.1-abc.jsonl"
+    fresh = tmp_path / "new.1-def.jsonl"
+    stale.write_text("")
+    fresh.write_text("")
+    old = time.time() - 3600
+    os.utime(stale, (old, old))
+    assert prune_stale_journals(str(tmp_path), ttl_s=60) == 1
+    assert [path.name for path in tmp_path.iterdir()] == ["new.1-def.jsonl"]
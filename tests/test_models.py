@@ -0,0 +1,51 @@
+import dataclasses
+
+import pytest
+
+from models import Cell, CellExplanation, NotebookExplanation, ensure_cells
+
+def test_cell_precomputes_derived_fields():
+    cell = Cell.create('code', "%matplotlib inline\nimport pandas as pd\ndf = pd.read_csv('a.csv')", "[stdout]\nok")
+    assert cell.line_count == 3
+    assert cell.token_estimate > 0
+    assert len(cell.content_hash) == 64
+    assert cell.tree is not None and len(cell.tree.body) == 2 # The magic line is stripped before parsing
+    assert cell.output_digest == "[stdout]\nok"
+
+    assert Cell.create('code', "def broken(:").tree is None
+    assert Cell.create('code', "x = 1\0").tree is None # Null bytes are unparseable, not an error
+    assert Cell.create('markdown', "# Title").tree is None
+    assert Cell.create('code', "").line_count == 0
+
+def test_cells_are_immutable_and_compare_by_content():
+    cell = Cell.create('code', "x = 1")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cell.content = "x = 2"
+    assert cell == Cell.create('code', "x = 1") # The AST is not part of equality
+    assert cell.content_hash != Cell.create('markdown', "x = 1").content_hash
+
+def test_ensure_cells_converts_legacy_dictionaries():
+    existing = Cell.create('markdown', "# Intro")
+    cells = ensure_cells([existing, {'type': 'code', 'content': "y = 2", 'output_digest': "2"}, {'type': 'code', 'content': "z = 3"}])
+    assert cells[0] is existing
+    assert cells[1] == Cell.create('code', "y = 2", "2")
+    assert cells[2].output_digest == ""
+
+def test_markdown_preview_marks_truncation():
+    assert Cell.create('markdown', "# Title\nFirst line\nSecond line").markdown_preview() == "# Title First line..."
+    assert Cell.create('markdown', "Only line").markdown_preview() == "Only line"
+
+def test_explanation_renders_the_report_layout():
+    explanation = NotebookExplanation(
+        overview="  Trains a churn model.\n",
+        cells=(CellExplanation(0, 'markdown', "Documentation.", 'markdown'),
+               CellExplanation(1, 'code', "Loads the data.", 'llm')),
+        notes=("**Budget note:** batched.",),
+    )
+    assert explanation.to_markdown() == (
+        "## Notebook Overview:\nTrains a churn model.\n\n"
+        "> **Budget note:** batched.\n\n"
+        "## Cell-by-Cell Summary:\n"
+        "● **Cell 1 (Markdown):** Documentation.\n"
+        "● **Cell 2 (Code):** Loads the data."
+    )
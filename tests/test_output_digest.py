@@ -0,0 +1,50 @@
+import nbformat
+
+import ai_logic
+from output_digest import digest_cell_outputs
+from token_utils import CHARS_PER_TOKEN
+
+def _stream(text, name='stdout'):
+    return {'output_type': 'stream', 'name': name, 'text': text}
+
+def test_long_stream_keeps_head_and_tail():
+    log = "".join(f"epoch {i} loss {1 / (i + 1):.3f}\n" for i in range(50))
+    digest = digest_cell_outputs([_stream(log)], max_tokens=200)
+    lines = digest.split("\n")
+    assert lines[0] == "[stdout]"
+    assert lines[1] == "epoch 0 loss 1.000"
+    assert "... (42 more lines) ..." in lines
+    assert lines[-1] == "epoch 49 loss 0.020"
+
+def test_rich_outputs_list_mime_types_and_never_read_binary_payloads():
+    outputs = [
+        {'output_type': 'display_data', 'data': {'image/png': "iVBORw0KGgo" * 1000, 'text/plain': "<Figure size 640x480>"}},
+        {'output_type': 'execute_result', 'data': {'text/plain': ["   age  churn\n", "0   42      1"]}},
+        {'output_type': 'error', 'ename': 'KeyError', 'evalue': "'target'", 'traceback': ["..."]},
+        _stream("   \n"),
+    ]
+    assert digest_cell_outputs(outputs, max_tokens=200) == (
+        "[display_data: image/png]\n<Figure size 640x480>\n"
+        "   age  churn\n0   42      1\n"
+        "[error] KeyError: 'target'"
+    )
+
+def test_digest_is_capped_and_can_be_disabled():
+    outputs = [_stream("x" * 150 + "\n") for _ in range(20)]
+    digest = digest_cell_outputs(outputs, max_tokens=50)
+    assert digest.endswith("\n... (output truncated)")
+    assert len(digest) <= 50 * CHARS_PER_TOKEN + len("\n... (output truncated)")
+    assert digest_cell_outputs(outputs, max_tokens=0) == ""
+    assert digest_cell_outputs([], max_tokens=50) == ""
+
+def test_digest_is_sent_with_the_cell_prompt(monkeypatch):
+    cell = nbformat.v4.new_code_cell("print(df.shape)")
+    cell.outputs = [nbformat.v4.new_output('stream', name='stdout', text="(7043, 21)\n")]
+    cells = ai_logic.parse_notebook_string(nbformat.writes(nbformat.v4.new_notebook(cells=[cell])))
+    assert cells[0].output_digest == "[stdout]\n(7043, 21)"
+
+    prompts = []
+    monkeypatch.setattr(ai_logic, "get_gemini_response",
+                        lambda prompt, model_name, cancel_event=None: prompts.append(prompt) or "Prints the shape.")
+    ai_logic.explain_notebook(cells)
+    assert "(7043, 21)" in prompts[0]
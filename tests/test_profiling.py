@@ -0,0 +1,28 @@
+import threading
+
+import profiling
+
+def test_concurrent_runs_profile_one_and_never_fail(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    inside = threading.Barrier(4)
+    runs, errors = [], []
+
+    def job():
+        try:
+            with profiling.profiled_run("job") as run:
+                with profiling.profile_stage("work"):
+                    inside.wait(timeout=5)
+                    [bytearray(1024) for _ in range(100)]
+            runs.append(run)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=job) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert sum(run is not None for run in runs) == 1
+    assert len(list(tmp_path.glob("*.txt"))) == 1
@@ -0,0 +1,37 @@
+from prompt_compaction import compaction_report, record_compaction, strip_code_noise, summarize_large_literals
+
+def test_signed_numbers_keep_their_type():
+    floats = "weights = [" + ", ".join(f"{(-1) ** i * i / 3:.4f}" for i in range(100)) + "]"
+    assert summarize_large_literals(floats) == "weights = <list of 100 floats>"
+    ints = "offsets = (" + ", ".join(str(-i - 1) for i in range(100)) + ")"
+    assert summarize_large_literals(ints) == "offsets = <tuple of 100 ints>"
+
+def test_small_literals_and_invalid_code_are_unchanged():
+    assert summarize_large_literals("x = [1, 2, 3]") == "x = [1, 2, 3]"
+    broken = "x = [" + "1, " * 100
+    assert summarize_large_literals(broken) == broken
+
+def test_noise_is_stripped_outside_strings_only():
+    source = ('# ==========\n'
+              'x = 1   \n'
+              '\n'
+              'query = """\n'
+              'SELECT *   \n'
+              '\n'
+              '-- ----\n'
+              '# -----\n'
+              '"""\n'
+              '# keep this comment\n')
+    assert strip_code_noise(source) == ('x = 1\n'
+                                        'query = """\n'
+                                        'SELECT *   \n'
+                                        '\n'
+                                        '-- ----\n'
+                                        '# -----\n'
+                                        '"""\n'
+                                        '# keep this comment')
+
+def test_compaction_report():
+    stats = {}
+    record_compaction(stats, "a" * 400, "a" * 100)
+    assert compaction_report(stats) == "Prompt compaction saved ~75 tokens (75.0%)."
@@ -0,0 +1,54 @@
+from renderer import MARKDOWN_BACKENDS, clear_fragment_cache, render_fragments, split_fragments, render_html_document
+
+SUMMARY = (
+    "## Notebook Overview:\n"
+    "Trains a model.\n\n"
+    "## Cell-by-Cell Summary:\n"
+    "● **Cell 1 (Code):** Prints a banner:\n"
+    "```python\n"
+    "print('''\n"
+    "## not a heading\n"
+    "● **Cell 9 (Code):** not an entry\n"
+    "''')\n"
+    "```\n"
+    "● **Cell 2 (Code):** Uses a tilde fence:\n"
+    "~~~\n"
+    "## still code\n"
+    "```\n"
+    "~~~\n"
+)
+
+def test_split_keeps_fenced_blocks_whole():
+    fragments = split_fragments(SUMMARY)
+    assert [fragment.split("\n")[0] for fragment in fragments] == [
+        "## Notebook Overview:",
+        "## Cell-by-Cell Summary:",
+        "● **Cell 1 (Code):** Prints a banner:",
+        "● **Cell 2 (Code):** Uses a tilde fence:",
+    ]
+    assert "## not a heading" in fragments[2]
+    assert "## still code" in fragments[3]
+    assert "".join(fragments) == SUMMARY
+
+def test_fenced_heading_is_rendered_as_code():
+    html = render_html_document(SUMMARY, "test")
+    assert "<h2>not a heading</h2>" not in html
+    assert "## not a heading" in html
+
+def test_batched_cold_render_matches_fragment_by_fragment(monkeypatch):
+    summary = SUMMARY + (
+        "● **Cell 3 (Code):** Has a rule of its own:\n\n---\n\nand text after it.\n"
+        "● **Cell 4 (Code):** Lists:\n* one\n* two\n"
+        "● **Cell 5 (Code):** Opens a fence that never closes:\n```\ncode\n"
+    )
+    fragments = split_fragments(summary)
+    for backend, convert in MARKDOWN_BACKENDS.items():
+        clear_fragment_cache()
+        calls = []
+        monkeypatch.setitem(MARKDOWN_BACKENDS, backend, lambda text, convert=convert: calls.append(text) or convert(text))
+        rendered = render_fragments(fragments, backend)
+        assert [html.strip() for html in rendered] == [convert(fragment).strip() for fragment in fragments]
+        assert len(calls) < len(fragments)
+        calls.clear()
+        assert render_fragments(fragments, backend) == rendered
+        assert calls == [] # Warm: everything comes from the fragment cache
@@ -0,0 +1,121 @@
+import pytest
+import redis
+
+try:
+    import fakeredis # Test dependency of the shared-tier tests: 'pip install -r requirements-dev.txt'
+except ImportError:
+    fakeredis = None
+
+import response_cache
+
+def test_identical_request_joins_the_one_in_flight():
+    key = response_cache.response_cache_key("model", "in-flight prompt")
+    owner, pending = response_cache.begin_request(key)
+    assert owner
+    joined, shared = response_cache.begin_request(key)
+    assert not joined and shared is pending
+    response_cache.finish_request(key, "answer")
+    assert shared.result(timeout=1) == "answer"
+    # Once finished, the next caller owns a fresh request
+    owner, _ = response_cache.begin_request(key)
+    assert owner
+    response_cache.finish_request(key, None)
+
+class CountingClient:
+    """Wraps a client and counts the remote round trips."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def mget(self, keys):
+        self.calls.append(('mget', len(keys)))
+        return self.client.mget(keys)
+
+    def set(self, name, value, ex=None):
+        self.calls.append(('set', 1))
+        return self.client.set(name, value, ex=ex)
+
+class HungClient:
+    """Simulates a server that no longer answers within the socket timeout."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def mget(self, keys):
+        self.calls += 1
+        raise redis.exceptions.TimeoutError("Timeout reading from socket")
+
+    def set(self, name, value, ex=None):
+        self.calls += 1
+        raise redis.exceptions.TimeoutError("Timeout reading from socket")
+
+@pytest.fixture
+def shared_server():
+    if fakeredis is None:
+        pytest.skip("fakeredis is not installed")
+    server = fakeredis.FakeServer()
+    yield server
+    response_cache.set_shared_cache(None)
+    response_cache._cache.clear()
+
+def _fresh_replica(server):
+    """Empties the local tier, as if the next lookups ran on another replica."""
+    response_cache._cache.clear()
+    client = CountingClient(fakeredis.FakeRedis(server=server, decode_responses=True))
+    response_cache.set_shared_cache(client)
+    return client
+
+def test_shared_hit_is_served_to_another_replica(shared_server):
+    _fresh_replica(shared_server)
+    key = response_cache.response_cache_key("model", "prompt")
+    response_cache.store_response(key, "cached answer")
+
+    client = _fresh_replica(shared_server)
+    assert response_cache.get_cached_response(key) == "cached answer"
+    assert response_cache.get_cached_response(key) == "cached answer" # Now a local hit
+    assert client.calls == [('mget', 1)]
+
+def test_shared_miss_returns_none(shared_server):
+    client = _fresh_replica(shared_server)
+    assert response_cache.get_cached_response(response_cache.response_cache_key("model", "unknown")) is None
+    assert client.calls == [('mget', 1)]
+
+def test_prefetch_batches_lookups_and_trusts_misses(shared_server):
+    _fresh_replica(shared_server)
+    keys = [response_cache.response_cache_key("model", f"prompt {i}") for i in range(10)]
+    for key in keys[:4]:
+        response_cache.store_response(key, f"answer for {key}")
+
+    client = _fresh_replica(shared_server)
+    assert response_cache.prefetch_cached_responses(keys) == set(keys[:4])
+    for key in keys:
+        response_cache.get_cached_response(key)
+    # One MGET for the whole notebook; neither hits nor known misses cost another round trip
+    assert client.calls == [('mget', 10)]
+
+    response_cache.store_response(keys[5], "fresh answer")
+    assert response_cache.get_cached_response(keys[5]) == "fresh answer"
+
+def test_hung_server_trips_the_breaker(shared_server, monkeypatch):
+    monkeypatch.setattr(response_cache, "SHARED_CACHE_BREAKER_FAILURES", 2)
+    response_cache._cache.clear()
+    client = HungClient()
+    response_cache.set_shared_cache(client)
+    keys = [response_cache.response_cache_key("model", f"prompt {i}") for i in range(20)]
+    for key in keys:
+        assert response_cache.get_cached_response(key) is None
+        response_cache.store_response(key, "answer")
+    assert client.calls == 2 # Later lookups and stores skip the shared tier
+    assert response_cache.get_cached_response(keys[0]) == "answer" # The local tier keeps working
+
+def test_breaker_probes_again_after_backoff(shared_server, monkeypatch):
+    monkeypatch.setattr(response_cache, "SHARED_CACHE_BREAKER_FAILURES", 1)
+    monkeypatch.setattr(response_cache, "SHARED_CACHE_BREAKER_BACKOFF_S", 0.0)
+    response_cache._cache.clear()
+    response_cache.set_shared_cache(HungClient())
+    response_cache.get_cached_response("a")
+    healthy = CountingClient(fakeredis.FakeRedis(server=shared_server, decode_responses=True))
+    response_cache._shared_cache = healthy # Server recovered; the breaker state is kept
+    assert response_cache.get_cached_response("b") is None
+    assert healthy.calls == [('mget', 1)]
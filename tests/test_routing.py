@@ -0,0 +1,64 @@
+import ai_logic
+from models import Cell
+from routing import choose_tier, passes_quality_check, score_cell
+
+SIMPLE = Cell.create('code', "df.head()")
+COMPLEX = Cell.create('code', "\n".join([
+    "def train(folds):",
+    "    for fold in folds:",
+    "        if fold.valid:",
+    "            with timer():",
+    "                try:",
+    "                    model.fit(fold.X, fold.y)",
+    "                    scores.append(model.score(fold.X_val, fold.y_val))",
+    "                except ValueError:",
+    "                    log.warning('skipped fold')",
+]))
+
+def test_score_counts_lines_nesting_and_distinct_calls():
+    assert score_cell("x = 1\n\ny = f(x) + f(x) + g.h(y)") == {'lines': 2, 'nesting': 0, 'distinct_calls': 2, 'score': 6}
+    assert score_cell(COMPLEX.content, COMPLEX.tree)['nesting'] == 5
+    assert score_cell("def broken(:\n    pass") == {'lines': 2, 'nesting': 0, 'distinct_calls': 0, 'score': 2}
+
+def test_most_complex_cell_decides_the_tier():
+    threshold = score_cell(COMPLEX.content)['score']
+    assert choose_tier([SIMPLE], threshold) == 'fast'
+    assert choose_tier([SIMPLE, COMPLEX], threshold) == 'strong'
+    assert choose_tier([], threshold) == 'fast'
+
+def test_quality_check_rejects_errors_refusals_and_short_answers():
+    assert passes_quality_check("Loads the churn data into a DataFrame and drops incomplete rows.")
+    assert not passes_quality_check("Loads data.")
+    assert not passes_quality_check("An error occurred while generating AI response: quota exceeded, please retry.")
+    assert not passes_quality_check("I cannot explain this cell because the code is incomplete or truncated.")
+
+def _record_models(monkeypatch, answers):
+    sent = []
+
+    def fake_response(prompt, model_name, cancel_event=None):
+        sent.append(model_name)
+        return answers[model_name]
+
+    monkeypatch.setattr(ai_logic, "get_gemini_response", fake_response)
+    monkeypatch.setattr(ai_logic, "FAST_LLM_MODEL", "fast-model")
+    monkeypatch.setattr(ai_logic, "STRONG_LLM_MODEL", "strong-model")
+    monkeypatch.setattr(ai_logic, "ROUTING_COMPLEXITY_THRESHOLD", score_cell(COMPLEX.content)['score'])
+    return sent
+
+def test_routing_is_off_by_default(monkeypatch):
+    monkeypatch.setattr(ai_logic, "MODEL_ROUTING_ENABLED", False)
+    sent = _record_models(monkeypatch, {ai_logic.LLM_MODEL: "Explains the cell."})
+    ai_logic._run_routed_prompt("prompt", [COMPLEX])
+    assert sent == [ai_logic.LLM_MODEL]
+
+def test_fast_answer_failing_the_check_is_escalated(monkeypatch):
+    monkeypatch.setattr(ai_logic, "MODEL_ROUTING_ENABLED", True)
+    monkeypatch.setattr(ai_logic, "MODEL_CASCADE_ENABLED", True)
+    good = "Shows the first rows of the DataFrame to inspect its columns."
+    sent = _record_models(monkeypatch, {"fast-model": "Shows rows.", "strong-model": good})
+    assert ai_logic._run_routed_prompt("prompt", [SIMPLE]) == good
+    assert sent == ["fast-model", "strong-model"]
+
+    sent.clear()
+    assert ai_logic._run_routed_prompt("prompt", [COMPLEX]) == good
+    assert sent == ["strong-model"]
@@ -0,0 +1,47 @@
+from models import Cell
+from static_summary import format_corpus_summary, format_local_summary, summarize_corpus, summarize_notebook_locally
+
+CELLS = [
+    Cell.create('markdown', "# Churn model"),
+    Cell.create('code', "import pandas as pd\nfrom sklearn.ensemble import RandomForestClassifier\ndf = pd.read_csv('churn.csv')"),
+    Cell.create('code', "df = df.dropna()\nmodel = RandomForestClassifier()\nmodel.fit(df, df.churn)"),
+    Cell.create('code', "def report(m):\n    return m.score(df, df.churn)\n\nprint(report(model))"),
+    Cell.create('code', "plt.plot(df.age)\nplt.savefig('age.png')"),
+    Cell.create('code', "def broken(:"),
+]
+
+def test_local_summary_lists_facts_in_notebook_order():
+    summary = summarize_notebook_locally(CELLS)
+    assert (summary['code_cells'], summary['markdown_cells'], summary['unparsed_cells']) == (5, 1, 1)
+    assert summary['lines_of_code'] == 12
+    assert summary['imports'] == ['pandas', 'sklearn']
+    assert summary['functions'] == ['report']
+    assert summary['data_files'] == ['churn.csv']
+    assert summary['stages'] == [('load', 2), ('preprocess', 3), ('train', 3), ('evaluate', 4), ('plot', 5)]
+    text = format_local_summary(summary)
+    assert "* **Data files read:** `churn.csv`" in text
+    assert "load (cell 2) → preprocess (cell 3)" in text
+    assert "1 code cell(s) could not be parsed" in text
+
+def test_files_opened_for_writing_are_not_data_files_read():
+    summary = summarize_notebook_locally([Cell.create('code', (
+        "with open('config.yaml') as f:\n    config = f.read()\n"
+        "with open('raw.bin', 'rb') as f:\n    raw = f.read()\n"
+        "with open('out.txt', 'w') as f:\n    f.write('done')\n"
+        "log = open('run.log', mode='a')\n"
+        "Path('result.json').open('w')\n"
+        "df.to_csv('predictions.csv')\n"
+    ))])
+    assert summary['data_files'] == ['config.yaml', 'raw.bin']
+    assert summary['stages'] == [('load', 1)]
+
+    written_only = summarize_notebook_locally([Cell.create('code', "with open('out.txt', 'w') as f:\n    f.write('x')")])
+    assert written_only['data_files'] == [] and written_only['stages'] == []
+
+def test_corpus_counts_notebooks_per_fact():
+    other = summarize_notebook_locally([Cell.create('code', "import pandas as pd\npd.read_csv('churn.csv')")])
+    corpus = summarize_corpus([summarize_notebook_locally(CELLS), other])
+    assert corpus['notebooks'] == 2 and corpus['code_cells'] == 6
+    assert corpus['imports'] == {'pandas': 2, 'sklearn': 1}
+    assert corpus['stages']['load'] == 2 and corpus['stages']['train'] == 1
+    assert "`pandas` (2/2)" in format_corpus_summary(corpus)
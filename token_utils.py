@@ -0,0 +1,19 @@
+import math
+
+# Rough average for English prose and Python source with Gemini/SentencePiece-style
+# tokenizers. Good enough for budgeting; never use it for billing.
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheaply estimates how many LLM tokens a piece of text will consume.
+
+    Args:
+        text (str): The text that will be sent to (or returned by) the LLM.
+
+    Returns:
+        int: An approximate token count (0 for empty text).
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)